@@ -17,9 +17,13 @@ import requests
 import json
 import time
 import argparse
+import sys
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'core'))
+from http_utils import TokenBucket, make_session, retry_after
+
 # Global cache for CoinGecko coins list
 _coingecko_coins_cache = None
 _cache_timestamp = None
@@ -33,6 +37,34 @@ CMC_MAPPING_FILE = ROOT / 'binance_cmc_mapping.json'
 # Global cache for local CMC mapping
 _cmc_mapping_cache = None
 
+# CoinGecko Rate Limit: ~30 calls per minute (free tier)
+COINGECKO_CALLS_PER_MINUTE = 30
+
+
+# Shared by every thread calling CoinGecko, so parallel fetches stay within the limit
+COINGECKO_BUCKET = TokenBucket(1, COINGECKO_CALLS_PER_MINUTE / 60)
+
+# Binance allows far more (request weight 6000/min); 20 calls/s leaves ample headroom
+BINANCE_CALLS_PER_SECOND = 20
+BINANCE_BUCKET = TokenBucket(BINANCE_CALLS_PER_SECOND, BINANCE_CALLS_PER_SECOND)
+
+
+def coingecko_get(url: str, timeout: float = 10, max_retries: int = 3) -> requests.Response:
+    """GET a CoinGecko URL paced by COINGECKO_BUCKET.
+    
+    A 429 feeds its Retry-After back into the bucket, so the retry (and every
+    other thread) waits exactly as long as the server asked.
+    """
+    for attempt in range(max_retries):
+        COINGECKO_BUCKET.acquire()
+        response = requests.get(url, timeout=timeout)
+        if response.status_code != 429 or attempt == max_retries - 1:
+            return response
+        wait = retry_after(response.headers)
+        print(f"⏳ CoinGecko rate limited (429), backing off {wait:.0f}s...")
+        COINGECKO_BUCKET.penalize(wait)
+    return response
+
 @dataclass
 class TokenData:
     base: str
@@ -117,12 +149,22 @@ def load_cmc_mapping() -> Dict[str, Dict]:
         return {}
 
 
-def binance_get(endpoint: str, params: Dict = None, base_url: str = "https://api.binance.com") -> Dict:
+# Shared by every spot/perp call (and thread), so each call reuses an open TLS connection to
+# api.binance.com / fapi.binance.com; total=0 because retries (and 418/429 backoff) stay in binance_get
+_BINANCE_SESSION = make_session(total=0, pool_connections=2, pool_maxsize=8)
+
+
+def binance_get(endpoint: str, params: Dict = None, base_url: str = "https://api.binance.com",
+                session: requests.Session = _BINANCE_SESSION) -> Dict:
     """Make a request to Binance API with retry."""
     url = f"{base_url}{endpoint}"
     for attempt in range(3):
         try:
-            response = requests.get(url, params=params, timeout=10)
+            BINANCE_BUCKET.acquire()
+            response = session.get(url, params=params, timeout=10)
+            if response.status_code in (418, 429):
+                # Rate limited: hold every thread back for as long as Binance asks
+                BINANCE_BUCKET.penalize(retry_after(response.headers))
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -139,7 +181,8 @@ def calculate_funding_cycle(symbol: str) -> int:
         symbol_usdt = f"{symbol}USDT"
         url = f'https://fapi.binance.com/fapi/v1/fundingRate?symbol={symbol_usdt}&limit=3'
         
-        response = requests.get(url, timeout=10)
+        BINANCE_BUCKET.acquire()
+        response = _BINANCE_SESSION.get(url, timeout=10)
         if response.status_code == 200:
             data = response.json()
             
@@ -271,13 +314,9 @@ def fetch_perp_data(symbol: str) -> Dict[str, Any]:
 
 def fetch_coingecko_supply_data(coingecko_id: str) -> Dict[str, Any]:
     """Fetch supply, ATH/ATL, logo and additional data from CoinGecko (static data, no need for real-time updates)."""
-    # CoinGecko Rate Limit: ~30 calls per minute (free tier)
-    # So we need at least 2 seconds between requests
-    time.sleep(2.1)
-    
     try:
         url = f"https://api.coingecko.com/api/v3/coins/{coingecko_id}"
-        response = requests.get(url, timeout=10)
+        response = coingecko_get(url, timeout=10)
         response.raise_for_status()
         data = response.json()
         
@@ -386,13 +425,10 @@ def get_coingecko_coins_list():
     if _coingecko_coins_cache and _cache_timestamp and (time.time() - _cache_timestamp < 3600):
         return _coingecko_coins_cache
     
-    # CoinGecko Rate Limit: ~30 calls per minute (free tier)
-    time.sleep(2.1)
-    
     try:
         print("📥 Fetching CoinGecko coins list...")
         url = "https://api.coingecko.com/api/v3/coins/list"
-        response = requests.get(url, timeout=15)
+        response = coingecko_get(url, timeout=15)
         
         if response.status_code == 200:
             _coingecko_coins_cache = response.json()
@@ -626,9 +662,6 @@ def fetch_enhanced_data(symbols: List[str]) -> List[TokenData]:
             print(f"FDV (calc): ${token_data.fdv_calc:,.0f}")
         
         results.append(token_data)
-        
-        # Rate limiting for Binance APIs (more lenient)
-        time.sleep(0.5)
     
     return results
 
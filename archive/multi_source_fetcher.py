@@ -4,19 +4,37 @@
 支持CoinGecko和CoinMarketCap作为备用数据源，自动处理限速和故障切换
 """
 
-import requests
-import json
+import functools
+import httpx
+import logging
+import orjson
+import sys
+import threading
 import time
 import os
+from collections import OrderedDict
+from concurrent.futures import Future
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
 from enum import Enum
+from pathlib import Path
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'core'))
+from http_utils import TokenBucket, retry_after
+
+logger = logging.getLogger(__name__)
+
+CMC_QUOTES_URL = "https://pro-api.coinmarketcap.com/v1/cryptocurrency/quotes/latest"
+COINGECKO_MARKETS_URL = "https://api.coingecko.com/api/v3/coins/markets"
+CMC_BATCH_SIZE = 100        # quotes/latest 每次最多 100 个 symbol
+COINGECKO_BATCH_SIZE = 250  # coins/markets 每页最多 250 个
 
 class DataSource(Enum):
     COINGECKO = "coingecko"
     COINMARKETCAP = "coinmarketcap"
 
-@dataclass
+@dataclass(frozen=True)
 class TokenSupplyData:
     """代币供应量数据"""
     total_supply: Optional[float] = None
@@ -31,6 +49,84 @@ class TokenSupplyData:
     logo_url: Optional[str] = None
     data_source: Optional[str] = None
 
+class TTLCache:
+    """带过期时间的 LRU 缓存：key -> (expiry_monotonic, value)，超过 maxsize 时淘汰最久未用的"""
+    
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expiry, value = entry
+            if expiry <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+def ttl_cached(ttl: float, maxsize: int = 1024):
+    """缓存方法的非 None 结果（按参数区分，各实例共享）；命中时不占用限速额度也不发请求"""
+    def decorator(method):
+        cache = TTLCache(ttl, maxsize)
+        
+        @functools.wraps(method)
+        def wrapper(self, *args):
+            value = cache.get(args)
+            if value is None:
+                value = method(self, *args)
+                if value is not None:
+                    cache.set(args, value)
+            return value
+        
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+class _RateLimited(Exception):
+    """HTTP 429（由 _make_request 的重试装饰器处理）；retry_after 为服务器要求等待的秒数"""
+    
+    def __init__(self, url: str, retry_after: float):
+        super().__init__(url)
+        self.retry_after = retry_after
+
+class _ServerError(Exception):
+    """HTTP 5xx（同样由 _make_request 的重试装饰器处理）"""
+
+_backoff = wait_exponential_jitter(initial=1, max=30)
+
+def _wait_retry_after(retry_state) -> float:
+    """_make_request 的重试等待：带抖动指数退避，429 时至少等到 Retry-After 要求的时间"""
+    wait = _backoff(retry_state)
+    exc = retry_state.outcome.exception()
+    if isinstance(exc, _RateLimited):
+        wait = max(wait, exc.retry_after)
+    return wait
+
+def _make_client() -> httpx.Client:
+    """HTTP/2 client: concurrent requests to one host share a single multiplexed connection
+
+    The transport retries failed connects; 429/5xx are handled by _make_request.
+    """
+    transport = httpx.HTTPTransport(
+        http2=True,
+        retries=3,
+        limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
+    )
+    return httpx.Client(transport=transport, timeout=15)
+
 class MultiSourceCryptoFetcher:
     """多数据源加密货币数据获取器"""
     
@@ -38,9 +134,11 @@ class MultiSourceCryptoFetcher:
         # CoinMarketCap API密钥（可选，有密钥会有更高的限速）
         self.cmc_api_key = os.getenv('CMC_API_KEY')  # 从环境变量获取
         
-        # 请求限制配置
-        self.coingecko_delay = 2.1  # CoinGecko免费版限制
-        self.cmc_delay = 1.0 if self.cmc_api_key else 3.0  # 有密钥的话更快
+        # 请求限制配置：每个数据源一个令牌桶（按分钟配额，允许突发）
+        self.buckets = {
+            DataSource.COINGECKO: TokenBucket(30, 30 / 60),  # CoinGecko免费版 ~30次/分钟
+            DataSource.COINMARKETCAP: TokenBucket(30, (333 if self.cmc_api_key else 30) / 60),  # 有密钥的话更快
+        }
         
         # 上次请求时间记录
         self.last_request_time = {
@@ -56,43 +154,61 @@ class MultiSourceCryptoFetcher:
         
         # 当前首选数据源
         self.preferred_source = DataSource.COINGECKO
+        
+        # 复用 TCP/TLS 连接（CoinGecko 和 CMC 各自一条 HTTP/2 长连接，并发请求多路复用）
+        self.client = _make_client()
+        
+        # 正在进行中的请求：(symbol, coingecko_id) -> Future，并发的相同请求只发一次
+        self._inflight: Dict[Tuple[str, Optional[str]], Future] = {}
+        self._inflight_lock = threading.Lock()
     
     def _wait_for_rate_limit(self, source: DataSource):
-        """等待满足限速要求"""
-        delay = self.coingecko_delay if source == DataSource.COINGECKO else self.cmc_delay
-        elapsed = time.time() - self.last_request_time[source]
-        
-        if elapsed < delay:
-            wait_time = delay - elapsed
-            print(f"⏳ {source.value} 限速等待 {wait_time:.1f}秒...")
-            time.sleep(wait_time)
+        """等待满足限速要求（令牌桶为空时才阻塞）"""
+        waited = self.buckets[source].acquire()
+        if waited > 1.0:
+            logger.info("⏳ %s 限速等待 %.1f秒", source.value, waited)
     
-    def _make_request(self, url: str, headers: Dict = None, timeout: int = 15) -> Optional[Dict]:
-        """发起HTTP请求"""
+    @retry(retry=retry_if_exception_type((_RateLimited, _ServerError)), stop=stop_after_attempt(4),
+           wait=_wait_retry_after, retry_error_callback=lambda state: None)
+    def _make_request(self, url: str, headers: Dict = None, timeout: int = 15,
+                      params: Dict = None, source: DataSource = None) -> Optional[Dict]:
+        """发起HTTP请求；429 时按 Retry-After 回压对应数据源的令牌桶，429/5xx 带抖动指数退避重试
+
+        每次尝试（包括重试）都先从 source 的令牌桶取令牌
+        """
+        if source is not None:
+            self._wait_for_rate_limit(source)
+            self.last_request_time[source] = time.time()
         try:
-            response = requests.get(url, headers=headers, timeout=timeout)
+            response = self.client.get(url, headers=headers, params=params, timeout=timeout)
             
             if response.status_code == 200:
-                return response.json()
+                return orjson.loads(response.content)
             elif response.status_code == 429:
-                print(f"⚠️ 限速 429: {url}")
-                return None
+                wait = retry_after(response.headers)
+                print(f"⚠️ 限速 429 (Retry-After {wait:.0f}s): {url}")
+                if source is not None:
+                    self.buckets[source].penalize(wait)
+                raise _RateLimited(url, wait)
+            elif response.status_code >= 500:
+                print(f"⚠️ HTTP {response.status_code}，稍后重试: {url}")
+                raise _ServerError(url)
             else:
                 print(f"⚠️ HTTP {response.status_code}: {url}")
                 return None
                 
+        except (_RateLimited, _ServerError):
+            raise
         except Exception as e:
             print(f"❌ 请求错误: {e}")
             return None
     
+    @ttl_cached(300)
     def fetch_coingecko_data(self, coingecko_id: str) -> Optional[TokenSupplyData]:
         """从CoinGecko获取数据"""
-        self._wait_for_rate_limit(DataSource.COINGECKO)
-        self.last_request_time[DataSource.COINGECKO] = time.time()
-        
         url = f"https://api.coingecko.com/api/v3/coins/{coingecko_id}"
         
-        data = self._make_request(url)
+        data = self._make_request(url, source=DataSource.COINGECKO)
         if not data:
             self.error_count[DataSource.COINGECKO] += 1
             return None
@@ -119,66 +235,198 @@ class MultiSourceCryptoFetcher:
             self.error_count[DataSource.COINGECKO] += 1
             return None
     
+    @ttl_cached(300)
     def fetch_coinmarketcap_data(self, symbol: str) -> Optional[TokenSupplyData]:
         """从CoinMarketCap获取数据"""
-        self._wait_for_rate_limit(DataSource.COINMARKETCAP)
-        self.last_request_time[DataSource.COINMARKETCAP] = time.time()
-        
-        # CoinMarketCap API端点
-        url = "https://pro-api.coinmarketcap.com/v1/cryptocurrency/quotes/latest"
-        
-        headers = {
-            'Accept': 'application/json',
-        }
-        
-        # 如果有API密钥，添加到请求头
-        if self.cmc_api_key:
-            headers['X-CMC_PRO_API_KEY'] = self.cmc_api_key
-        
+        sym = symbol.upper()
         params = {
-            'symbol': symbol.upper(),
+            'symbol': sym,
             'convert': 'USD'
         }
         
-        # 构造完整URL
-        param_str = '&'.join([f"{k}={v}" for k, v in params.items()])
-        full_url = f"{url}?{param_str}"
-        
-        data = self._make_request(full_url, headers=headers)
+        data = self._make_request(CMC_QUOTES_URL, headers=self._cmc_headers(), params=params,
+                                  source=DataSource.COINMARKETCAP)
         if not data:
             self.error_count[DataSource.COINMARKETCAP] += 1
             return None
         
         try:
             # CoinMarketCap返回格式
-            if 'data' not in data or symbol.upper() not in data['data']:
+            coin_data = (data.get('data') or {}).get(sym)
+            if coin_data is None:
                 print(f"❌ CoinMarketCap未找到代币: {symbol}")
                 return None
             
-            coin_data = data['data'][symbol.upper()]
-            quote_data = coin_data.get('quote', {}).get('USD', {})
-            
-            return TokenSupplyData(
-                total_supply=coin_data.get('total_supply'),
-                circulating_supply=coin_data.get('circulating_supply'),
-                max_supply=coin_data.get('max_supply'),
-                market_cap=quote_data.get('market_cap'),
-                price_usd=quote_data.get('price'),
-                volume_24h=quote_data.get('volume_24h'),
-                price_change_24h=quote_data.get('percent_change_24h'),
-                ath=None,  # CoinMarketCap基础API不包含ATH数据
-                atl=None,
-                logo_url=None,  # 需要单独的API调用获取Logo
-                data_source="coinmarketcap"
-            )
+            return self._parse_cmc_coin(coin_data)
             
         except Exception as e:
             print(f"❌ CoinMarketCap数据解析错误: {e}")
             self.error_count[DataSource.COINMARKETCAP] += 1
             return None
     
+    def _cmc_headers(self) -> Dict:
+        headers = {
+            'Accept': 'application/json',
+        }
+        
+        # 如果有API密钥，添加到请求头
+        if self.cmc_api_key:
+            headers['X-CMC_PRO_API_KEY'] = self.cmc_api_key
+        return headers
+    
+    @staticmethod
+    def _parse_cmc_coin(coin_data: Dict) -> TokenSupplyData:
+        """quotes/latest 中单个币种的数据 -> TokenSupplyData"""
+        quote_data = coin_data.get('quote', {}).get('USD', {})
+        
+        return TokenSupplyData(
+            total_supply=coin_data.get('total_supply'),
+            circulating_supply=coin_data.get('circulating_supply'),
+            max_supply=coin_data.get('max_supply'),
+            market_cap=quote_data.get('market_cap'),
+            price_usd=quote_data.get('price'),
+            volume_24h=quote_data.get('volume_24h'),
+            price_change_24h=quote_data.get('percent_change_24h'),
+            ath=None,  # CoinMarketCap基础API不包含ATH数据
+            atl=None,
+            logo_url=None,  # 需要单独的API调用获取Logo
+            data_source="coinmarketcap"
+        )
+    
+    def fetch_coinmarketcap_batch(self, symbols: List[str]) -> Dict[str, TokenSupplyData]:
+        """批量从CoinMarketCap获取数据（每 100 个 symbol 一次请求），返回 {SYMBOL: data}
+        
+        已在 fetch_coinmarketcap_data 缓存中的币种不再请求，新结果也写回该缓存
+        """
+        cache = type(self).fetch_coinmarketcap_data.cache
+        results = {}
+        missing = []
+        for symbol in dict.fromkeys(s.upper() for s in symbols):
+            cached = cache.get((symbol,))
+            if cached is not None:
+                results[symbol] = cached
+            else:
+                missing.append(symbol)
+        
+        for i in range(0, len(missing), CMC_BATCH_SIZE):
+            chunk = missing[i:i + CMC_BATCH_SIZE]
+            
+            params = {'symbol': ','.join(chunk), 'convert': 'USD', 'skip_invalid': 'true'}
+            data = self._make_request(CMC_QUOTES_URL, headers=self._cmc_headers(), params=params,
+                                      source=DataSource.COINMARKETCAP)
+            if not data:
+                self.error_count[DataSource.COINMARKETCAP] += 1
+                continue
+            
+            for symbol, coin_data in (data.get('data') or {}).items():
+                try:
+                    token = self._parse_cmc_coin(coin_data)
+                except Exception as e:
+                    print(f"❌ CoinMarketCap数据解析错误 ({symbol}): {e}")
+                    continue
+                results[symbol] = token
+                cache.set((symbol,), token)
+        
+        return results
+    
+    def fetch_coingecko_batch(self, coingecko_ids: List[str]) -> Dict[str, TokenSupplyData]:
+        """批量从CoinGecko获取数据（coins/markets，每 250 个 id 一次请求），返回 {id: data}"""
+        cache = type(self).fetch_coingecko_data.cache
+        results = {}
+        missing = []
+        for coingecko_id in dict.fromkeys(coingecko_ids):
+            cached = cache.get((coingecko_id,))
+            if cached is not None:
+                results[coingecko_id] = cached
+            else:
+                missing.append(coingecko_id)
+        
+        for i in range(0, len(missing), COINGECKO_BATCH_SIZE):
+            chunk = missing[i:i + COINGECKO_BATCH_SIZE]
+            
+            params = {'vs_currency': 'usd', 'ids': ','.join(chunk), 'per_page': COINGECKO_BATCH_SIZE}
+            data = self._make_request(COINGECKO_MARKETS_URL, params=params, source=DataSource.COINGECKO)
+            if not data:
+                self.error_count[DataSource.COINGECKO] += 1
+                continue
+            
+            for coin in data:
+                token = TokenSupplyData(
+                    total_supply=coin.get('total_supply'),
+                    circulating_supply=coin.get('circulating_supply'),
+                    max_supply=coin.get('max_supply'),
+                    market_cap=coin.get('market_cap'),
+                    price_usd=coin.get('current_price'),
+                    volume_24h=coin.get('total_volume'),
+                    price_change_24h=coin.get('price_change_percentage_24h'),
+                    ath=coin.get('ath'),
+                    atl=coin.get('atl'),
+                    logo_url=coin.get('image'),
+                    data_source="coingecko"
+                )
+                results[coin['id']] = token
+                cache.set((coin['id'],), token)
+        
+        return results
+    
+    def fetch_many(self, pairs: List[Tuple[str, Optional[str]]]) -> Dict[str, TokenSupplyData]:
+        """fetch_with_fallback 的批量版本：pairs 为 (symbol, coingecko_id)，返回 {symbol: data}
+        
+        先用首选数据源的批量接口获取，失败的币种再用另一个数据源的批量接口补齐
+        """
+        use_cmc_first = (self.error_count[DataSource.COINGECKO] > 5
+                         and self.error_count[DataSource.COINMARKETCAP] <= 5)
+        results: Dict[str, TokenSupplyData] = {}
+        
+        def from_coingecko(todo):
+            ids = {symbol: cg_id for symbol, cg_id in todo if cg_id}
+            fetched = self.fetch_coingecko_batch(list(ids.values()))
+            for symbol, cg_id in ids.items():
+                if cg_id in fetched:
+                    results[symbol] = fetched[cg_id]
+        
+        def from_coinmarketcap(todo):
+            fetched = self.fetch_coinmarketcap_batch([symbol for symbol, _ in todo])
+            for symbol, _ in todo:
+                if symbol.upper() in fetched:
+                    results[symbol] = fetched[symbol.upper()]
+        
+        steps = [from_coinmarketcap, from_coingecko] if use_cmc_first else [from_coingecko, from_coinmarketcap]
+        for step in steps:
+            todo = [(symbol, cg_id) for symbol, cg_id in pairs if symbol not in results]
+            if todo:
+                step(todo)
+        
+        failed = [symbol for symbol, _ in pairs if symbol not in results]
+        if failed:
+            print(f"❌ 所有数据源都失败: {', '.join(failed)}")
+        return results
+    
     def fetch_with_fallback(self, symbol: str, coingecko_id: str = None) -> Optional[TokenSupplyData]:
-        """带故障转移的数据获取"""
+        """带故障转移的数据获取（多个线程同时请求同一币种时合并为一次请求）"""
+        key = (symbol.upper(), coingecko_id)
+        with self._inflight_lock:
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._inflight[key] = Future()
+        
+        if not leader:
+            return fut.result()
+        
+        try:
+            result = self._fetch_with_fallback(symbol, coingecko_id)
+            fut.set_result(result)
+            return result
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+    
+    def _fetch_with_fallback(self, symbol: str, coingecko_id: str = None) -> Optional[TokenSupplyData]:
+        """fetch_with_fallback 的实际实现"""
         
         # 决定首选数据源
         primary_source = self.preferred_source
@@ -193,7 +441,7 @@ class MultiSourceCryptoFetcher:
         
         # 尝试主数据源
         if primary_source == DataSource.COINGECKO and coingecko_id:
-            print(f"🔄 尝试CoinGecko: {symbol} -> {coingecko_id}")
+            logger.debug("🔄 尝试CoinGecko: %s -> %s", symbol, coingecko_id)
             data = self.fetch_coingecko_data(coingecko_id)
             if data:
                 return data
@@ -201,12 +449,12 @@ class MultiSourceCryptoFetcher:
         
         # 尝试备用数据源
         if primary_source == DataSource.COINGECKO:
-            print(f"🔄 尝试CoinMarketCap: {symbol}")
+            logger.debug("🔄 尝试CoinMarketCap: %s", symbol)
             data = self.fetch_coinmarketcap_data(symbol)
             if data:
                 return data
         else:
-            print(f"🔄 尝试CoinMarketCap: {symbol}")
+            logger.debug("🔄 尝试CoinMarketCap: %s", symbol)
             data = self.fetch_coinmarketcap_data(symbol)
             if data:
                 return data
@@ -248,23 +496,25 @@ def test_multi_source_fetcher():
         symbol = test_case['symbol']
         coingecko_id = test_case['coingecko_id']
         
-        print(f"\n--- 测试 {i}: {symbol} ---")
-        
         start_time = time.time()
         data = fetcher.fetch_with_fallback(symbol, coingecko_id)
         end_time = time.time()
         
+        # 每个用例的报告拼好后一次写出
+        lines = [f"\n--- 测试 {i}: {symbol} ---"]
         if data:
-            print(f"✅ 成功获取数据:")
-            print(f"  数据源: {data.data_source}")
-            print(f"  价格: ${data.price_usd:.6f}" if data.price_usd else "  价格: N/A")
-            print(f"  市值: ${data.market_cap:,.0f}" if data.market_cap else "  市值: N/A")
-            print(f"  流通量: {data.circulating_supply:,.0f}" if data.circulating_supply else "  流通量: N/A")
-            print(f"  24h变化: {data.price_change_24h:.2f}%" if data.price_change_24h else "  24h变化: N/A")
+            lines += [
+                "✅ 成功获取数据:",
+                f"  数据源: {data.data_source}",
+                f"  价格: ${data.price_usd:.6f}" if data.price_usd else "  价格: N/A",
+                f"  市值: ${data.market_cap:,.0f}" if data.market_cap else "  市值: N/A",
+                f"  流通量: {data.circulating_supply:,.0f}" if data.circulating_supply else "  流通量: N/A",
+                f"  24h变化: {data.price_change_24h:.2f}%" if data.price_change_24h else "  24h变化: N/A",
+            ]
         else:
-            print(f"❌ 获取失败")
-        
-        print(f"⏱️ 耗时: {(end_time - start_time):.2f}秒")
+            lines.append("❌ 获取失败")
+        lines.append(f"⏱️ 耗时: {(end_time - start_time):.2f}秒")
+        sys.stdout.write("\n".join(lines) + "\n")
     
     # 显示状态
     print(f"\n📊 获取器状态:")
@@ -273,5 +523,6 @@ def test_multi_source_fetcher():
         print(f"  {key}: {value}")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     # 运行测试
     test_multi_source_fetcher()
\ No newline at end of file
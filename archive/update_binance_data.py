@@ -12,6 +12,7 @@ Usage:
 
 import requests
 import json
+import orjson
 import time
 import argparse
 from datetime import datetime, timezone
@@ -46,6 +47,9 @@ class NotionClient:
             'Notion-Version': '2022-06-28'
         }
         self.base_url = 'https://api.notion.com/v1'
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self._page_url_fmt = f'{self.base_url}/pages/{{pid}}'
     
     def query_database(self, filter_params: Dict = None) -> List[Dict]:
         """Query database pages"""
@@ -63,7 +67,7 @@ class NotionClient:
                 payload['start_cursor'] = start_cursor
             
             try:
-                response = requests.post(url, headers=self.headers, json=payload, timeout=30)
+                response = self.session.post(url, json=payload, timeout=30)
                 response.raise_for_status()
                 result = response.json()
                 
@@ -91,11 +95,12 @@ class NotionClient:
     
     def update_page(self, page_id: str, properties: Dict) -> Dict:
         """Update existing page"""
-        url = f"{self.base_url}/pages/{page_id}"
-        payload = {"properties": properties}
+        url = self._page_url_fmt.format(pid=page_id)
         
         try:
-            response = requests.patch(url, headers=self.headers, json=payload, timeout=30)
+            # Pre-serialize with orjson; Content-Type is already set on the session
+            body = orjson.dumps({"properties": properties})
+            response = self.session.patch(url, data=body, timeout=30)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -104,42 +109,47 @@ class NotionClient:
 
 
 def build_trading_properties(token_data: TokenData) -> Dict:
-    """Build Notion properties for trading data only (not basic token info)"""
+    """Build Notion properties for trading data only (not basic token info)
+
+    Uses ``is not None`` checks so legitimate zero values are still written.
+    """
     
     properties = {}
     
     # Price fields
-    if token_data.spot_price:
+    if token_data.spot_price is not None:
         properties["Spot Price"] = {"number": token_data.spot_price}
-    if token_data.perp_price:
+    if token_data.perp_price is not None:
         properties["Perp Price"] = {"number": token_data.perp_price}
     
     # 24h price change
-    if hasattr(token_data, 'spot_24h_change') and token_data.spot_24h_change is not None:
-        properties["Price change"] = {"number": token_data.spot_24h_change / 100}
-    elif hasattr(token_data, 'perp_24h_change') and token_data.perp_24h_change is not None:
-        properties["Price change"] = {"number": token_data.perp_24h_change / 100}
+    price_change = token_data.spot_24h_change
+    if price_change is None:
+        price_change = token_data.perp_24h_change
+    if price_change is not None:
+        properties["Price change"] = {"number": price_change / 100}
     
     # Basis (spot-perp spread)
     if token_data.basis is not None:
         properties["Basis"] = {"number": token_data.basis}
     
     # Volume fields
-    if token_data.spot_volume_24h:
+    if token_data.spot_volume_24h is not None:
         properties["Spot vol 24h"] = {"number": token_data.spot_volume_24h}
-    if token_data.perp_volume_24h:
+    if token_data.perp_volume_24h is not None:
         properties["Perp vol 24h"] = {"number": token_data.perp_volume_24h}
     
     # Open Interest
-    if getattr(token_data, 'open_interest_usd', None) is not None:
-        properties["OI"] = {"number": token_data.open_interest_usd}
-    elif token_data.open_interest:
-        properties["OI"] = {"number": token_data.open_interest}
+    oi = token_data.open_interest_usd
+    if oi is None:
+        oi = token_data.open_interest
+    if oi is not None:
+        properties["OI"] = {"number": oi}
     
     # Funding rate and cycle
     if token_data.funding_rate is not None:
         properties["Funding"] = {"number": token_data.funding_rate}
-    if hasattr(token_data, 'funding_cycle') and token_data.funding_cycle is not None:
+    if token_data.funding_cycle is not None:
         properties["Funding Cycle"] = {"number": token_data.funding_cycle}
     
     # Index composition
@@ -182,7 +192,7 @@ def update_binance_data(symbols: List[str] = None, limit: int = None):
     
     # Determine which symbols to update
     if symbols:
-        symbols_to_update = symbols
+        symbols_to_update = list(dict.fromkeys(symbols))
     else:
         # Get all symbols from Notion
         symbols_to_update = get_all_notion_symbols(notion_client)
@@ -10,35 +10,38 @@ sys.path.append('scripts')
 from enhanced_data_fetcher import fetch_enhanced_data
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import asdict
 
+SPOT_EXCHANGE_INFO_URL = 'https://api.binance.com/api/v3/exchangeInfo'
+PERP_EXCHANGE_INFO_URL = 'https://fapi.binance.com/fapi/v1/exchangeInfo'
+
+
+def _active_usdt_bases(exchange_info):
+    """Return base assets of all TRADING USDT pairs"""
+    return frozenset(
+        s['baseAsset'] for s in exchange_info['symbols']
+        if s['symbol'].endswith('USDT') and s['status'] == 'TRADING'
+    )
+
 def get_dual_market_tokens():
     """获取双市场代币列表"""
     print("🔍 获取双市场代币列表...")
     
-    # Get all USDT trading pairs
-    spot_response = requests.get('https://api.binance.com/api/v3/exchangeInfo')
-    perp_response = requests.get('https://fapi.binance.com/fapi/v1/exchangeInfo')
-    
-    spot_data = spot_response.json()
-    perp_data = perp_response.json()
+    # Get all USDT trading pairs (spot and perp requests run concurrently)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        spot_future = executor.submit(requests.get, SPOT_EXCHANGE_INFO_URL)
+        perp_future = executor.submit(requests.get, PERP_EXCHANGE_INFO_URL)
+        spot_data = spot_future.result().json()
+        perp_data = perp_future.result().json()
     
     # Extract active USDT pairs
-    spot_symbols = set()
-    for symbol_info in spot_data['symbols']:
-        if symbol_info['symbol'].endswith('USDT') and symbol_info['status'] == 'TRADING':
-            base = symbol_info['baseAsset']
-            spot_symbols.add(base)
-    
-    perp_symbols = set()
-    for symbol_info in perp_data['symbols']:
-        if symbol_info['symbol'].endswith('USDT') and symbol_info['status'] == 'TRADING':
-            base = symbol_info['baseAsset']
-            perp_symbols.add(base)
+    spot_symbols = _active_usdt_bases(spot_data)
+    perp_symbols = _active_usdt_bases(perp_data)
     
     # Find tokens that have both spot and perp markets
     dual_market = spot_symbols & perp_symbols
-    dual_market_list = sorted(list(dual_market))
+    dual_market_list = sorted(dual_market)
     
     print(f"📊 现货交易对: {len(spot_symbols)}")
     print(f"📊 期货交易对: {len(perp_symbols)}")
@@ -67,12 +70,21 @@ if __name__ == "__main__":
         
         print("💾 数据已保存到: data/dual_market_50.json")
         
-        # Show summary
+        # Show summary (single pass over the results)
+        spot_count = perp_count = funding_count = 0
+        for t in data:
+            if t.spot_price:
+                spot_count += 1
+            if t.perp_price:
+                perp_count += 1
+            if t.funding_rate:
+                funding_count += 1
+        
         print(f"\n📊 数据摘要:")
         print(f"  代币数量: {len(data)}")
-        print(f"  有现货价格: {sum(1 for t in data if t.spot_price)}")
-        print(f"  有期货价格: {sum(1 for t in data if t.perp_price)}")
-        print(f"  有资金费率: {sum(1 for t in data if t.funding_rate)}")
+        print(f"  有现货价格: {spot_count}")
+        print(f"  有期货价格: {perp_count}")
+        print(f"  有资金费率: {funding_count}")
         
         print(f"\n💡 前5个代币示例:")
         for i, token in enumerate(data[:5], 1):
@@ -47,14 +47,18 @@ def print_menu():
     print("  [0] 退出")
     print("\n" + "="*80)
 
-def run_update(command, description):
-    """Run update command with description"""
+def run_update(script_dir, cmd, description):
+    """Run update script with description
+
+    The script is launched directly with the current interpreter (no shell).
+    """
+    argv = [sys.executable, *cmd]
     print(f"\n🔄 {description}")
-    print(f"📝 执行命令: {command}\n")
+    print(f"📝 执行命令: {' '.join(argv)}\n")
     print("="*80)
     
     try:
-        result = subprocess.run(command, shell=True, check=True)
+        result = subprocess.run(argv, cwd=script_dir, check=True)
         print("\n" + "="*80)
         print("✅ 更新完成！")
         return True
@@ -73,7 +77,7 @@ def get_symbols_input():
     if not symbols:
         print("❌ 未输入币种")
         return None
-    return symbols
+    return symbols.split()
 
 def main():
     """Main menu loop"""
@@ -90,62 +94,62 @@ def main():
         
         elif choice == '1':
             # 快速更新 - 只更新实时数据
-            cmd = f"cd {script_dir} && python3 scripts/update_binance_trading_data.py"
-            if run_update(cmd, "快速更新所有币种（实时数据）"):
+            cmd = ["scripts/update_binance_trading_data.py"]
+            if run_update(script_dir, cmd, "快速更新所有币种（实时数据）"):
                 input("\n按 Enter 键继续...")
         
         elif choice == '2':
             # 更新静态字段
-            cmd = f"cd {script_dir} && python3 scripts/update_binance_trading_data.py --update-static-fields"
-            if run_update(cmd, "更新所有币种 + 静态字段"):
+            cmd = ["scripts/update_binance_trading_data.py", "--update-static-fields"]
+            if run_update(script_dir, cmd, "更新所有币种 + 静态字段"):
                 input("\n按 Enter 键继续...")
         
         elif choice == '3':
             # 完整更新
-            cmd = f"cd {script_dir} && python3 scripts/update_binance_trading_data.py --update-metadata"
-            if run_update(cmd, "完整更新所有币种（实时数据 + 供应量 + 静态字段）"):
+            cmd = ["scripts/update_binance_trading_data.py", "--update-metadata"]
+            if run_update(script_dir, cmd, "完整更新所有币种（实时数据 + 供应量 + 静态字段）"):
                 input("\n按 Enter 键继续...")
         
         elif choice == '4':
             # 指定币种更新
             symbols = get_symbols_input()
             if symbols:
-                cmd = f"cd {script_dir} && python3 scripts/update_binance_trading_data.py {symbols}"
-                if run_update(cmd, f"快速更新币种：{symbols}"):
+                cmd = ["scripts/update_binance_trading_data.py", *symbols]
+                if run_update(script_dir, cmd, f"快速更新币种：{' '.join(symbols)}"):
                     input("\n按 Enter 键继续...")
         
         elif choice == '5':
             # 指定币种 + 静态字段
             symbols = get_symbols_input()
             if symbols:
-                cmd = f"cd {script_dir} && python3 scripts/update_binance_trading_data.py --update-static-fields {symbols}"
-                if run_update(cmd, f"更新币种 + 静态字段：{symbols}"):
+                cmd = ["scripts/update_binance_trading_data.py", "--update-static-fields", *symbols]
+                if run_update(script_dir, cmd, f"更新币种 + 静态字段：{' '.join(symbols)}"):
                     input("\n按 Enter 键继续...")
         
         elif choice == '6':
             # 指定币种 + 完整元数据
             symbols = get_symbols_input()
             if symbols:
-                cmd = f"cd {script_dir} && python3 scripts/update_binance_trading_data.py --update-metadata {symbols}"
-                if run_update(cmd, f"完整更新币种：{symbols}"):
+                cmd = ["scripts/update_binance_trading_data.py", "--update-metadata", *symbols]
+                if run_update(script_dir, cmd, f"完整更新币种：{' '.join(symbols)}"):
                     input("\n按 Enter 键继续...")
         
         elif choice == '7':
             # 极速更新
-            cmd = f"cd {script_dir} && python3 scripts/update_binance_trading_data_fast.py"
-            if run_update(cmd, "⚡️ 极速更新所有币种（并行处理，快12倍！）"):
+            cmd = ["scripts/update_binance_trading_data_fast.py"]
+            if run_update(script_dir, cmd, "⚡️ 极速更新所有币种（并行处理，快12倍！）"):
                 input("\n按 Enter 键继续...")
         
         elif choice == '8':
             # 极速更新 + 静态字段
-            cmd = f"cd {script_dir} && python3 scripts/update_binance_trading_data_fast.py --update-static-fields"
-            if run_update(cmd, "⚡️ 极速更新 + 静态字段（并行处理）"):
+            cmd = ["scripts/update_binance_trading_data_fast.py", "--update-static-fields"]
+            if run_update(script_dir, cmd, "⚡️ 极速更新 + 静态字段（并行处理）"):
                 input("\n按 Enter 键继续...")
         
         elif choice == '9':
             # 极速完整更新
-            cmd = f"cd {script_dir} && python3 scripts/update_binance_trading_data_fast.py --update-metadata"
-            if run_update(cmd, "⚡️ 极速完整更新（并行处理 + 供应量）"):
+            cmd = ["scripts/update_binance_trading_data_fast.py", "--update-metadata"]
+            if run_update(script_dir, cmd, "⚡️ 极速完整更新（并行处理 + 供应量）"):
                 input("\n按 Enter 键继续...")
         
         else:
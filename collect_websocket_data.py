@@ -20,6 +20,9 @@ from datetime import datetime
 # Configuration
 BASE_DIR = Path(__file__).parent
 CMC_MAPPING_FILE = BASE_DIR / 'config' / 'binance_cmc_mapping.json'
+WS_DATA_FILE = BASE_DIR / 'data' / 'websocket_collected_data.json'
+# 全市场 ticker + 标记价格流（每条消息是所有币种的数组）
+ALL_MARKET_STREAM_URL = "wss://fstream.binance.com/stream?streams=!ticker@arr/!markPrice@arr@1s"
 
 async def collect_token_data(symbols: list, duration: int = 30):
     """
@@ -30,18 +33,11 @@ async def collect_token_data(symbols: list, duration: int = 30):
         duration: 收集时长（秒）
     """
     
-    # 构建 WebSocket URL
-    streams = []
-    for symbol in symbols:
-        symbol_lower = symbol.lower()
-        streams.append(f"{symbol_lower}usdt@ticker")
-        streams.append(f"{symbol_lower}usdt@markPrice")
+    # 使用全市场聚合流：一个连接覆盖所有币种，按需过滤
+    url = ALL_MARKET_STREAM_URL
     
-    stream_names = '/'.join(streams)
-    url = f"wss://fstream.binance.com/stream?streams={stream_names}"
-    
-    # 数据缓存
-    data_cache = {}
+    # 数据缓存（按已知币种预分配，热路径上无需再判断是否存在）
+    data_cache = {s.upper(): {} for s in symbols}
     
     print(f"🔌 连接 Binance WebSocket (将使用系统代理)...")
     print(f"📊 币种: {', '.join(symbols)}")
@@ -53,60 +49,63 @@ async def collect_token_data(symbols: list, duration: int = 30):
             print("✅ WebSocket 连接成功！")
             print("📡 接收数据中...\n")
             
-            start_time = asyncio.get_event_loop().time()
             message_count = 0
             
-            async for message in ws:
-                # 检查是否超时
-                if asyncio.get_event_loop().time() - start_time > duration:
-                    print(f"\n⏱️  已收集 {duration} 秒数据，停止接收")
-                    break
-                
-                try:
-                    data = json.loads(message)
-                    
-                    if 'data' not in data:
-                        continue
-                    
-                    stream_data = data['data']
-                    event_type = stream_data.get('e')
-                    symbol = stream_data.get('s', '').replace('USDT', '')
-                    
-                    if symbol not in data_cache:
-                        data_cache[symbol] = {}
-                    
-                    if event_type == '24hrTicker':
-                        # 24小时价格统计
-                        data_cache[symbol].update({
-                            'symbol': symbol,
-                            'price': float(stream_data.get('c', 0)),
-                            'high_24h': float(stream_data.get('h', 0)),
-                            'low_24h': float(stream_data.get('l', 0)),
-                            'volume_24h': float(stream_data.get('v', 0)),
-                            'quote_volume_24h': float(stream_data.get('q', 0)),
-                            'price_change_24h': float(stream_data.get('p', 0)),
-                            'price_change_percent_24h': float(stream_data.get('P', 0)),
-                            'last_update': datetime.now().isoformat()
-                        })
+            async def receive():
+                nonlocal message_count
+                async for message in ws:
+                    try:
+                        data = json.loads(message)
+                        
+                        if 'data' not in data:
+                            continue
                         
-                        message_count += 1
-                        print(f"📊 {symbol}: ${data_cache[symbol]['price']:,.4f}, "
-                              f"24h {data_cache[symbol]['price_change_percent_24h']:+.2f}%, "
-                              f"成交量 {data_cache[symbol]['volume_24h']:,.0f}")
+                        for item in data['data']:
+                            event_type = item.get('e')
+                            symbol = item.get('s', '').replace('USDT', '')
+                            
+                            entry = data_cache.get(symbol)
+                            if entry is None:
+                                continue
+                            
+                            if event_type == '24hrTicker':
+                                # 24小时价格统计
+                                entry.update({
+                                    'symbol': symbol,
+                                    'price': float(item.get('c', 0)),
+                                    'high_24h': float(item.get('h', 0)),
+                                    'low_24h': float(item.get('l', 0)),
+                                    'volume_24h': float(item.get('v', 0)),
+                                    'quote_volume_24h': float(item.get('q', 0)),
+                                    'price_change_24h': float(item.get('p', 0)),
+                                    'price_change_percent_24h': float(item.get('P', 0)),
+                                    'last_update': datetime.now().isoformat()
+                                })
+                                
+                                message_count += 1
+                                print(f"📊 {symbol}: ${entry['price']:,.4f}, "
+                                      f"24h {entry['price_change_percent_24h']:+.2f}%, "
+                                      f"成交量 {entry['volume_24h']:,.0f}")
+                            
+                            elif event_type == 'markPriceUpdate':
+                                # 标记价格和资金费率
+                                entry.update({
+                                    'mark_price': float(item.get('p', 0)),
+                                    'funding_rate': float(item.get('r', 0)),
+                                    'next_funding_time': item.get('T')
+                                })
                     
-                    elif event_type == 'markPriceUpdate':
-                        # 标记价格和资金费率
-                        data_cache[symbol].update({
-                            'mark_price': float(stream_data.get('p', 0)),
-                            'funding_rate': float(stream_data.get('r', 0)),
-                            'next_funding_time': stream_data.get('T')
-                        })
-                
-                except json.JSONDecodeError:
-                    continue
-                except Exception as e:
-                    print(f"⚠️  处理消息出错: {e}")
-                    continue
+                    except json.JSONDecodeError:
+                        continue
+                    except Exception as e:
+                        print(f"⚠️  处理消息出错: {e}")
+                        continue
+            
+            # 整体超时由 wait_for 控制，避免每条消息都读取时钟
+            try:
+                await asyncio.wait_for(receive(), timeout=duration)
+            except asyncio.TimeoutError:
+                print(f"\n⏱️  已收集 {duration} 秒数据，停止接收")
             
             print(f"\n✅ 总共接收 {message_count} 条消息")
             
@@ -114,60 +113,96 @@ async def collect_token_data(symbols: list, duration: int = 30):
         print(f"\n❌ WebSocket 连接错误: {e}")
         return None
     
-    return data_cache
+    # 丢弃未收到任何数据的币种
+    return {symbol: info for symbol, info in data_cache.items() if info}
 
 
-async def collect_all_tokens(batch_size: int = 66, duration: int = 30):
+def load_all_symbols() -> list:
+    """CMC 映射文件中的所有币种"""
+    with open(CMC_MAPPING_FILE, 'r') as f:
+        cmc_data = json.load(f)
+    if 'mapping' in cmc_data:
+        return list(cmc_data['mapping'].keys())
+    return list(cmc_data.keys())
+
+
+async def collect_all_tokens(duration: int = 30, all_symbols: list = None):
     """
     收集所有币种的数据
-    batch_size: 每批币种数量（66个币种 × 2个流 = 132个流 < 200限制）
+    全市场聚合流只需一个连接，无需再按 200 流上限分批
+    
+    all_symbols: 事先读取好的币种列表（为空则现在从映射文件读取）
     """
     
     # 加载所有币种
-    with open(CMC_MAPPING_FILE, 'r') as f:
-        cmc_data = json.load(f)
-        if 'mapping' in cmc_data:
-            all_symbols = list(cmc_data['mapping'].keys())
-        else:
-            all_symbols = list(cmc_data.keys())
+    if all_symbols is None:
+        all_symbols = load_all_symbols()
     
     print(f"📊 总共 {len(all_symbols)} 个币种")
-    print(f"📦 每批 {batch_size} 个币种（{batch_size * 2} 个流）")
-    print(f"⏱️  每批收集 {duration} 秒")
+    print(f"⏱️  收集 {duration} 秒")
     print()
     
-    # 分批处理
-    all_data = {}
-    num_batches = (len(all_symbols) + batch_size - 1) // batch_size
+    all_data = await collect_token_data(all_symbols, duration)
     
-    for i in range(0, len(all_symbols), batch_size):
-        batch_num = i // batch_size + 1
-        batch_symbols = all_symbols[i:i + batch_size]
-        
-        print(f"🔄 批次 {batch_num}/{num_batches}: {len(batch_symbols)} 个币种")
-        print(f"   {', '.join(batch_symbols[:5])}...")
-        
-        batch_data = await collect_token_data(batch_symbols, duration)
-        
-        if batch_data:
-            all_data.update(batch_data)
-            print(f"✅ 批次 {batch_num} 完成，已收集 {len(batch_data)} 个币种")
-        else:
-            print(f"⚠️  批次 {batch_num} 失败")
-        
-        print()
-        
-        # 批次之间短暂延迟
-        if i + batch_size < len(all_symbols):
-            await asyncio.sleep(2)
+    if all_data:
+        print(f"✅ 已收集 {len(all_data)} 个币种")
+    else:
+        print("⚠️  收集失败")
+    print()
     
     return all_data
 
 
-async def main():
-    """主函数"""
+async def collect(symbols=None, duration: int = 30, all_symbols: list = None):
+    """收集指定币种（为空则全部币种）的数据，返回 {symbol: data}，失败时返回 None
+    
+    all_symbols: 全量模式下使用的币种列表（为空则从映射文件读取）
+    """
+    if symbols:
+        # 指定币种模式
+        symbols = [s.upper() for s in symbols]
+        print(f"🎯 指定币种模式: {len(symbols)} 个币种")
+        print()
+        return await collect_token_data(symbols, duration=duration)
+    
+    # 全量收集模式
+    print("🌐 全量收集模式：收集所有币种")
+    print()
+    return await collect_all_tokens(duration=duration, all_symbols=all_symbols)
+
+
+def print_summary(data: dict):
+    """打印收集结果（仅前10条，避免刷屏）"""
+    print("\n" + "=" * 80)
+    print("📋 收集结果汇总")
+    print("=" * 80 + "\n")
+    
+    count = 0
+    for symbol, info in data.items():
+        if count >= 10:
+            print("... (结果过多，仅显示前10条)")
+            break
+        print(f"【{symbol}】")
+        if 'price' in info:
+            print(f"  当前价格: ${info['price']:,.4f}")
+            print(f"  24h 涨跌: {info['price_change_percent_24h']:+.2f}%")
+            print(f"  24h 成交量: {info['volume_24h']:,.0f}")
+        if 'funding_rate' in info:
+            print(f"  资金费率: {info['funding_rate']:.6f}%")
+        print()
+        count += 1
+
+
+def save_collected_data(data: dict, output_file: Path = WS_DATA_FILE):
+    """保存收集结果，供 update_from_websocket.py / 每日总结读取"""
+    with open(output_file, 'w') as f:
+        json.dump(data, f, indent=2)
     
-    # 检查系统代理状态
+    print(f"✅ 数据已保存到: {output_file}")
+
+
+def check_proxy():
+    """检查系统代理状态（仅 macOS，失败时忽略）"""
     try:
         result = subprocess.run(['networksetup', '-getsocksfirewallproxy', 'Wi-Fi'], 
                                capture_output=True, text=True)
@@ -179,53 +214,28 @@ async def main():
         pass # 忽略检查错误
     print()
 
+
+async def main(argv=None):
+    """主函数
+    
+    argv: 币种列表（默认取 sys.argv[1:]），为空则全量收集
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    
+    check_proxy()
+
     try:
-        # 检查命令行参数
-        if len(sys.argv) > 1:
-            # 指定币种模式
-            symbols = [s.upper() for s in sys.argv[1:]]
-            print(f"🎯 指定币种模式: {len(symbols)} 个币种")
-            print()
-            data = await collect_token_data(symbols, duration=30)
-        else:
-            # 全量收集模式
-            print("🌐 全量收集模式：收集所有币种")
-            print()
-            data = await collect_all_tokens(batch_size=66, duration=30)
+        data = await collect(argv)
         
         if data:
-            print("\n" + "=" * 80)
-            print("📋 收集结果汇总")
-            print("=" * 80 + "\n")
-            
-            # 仅显示部分结果以避免刷屏
-            count = 0
-            for symbol, info in data.items():
-                if count >= 10:
-                    print("... (结果过多，仅显示前10条)")
-                    break
-                print(f"【{symbol}】")
-                if 'price' in info:
-                    print(f"  当前价格: ${info['price']:,.4f}")
-                    print(f"  24h 涨跌: {info['price_change_percent_24h']:+.2f}%")
-                    print(f"  24h 成交量: {info['volume_24h']:,.0f}")
-                if 'funding_rate' in info:
-                    print(f"  资金费率: {info['funding_rate']:.6f}%")
-                print()
-                count += 1
-            
-            # 保存到文件
-            output_file = 'data/websocket_collected_data.json'
-            with open(output_file, 'w') as f:
-                json.dump(data, f, indent=2)
-            
-            print(f"✅ 数据已保存到: {output_file}")
+            print_summary(data)
+            save_collected_data(data)
         else:
             print("❌ 未收集到数据")
     
     except Exception as e:
         print(f"程序主流程发生错误: {e}")
 
-
 if __name__ == '__main__':
     asyncio.run(main())
@@ -4,7 +4,7 @@
 读取manual_coingecko_mapping.json中的手动映射，更新到主映射文件中
 """
 
-import json
+import orjson
 import time
 from pathlib import Path
 
@@ -24,16 +24,16 @@ def apply_manual_mapping():
     
     # 读取手动映射
     try:
-        with open(manual_file, 'r', encoding='utf-8') as f:
-            manual_data = json.load(f)
+        with open(manual_file, 'rb') as f:
+            manual_data = orjson.loads(f.read())
     except Exception as e:
         print(f"❌ 读取手动映射文件失败: {e}")
         return False
     
     # 读取主映射文件
     try:
-        with open(main_file, 'r', encoding='utf-8') as f:
-            main_data = json.load(f)
+        with open(main_file, 'rb') as f:
+            main_data = orjson.loads(f.read())
     except Exception as e:
         print(f"❌ 读取主映射文件失败: {e}")
         return False
@@ -103,8 +103,8 @@ def apply_manual_mapping():
     
     # 保存更新后的主映射文件
     try:
-        with open(main_file, 'w', encoding='utf-8') as f:
-            json.dump(main_data, f, indent=2, ensure_ascii=False)
+        with open(main_file, 'wb') as f:
+            f.write(orjson.dumps(main_data, option=orjson.OPT_INDENT_2))
         
         print(f"\n📊 更新统计:")
         print(f"  处理条目: {updated_count}")
@@ -127,8 +127,8 @@ def validate_coingecko_ids():
         print("❌ manual_coingecko_mapping.json 文件不存在")
         return
     
-    with open(manual_file, 'r', encoding='utf-8') as f:
-        manual_data = json.load(f)
+    with open(manual_file, 'rb') as f:
+        manual_data = orjson.loads(f.read())
     
     unmatched_tokens = manual_data.get('unmatched_tokens', {})
     
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Binance USDT 交易对的 base asset 列表（现货 + 永续）
+create_cmc_mapping 与 create_coingecko_mapping 共用，结果在本地缓存 1 小时，
+连续运行两个映射脚本时不会重复请求 Binance exchangeInfo
+"""
+
+import aiohttp
+import asyncio
+import ijson
+import orjson
+import os
+import tempfile
+import time
+from http_utils import retry_after
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+CACHE_FILE = PROJECT_ROOT / 'data' / 'binance_symbols.json'
+CACHE_TTL = 3600  # seconds
+
+BINANCE_SPOT_EXCHANGE_INFO_URL = 'https://api.binance.com/api/v3/exchangeInfo'
+BINANCE_PERP_EXCHANGE_INFO_URL = 'https://fapi.binance.com/fapi/v1/exchangeInfo'
+
+
+def load_cached_symbols(ttl: float = CACHE_TTL):
+    """Cached base assets if the cache file is younger than ttl, else None"""
+    try:
+        if time.time() - CACHE_FILE.stat().st_mtime >= ttl:
+            return None
+        return orjson.loads(CACHE_FILE.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+
+
+def save_cached_symbols(symbols) -> None:
+    """Atomically write the base assets (temp file + rename)"""
+    try:
+        CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_FILE.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(orjson.dumps(symbols))
+        os.replace(tmp_path, CACHE_FILE)
+    except OSError as e:
+        print(f"⚠️  无法写入 Binance 交易对缓存: {e}")
+
+
+async def _stream_usdt_base_assets(session, url: str, max_retries: int = 3):
+    """Stream a Binance exchangeInfo response and return its TRADING USDT base assets
+
+    Symbols are parsed one at a time with ijson, so the full document (filters,
+    permissions, order types of every market) is never held in memory.
+    Returns None if the request fails (non-200 status, network error or
+    timeout, malformed JSON).
+    """
+    try:
+        for attempt in range(max_retries):
+            async with session.get(url) as resp:
+                if resp.status == 429 and attempt < max_retries - 1:
+                    wait = retry_after(resp.headers)
+                elif resp.status != 200:
+                    return None
+                else:
+                    return {
+                        s['baseAsset']
+                        async for s in ijson.items_async(resp.content, 'symbols.item')
+                        if s['status'] == 'TRADING' and s['symbol'].endswith('USDT')
+                    }
+            print(f"⏳ 触发限速 (429)，{wait:.0f} 秒后重试...")
+            await asyncio.sleep(wait)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ijson.JSONError) as e:
+        print(f"⚠️  请求 {url} 失败: {type(e).__name__}: {e}")
+        return None
+
+
+async def fetch_usdt_base_assets(session, ttl: float = CACHE_TTL):
+    """Sorted USDT base assets from spot + perp, served from the cache when fresh
+
+    Uses the caller's aiohttp session so it can run alongside other requests.
+    Returns None if either exchangeInfo request fails.
+    """
+    cached = load_cached_symbols(ttl)
+    if cached is not None:
+        print(f"📋 使用缓存的 Binance 交易对 ({len(cached)} 个)")
+        return cached
+
+    spot, perp = await asyncio.gather(
+        _stream_usdt_base_assets(session, BINANCE_SPOT_EXCHANGE_INFO_URL),
+        _stream_usdt_base_assets(session, BINANCE_PERP_EXCHANGE_INFO_URL),
+    )
+    if spot is None or perp is None:
+        return None
+
+    symbols = sorted(spot | perp)
+    save_cached_symbols(symbols)
+    return symbols
+
+
+async def get_usdt_base_assets_async(ttl: float = CACHE_TTL):
+    """Like fetch_usdt_base_assets, with its own session"""
+    timeout = aiohttp.ClientTimeout(total=15)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        return await fetch_usdt_base_assets(session, ttl)
+
+
+def get_usdt_base_assets(ttl: float = CACHE_TTL):
+    """Sorted USDT base assets from Binance spot + perp (cached for ttl seconds)"""
+    return asyncio.run(get_usdt_base_assets_async(ttl))
+
+
+if __name__ == '__main__':
+    symbols = get_usdt_base_assets()
+    if symbols is None:
+        print("❌ 获取Binance交易对失败")
+        raise SystemExit(1)
+    print(f"📊 找到 {len(symbols)} 个Binance代币")
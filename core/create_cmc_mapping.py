@@ -4,9 +4,15 @@
 使用 CoinMarketCap Professional API (/v1/cryptocurrency/map) 分页获取整个代币列表
 """
 
-import requests
-import json
+import aiohttp
+import asyncio
+import gzip
+import ijson
+import orjson
 import time
+from binance_symbols import get_usdt_base_assets_async
+from collections import Counter
+from http_utils import retry_after
 from pathlib import Path
 
 # 获取项目根目录
@@ -14,84 +20,119 @@ SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent
 CONFIG_FILE = PROJECT_ROOT / 'config' / 'api_config.json'
 
+CMC_MAP_URL = 'https://pro-api.coinmarketcap.com/v1/cryptocurrency/map'
+CMC_MAP_PAGE_SIZE = 5000  # endpoint maximum
+CMC_MAP_CONCURRENCY = 4  # 同时进行的分页请求数（每轮覆盖 20k 条）
+CMC_MAP_FIELDS = ('id', 'symbol', 'name', 'slug', 'rank', 'is_active')
+
 
 def load_config():
     if CONFIG_FILE.exists():
-        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(CONFIG_FILE, 'rb') as f:
+            return orjson.loads(f.read())
     return {}
 
 
-def fetch_cmc_map(api_key: str) -> list:
-    """Fetch the /v1/cryptocurrency/map endpoint (paginated)"""
-    base_url = 'https://pro-api.coinmarketcap.com/v1/cryptocurrency/map'
-    headers = {'X-CMC_PRO_API_KEY': api_key}
-
-    start = 1
-    limit = 100
-    all_coins = []
-    max_retries = 3
-
-    while True:
-        params = {'start': start, 'limit': limit}
-        print(f"Fetching CMC map start={start} limit={limit}...")
-        
-        # 添加重试机制
+async def _fetch_cmc_page(session, semaphore, start: int, limit: int, max_retries: int = 3):
+    """Fetch one page of the CMC map; returns the entries or None on failure"""
+    params = {'start': start, 'limit': limit}
+    
+    async with semaphore:
         for attempt in range(max_retries):
             try:
-                resp = requests.get(base_url, headers=headers, params=params, timeout=15)
-                if resp.status_code != 200:
-                    print(f"Error fetching CMC map: {resp.status_code} {resp.text}")
-                    if attempt < max_retries - 1:
-                        print(f"  Retrying... (attempt {attempt + 2}/{max_retries})")
-                        time.sleep(2)
+                async with session.get(CMC_MAP_URL, params=params) as resp:
+                    if resp.status == 429 and attempt < max_retries - 1:
+                        # Rate limited: wait as long as the server asks, then retry
+                        wait = retry_after(resp.headers)
+                        print(f"  ⏳ Rate limited (start={start}), retrying in {wait:.0f}s...")
+                        await asyncio.sleep(wait)
                         continue
-                    break
-                
-                data = resp.json()
-                if 'data' not in data:
-                    return all_coins
-                
-                batch = data['data']
-                all_coins.extend(batch)
-                print(f"  ✓ Fetched {len(batch)} entries (total: {len(all_coins)})")
-                
-                if len(batch) < limit:
-                    return all_coins
-                
-                start += limit
-                time.sleep(1)  # modest delay
-                break  # 成功，跳出重试循环
+                    if resp.status != 200:
+                        body = await resp.read()
+                        print(f"Error fetching CMC map start={start}: {resp.status} {body[:200]!r}")
+                        if attempt < max_retries - 1:
+                            print(f"  Retrying... (attempt {attempt + 2}/{max_retries})")
+                            await asyncio.sleep(2)
+                            continue
+                        return None
+                    
+                    # Stream the entries and keep only the fields build_mapping reads
+                    batch = [
+                        {field: item.get(field) for field in CMC_MAP_FIELDS}
+                        async for item in ijson.items_async(resp.content, 'data.item')
+                    ]
+                    print(f"  ✓ Fetched start={start}: {len(batch)} entries")
+                    return batch
                 
             except Exception as e:
-                print(f"  ⚠️  Error: {e}")
+                print(f"  ⚠️  Error (start={start}): {e}")
                 if attempt < max_retries - 1:
                     print(f"  Retrying... (attempt {attempt + 2}/{max_retries})")
-                    time.sleep(3)
-                else:
-                    print(f"  ❌ Max retries reached. Returning {len(all_coins)} entries collected so far.")
-                    return all_coins
+                    await asyncio.sleep(3)
         
-        # 如果所有重试都失败，返回已收集的数据
-        if not batch:
-            return all_coins
+        print(f"  ❌ Max retries reached for start={start}")
+        return None
+
+
+async def fetch_cmc_map_async(api_key: str) -> list:
+    """Fetch the /v1/cryptocurrency/map endpoint with concurrent pages
+    
+    Pages are requested in waves of CMC_MAP_CONCURRENCY; the first short or
+    failed page marks the end of the list.
+    """
+    headers = {'X-CMC_PRO_API_KEY': api_key}
+    timeout = aiohttp.ClientTimeout(total=30)
+    semaphore = asyncio.Semaphore(CMC_MAP_CONCURRENCY)
+    limit = CMC_MAP_PAGE_SIZE
+    
+    all_coins = []
+    start = 1
     
-    return all_coins
+    async with aiohttp.ClientSession(headers=headers, timeout=timeout) as session:
+        while True:
+            starts = [start + i * limit for i in range(CMC_MAP_CONCURRENCY)]
+            print(f"Fetching CMC map start={starts[0]}..{starts[-1] + limit - 1}...")
+            batches = await asyncio.gather(*[
+                _fetch_cmc_page(session, semaphore, s, limit) for s in starts
+            ])
+            
+            for batch in batches:
+                if not batch:
+                    print(f"Total CMC entries: {len(all_coins)}")
+                    return all_coins
+                all_coins.extend(batch)
+                if len(batch) < limit:
+                    print(f"Total CMC entries: {len(all_coins)}")
+                    return all_coins
+            
+            start = starts[-1] + limit
+
+
+def fetch_cmc_map(api_key: str) -> list:
+    """Fetch the /v1/cryptocurrency/map endpoint (paginated)"""
+    return asyncio.run(fetch_cmc_map_async(api_key))
+
+
+async def get_binance_symbols_async():
+    """USDT base assets from Binance spot + perp (shared 1h cache in binance_symbols)"""
+    symbols = await get_usdt_base_assets_async()
+    if symbols is None:
+        raise RuntimeError('Failed to fetch Binance exchangeInfo')
+    return symbols
 
 
 def get_binance_symbols():
     """Get all Binance USDT base assets from spot and perp exchangeInfo"""
-    spot = requests.get('https://api.binance.com/api/v3/exchangeInfo', timeout=15).json()
-    perp = requests.get('https://fapi.binance.com/fapi/v1/exchangeInfo', timeout=15).json()
+    return asyncio.run(get_binance_symbols_async())
 
-    symbols = set()
-    for s in spot['symbols']:
-        if s['symbol'].endswith('USDT') and s['status'] == 'TRADING':
-            symbols.add(s['baseAsset'])
-    for s in perp['symbols']:
-        if s['symbol'].endswith('USDT') and s['status'] == 'TRADING':
-            symbols.add(s['baseAsset'])
-    return sorted(list(symbols))
+
+async def fetch_sources_async(api_key: str):
+    """Fetch the CMC map and the Binance symbols concurrently
+    
+    Binance exchangeInfo does not depend on CMC, so it runs while the CMC
+    pages are still downloading instead of after them.
+    """
+    return await asyncio.gather(fetch_cmc_map_async(api_key), get_binance_symbols_async())
 
 
 def build_mapping(cmc_list, binance_symbols):
@@ -102,30 +143,31 @@ def build_mapping(cmc_list, binance_symbols):
     2. For multiple matches, prefer active status
     3. Sort by market cap to ensure we pick the most significant coin
     """
-    symbol_map = {}
-    cmc_by_symbol = {}
+    # Single pass: keep only the best candidate per symbol, plus candidate counts.
+    # Best = active first, then lowest rank (None ranks last); ties keep the first seen.
+    best_by_symbol = {}
+    candidate_counts = Counter()
+    active_counts = Counter()
     for item in cmc_list:
-        sym = item.get('symbol', '').upper()
-        if sym not in cmc_by_symbol:
-            cmc_by_symbol[sym] = []
-        cmc_by_symbol[sym].append(item)
+        sym = (item.get('symbol') or '').upper()
+        is_active = item.get('is_active') == 1
+        key = (not is_active, item.get('rank') or 999999)
+        candidate_counts[sym] += 1
+        if is_active:
+            active_counts[sym] += 1
+        current = best_by_symbol.get(sym)
+        if current is None or key < current[0]:
+            best_by_symbol[sym] = (key, item)
 
     matched = 0
     mapping = {}
     match_details = []  # Track matching details for review
     
     for b in binance_symbols:
-        candidates = cmc_by_symbol.get(b.upper(), [])
-        if candidates:
-            # Smart matching: prioritize by rank (market cap proxy) and active status
-            active_candidates = [c for c in candidates if c.get('is_active') == 1]
-            
-            # If we have active candidates, use them; otherwise fall back to all
-            pool = active_candidates if active_candidates else candidates
-            
-            # Sort by rank (lower rank = higher market cap = more significant)
-            # Handle None ranks by putting them at the end
-            best = sorted(pool, key=lambda x: (x.get('rank') or 999999))[0]
+        sym = b.upper()
+        entry = best_by_symbol.get(sym)
+        if entry:
+            best = entry[1]
             
             mapping[b] = {
                 'cmc_id': best.get('id'),
@@ -142,8 +184,8 @@ def build_mapping(cmc_list, binance_symbols):
                 'slug': best.get('slug'),
                 'rank': best.get('rank'),
                 'is_active': best.get('is_active'),
-                'total_candidates': len(candidates),
-                'active_candidates': len(active_candidates)
+                'total_candidates': candidate_counts[sym],
+                'active_candidates': active_counts[sym]
             }
             match_details.append(detail)
             
@@ -161,10 +203,17 @@ def build_mapping(cmc_list, binance_symbols):
 
 def save_mapping(out, match_details):
     output_file = PROJECT_ROOT / 'config' / 'binance_cmc_mapping.json'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(out, f, indent=2, ensure_ascii=False)
+    with open(output_file, 'wb') as f:
+        f.write(orjson.dumps(out, option=orjson.OPT_INDENT_2))
     print(f'Saved mapping to {output_file}')
     
+    # Compact gzip copy for runtime loading; the indented file stays for humans
+    # and for the scripts that edit it in place
+    compact_file = output_file.with_name(output_file.name + '.gz')
+    with gzip.open(compact_file, 'wb', compresslevel=6) as f:
+        f.write(orjson.dumps(out))
+    print(f'Saved compact mapping to {compact_file}')
+    
     # Save match details for review
     if match_details:
         # Sort by multiple candidates (potential issues) and then by rank
@@ -180,8 +229,8 @@ def save_mapping(out, match_details):
         }
         
         review_file = PROJECT_ROOT / 'config' / 'cmc_mapping_review.json'
-        with open(review_file, 'w', encoding='utf-8') as f:
-            json.dump(review_out, f, indent=2, ensure_ascii=False)
+        with open(review_file, 'wb') as f:
+            f.write(orjson.dumps(review_out, option=orjson.OPT_INDENT_2))
         
         if review_candidates:
             print(f'\n⚠️  {len(review_candidates)} tokens have multiple CMC matches')
@@ -198,11 +247,9 @@ if __name__ == '__main__':
         print('CoinMarketCap API key missing in api_config.json')
         raise SystemExit(1)
 
-    print('Fetching CoinMarketCap map (this may take a while)...')
-    coins = fetch_cmc_map(cmc_key)
+    print('Fetching CoinMarketCap map and Binance symbols...')
+    coins, binance_symbols = asyncio.run(fetch_sources_async(cmc_key))
     print(f'Fetched {len(coins)} CMC entries')
-
-    binance_symbols = get_binance_symbols()
     print(f'Binance symbols: {len(binance_symbols)}')
 
     mapping, matched, match_details = build_mapping(coins, binance_symbols)
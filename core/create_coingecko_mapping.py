@@ -4,55 +4,257 @@
 这样可以避免每次都重新匹配，进一步提升性能
 """
 
-import requests
-import json
+import aiohttp
+import asyncio
+import logging
+import orjson
+import sys
 import time
+from binance_symbols import fetch_usdt_base_assets
+from collections import defaultdict
+from http_utils import make_session, retry_after
 from pathlib import Path
+from rapidfuzz import fuzz, process, utils
+from types import MappingProxyType
 
-def create_binance_coingecko_mapping():
-    """创建Binance代币到CoinGecko ID的映射并保存到本地"""
+# 逐个代币的匹配结果使用 DEBUG 级别输出，默认不打印
+logger = logging.getLogger(__name__)
+
+COINGECKO_COINS_LIST_URL = 'https://api.coingecko.com/api/v3/coins/list'
+COINGECKO_MARKETS_URL = 'https://api.coingecko.com/api/v3/coins/markets'
+COINGECKO_MARKETS_BATCH = 250  # max ids per /coins/markets request
+FUZZY_SCORE_CUTOFF = 90  # WRatio threshold for the symbol+name fallback match
+
+# Local copy of the CoinGecko coins list, revalidated with its ETag
+COINS_LIST_CACHE = Path('coingecko_coins_list.json')
+COINS_LIST_ETAG = Path('coingecko_coins_list.etag')
+
+# Enhanced major coins mapping (read-only, built once at import)
+MAJOR_COINS = MappingProxyType({
+    'BTC': 'bitcoin',
+    'ETH': 'ethereum',
+    'BNB': 'binancecoin',
+    'SOL': 'solana',
+    'XRP': 'ripple',
+    'ADA': 'cardano',
+    'AVAX': 'avalanche-2',
+    'DOT': 'polkadot',
+    'MATIC': 'matic-network',
+    'LINK': 'chainlink',
+    'UNI': 'uniswap',
+    'LTC': 'litecoin',
+    'BCH': 'bitcoin-cash',
+    'NEAR': 'near',
+    'ATOM': 'cosmos',
+    'FTM': 'fantom',
+    'ALGO': 'algorand',
+    'VET': 'vechain',
+    'ICP': 'internet-computer',
+    'HBAR': 'hedera-hashgraph',
+    'ETC': 'ethereum-classic',
+    'FIL': 'filecoin',
+    'THETA': 'theta-token',
+    'XLM': 'stellar',
+    'TRX': 'tron',
+    'AAVE': 'aave',
+    'MKR': 'maker',
+    'SNX': 'havven',
+    'COMP': 'compound-governance-token',
+    'YFI': 'yearn-finance',
+    'DOGE': 'dogecoin',
+    'SHIB': 'shiba-inu',
+    'PEPE': 'pepe',
+    'WIF': 'dogwifcoin',
+    'FLOKI': 'floki',
+    'BONK': 'bonk',
+    'MEME': 'memecoin',
+    'WLD': 'worldcoin-wld',
+    'ORDI': 'ordinals',
+    'SATS': '1000sats',
+    'RATS': 'rats',
+    'AI': 'sleepless-ai',
+    'ID': 'space-id',
+    'ARB': 'arbitrum',
+    'OP': 'optimism',
+    'APT': 'aptos',
+    'SUI': 'sui',
+    'INJ': 'injective-protocol',
+    'SEI': 'sei-network',
+    'STRK': 'starknet',
+    'TIA': 'celestia',
+    'PYTH': 'pyth-network',
+    'JTO': 'jito-governance-token',
+    'MANTA': 'manta-network',
+    'ALT': 'altlayer',
+    'JUP': 'jupiter-exchange-solana',
+    'DYM': 'dymension',
+    'PIXEL': 'pixels',
+    'PORTAL': 'portal',
+    'WEN': 'wen-4',
+    'METIS': 'metis-token',
+    'AEVO': 'aevo-exchange',
+    'BOME': 'book-of-meme',
+    'SAGA': 'saga-2',
+    'TAO': 'bittensor',
+    'OMNI': 'omni-network',
+    'REZ': 'renzo',
+    'IO': 'io-net',
+    'ZK': 'zksync',
+    'ZRO': 'layerzero',
+    'G': 'gravity',
+    'BANANA': 'banana-gun',
+    'RENDER': 'render-token',
+    'RUNE': 'thorchain',
+    'FTT': 'ftx-token',
+    'KCS': 'kucoin-shares',
+    'GT': 'gatechain-token'
+})
+
+
+SESSION = make_session(pool_connections=20, pool_maxsize=20)
+
+
+def fetch_with_retry(url: str, params=None, timeout: int = 15):
+    """GET url through the pooled session (keep-alive + automatic 429/5xx retries)"""
+    return SESSION.get(url, params=params, timeout=timeout)
+
+
+def coins_list_cache_headers() -> dict:
+    """If-None-Match header for the cached coins list (empty if there is no usable cache)"""
+    if COINS_LIST_CACHE.exists() and COINS_LIST_ETAG.exists():
+        return {'If-None-Match': COINS_LIST_ETAG.read_text().strip()}
+    return {}
+
+
+def load_coins_list_cache():
+    """Load the cached coins list (after a 304 Not Modified)"""
+    print("📋 CoinGecko代币列表未变化，使用本地缓存")
+    return orjson.loads(COINS_LIST_CACHE.read_bytes())
+
+
+def save_coins_list_cache(coins, etag) -> None:
+    """Store the coins list and its ETag for the next conditional request"""
+    if not etag:
+        return
+    COINS_LIST_CACHE.write_bytes(orjson.dumps(coins))
+    COINS_LIST_ETAG.write_text(etag)
+
+
+async def _get_json(session, url: str, max_retries: int = 3, headers=None):
+    """GET url and return (status, parsed JSON or None, response headers); backs off only on HTTP 429"""
+    for attempt in range(max_retries):
+        async with session.get(url, headers=headers) as resp:
+            body = await resp.read()
+            if resp.status == 429 and attempt < max_retries - 1:
+                wait = retry_after(resp.headers)
+            else:
+                data = orjson.loads(body) if resp.status == 200 else None
+                return resp.status, data, resp.headers
+        print(f"⏳ 触发限速 (429)，{wait:.0f} 秒后重试...")
+        await asyncio.sleep(wait)
+
+
+async def _get_coins_list(session):
+    """Fetch the CoinGecko coins list, reusing the local copy when the ETag still matches"""
+    status, coins, headers = await _get_json(session, COINGECKO_COINS_LIST_URL,
+                                             headers=coins_list_cache_headers())
+    if status == 304:
+        return 200, load_coins_list_cache()
+    if coins is not None:
+        save_coins_list_cache(coins, headers.get('ETag'))
+    return status, coins
+
+
+async def fetch_sources_async():
+    """Fetch Binance USDT base assets and the CoinGecko coins list concurrently"""
+    timeout = aiohttp.ClientTimeout(total=15)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        return await asyncio.gather(
+            fetch_usdt_base_assets(session),
+            _get_coins_list(session),
+        )
+
+
+def search_symbol_variants(symbol: str) -> list:
+    """Symbols to look up in CoinGecko for a Binance base asset"""
+    symbol_upper = symbol.upper()
+    search_symbols = [symbol_upper]
     
-    print("🔍 获取Binance交易对...")
+    # Handle special prefixes
+    if symbol_upper.startswith('1000'):
+        search_symbols.append(symbol_upper[4:])  # 1000SATS -> SATS
+    elif symbol_upper.startswith('1M'):
+        search_symbols.append(symbol_upper[2:])  # 1MBABYDOGE -> BABYDOGE
     
-    # Get Binance symbols
-    spot_response = requests.get('https://api.binance.com/api/v3/exchangeInfo')
-    perp_response = requests.get('https://fapi.binance.com/fapi/v1/exchangeInfo')
+    return search_symbols
+
+
+def build_fuzzy_choices(coingecko_coins) -> dict:
+    """CoinGecko id -> "SYMBOL name" strings for the RapidFuzz fallback"""
+    return {coin['id']: f"{coin['symbol'].upper()} {coin['name']}" for coin in coingecko_coins}
+
+
+def fuzzy_match_coingecko(search_symbols, choices: dict):
+    """Best CoinGecko id for a symbol's variants with no exact match (None below FUZZY_SCORE_CUTOFF)"""
+    for search_symbol in search_symbols:
+        match = process.extractOne(search_symbol, choices, scorer=fuzz.WRatio,
+                                   score_cutoff=FUZZY_SCORE_CUTOFF,
+                                   processor=utils.default_process)
+        if match:
+            return match[2]
+    return None
+
+
+def fetch_market_caps(coin_ids) -> dict:
+    """Fetch market caps for the given CoinGecko ids via /coins/markets?ids=..."""
+    coin_ids = sorted(coin_ids)
+    market_cap_index = {}
     
-    spot_data = spot_response.json()
-    perp_data = perp_response.json()
+    for i in range(0, len(coin_ids), COINGECKO_MARKETS_BATCH):
+        batch = coin_ids[i:i + COINGECKO_MARKETS_BATCH]
+        params = {
+            'vs_currency': 'usd',
+            'ids': ','.join(batch),
+            'per_page': COINGECKO_MARKETS_BATCH,
+            'page': 1
+        }
+        resp = fetch_with_retry(COINGECKO_MARKETS_URL, params=params)
+        if resp.status_code != 200:
+            print(f"⚠️  获取市值数据失败: {resp.status_code}")
+            continue
+        for coin in orjson.loads(resp.content):
+            market_cap_index[coin['id']] = coin.get('market_cap') or 0
     
-    # Extract all USDT symbols
-    binance_symbols = set()
-    for symbol_info in spot_data['symbols']:
-        if symbol_info['symbol'].endswith('USDT') and symbol_info['status'] == 'TRADING':
-            binance_symbols.add(symbol_info['baseAsset'])
+    return market_cap_index
+
+
+def create_binance_coingecko_mapping(save: bool = True):
+    """创建Binance代币到CoinGecko ID的映射并保存到本地
     
-    for symbol_info in perp_data['symbols']:
-        if symbol_info['symbol'].endswith('USDT') and symbol_info['status'] == 'TRADING':
-            binance_symbols.add(symbol_info['baseAsset'])
+    Returns:
+        (mapping_data, coingecko_coins)，获取数据失败时返回 None。
+        save=False 时不写映射文件，供 build_complete_mapping 继续模糊匹配后统一保存。
+    """
     
-    binance_symbols = sorted(list(binance_symbols))
-    print(f"📊 找到 {len(binance_symbols)} 个Binance代币")
+    print("🔍 获取Binance交易对和CoinGecko代币列表...")
     
-    # Get CoinGecko coins list
-    print("📥 获取CoinGecko代币列表...")
-    time.sleep(2)
+    # Binance spot/perp and CoinGecko list are independent - fetch them together
+    binance_symbols, (cg_status, coingecko_coins) = asyncio.run(fetch_sources_async())
+    if binance_symbols is None:
+        print("❌ 获取Binance交易对失败")
+        return
+    print(f"📊 找到 {len(binance_symbols)} 个Binance代币")
     
-    cg_response = requests.get('https://api.coingecko.com/api/v3/coins/list', timeout=15)
-    if cg_response.status_code != 200:
-        print(f"❌ 获取CoinGecko列表失败: {cg_response.status_code}")
+    if coingecko_coins is None:
+        print(f"❌ 获取CoinGecko列表失败: {cg_status}")
         return
     
-    coingecko_coins = cg_response.json()
     print(f"📊 获取到 {len(coingecko_coins)} 个CoinGecko代币")
     
     # Create symbol to ID mapping
-    cg_symbol_map = {}
+    cg_symbol_map = defaultdict(list)
     for coin in coingecko_coins:
-        symbol = coin['symbol'].upper()
-        if symbol not in cg_symbol_map:
-            cg_symbol_map[symbol] = []
-        cg_symbol_map[symbol].append({
+        cg_symbol_map[sys.intern(coin['symbol'].upper())].append({
             'id': coin['id'],
             'name': coin['name'],
             'symbol': coin['symbol']
@@ -61,109 +263,25 @@ def create_binance_coingecko_mapping():
     # Match Binance symbols to CoinGecko IDs
     print("🔗 匹配Binance代币到CoinGecko (按市值优先)...")
     
-    # Enhanced major coins mapping
-    major_coins = {
-        'BTC': 'bitcoin',
-        'ETH': 'ethereum',
-        'BNB': 'binancecoin',
-        'SOL': 'solana',
-        'XRP': 'ripple',
-        'ADA': 'cardano',
-        'AVAX': 'avalanche-2',
-        'DOT': 'polkadot',
-        'MATIC': 'matic-network',
-        'LINK': 'chainlink',
-        'UNI': 'uniswap',
-        'LTC': 'litecoin',
-        'BCH': 'bitcoin-cash',
-        'NEAR': 'near',
-        'ATOM': 'cosmos',
-        'FTM': 'fantom',
-        'ALGO': 'algorand',
-        'VET': 'vechain',
-        'ICP': 'internet-computer',
-        'HBAR': 'hedera-hashgraph',
-        'ETC': 'ethereum-classic',
-        'FIL': 'filecoin',
-        'THETA': 'theta-token',
-        'XLM': 'stellar',
-        'TRX': 'tron',
-        'AAVE': 'aave',
-        'MKR': 'maker',
-        'SNX': 'havven',
-        'COMP': 'compound-governance-token',
-        'YFI': 'yearn-finance',
-        'DOGE': 'dogecoin',
-        'SHIB': 'shiba-inu',
-        'PEPE': 'pepe',
-        'WIF': 'dogwifcoin',
-        'FLOKI': 'floki',
-        'BONK': 'bonk',
-        'MEME': 'memecoin',
-        'WLD': 'worldcoin-wld',
-        'ORDI': 'ordinals',
-        'SATS': '1000sats',
-        'RATS': 'rats',
-        'AI': 'sleepless-ai',
-        'ID': 'space-id',
-        'ARB': 'arbitrum',
-        'OP': 'optimism',
-        'APT': 'aptos',
-        'SUI': 'sui',
-        'INJ': 'injective-protocol',
-        'SEI': 'sei-network',
-        'STRK': 'starknet',
-        'TIA': 'celestia',
-        'PYTH': 'pyth-network',
-        'JTO': 'jito-governance-token',
-        'MANTA': 'manta-network',
-        'ALT': 'altlayer',
-        'JUP': 'jupiter-exchange-solana',
-        'DYM': 'dymension',
-        'PIXEL': 'pixels',
-        'PORTAL': 'portal',
-        'WEN': 'wen-4',
-        'METIS': 'metis-token',
-        'AEVO': 'aevo-exchange',
-        'BOME': 'book-of-meme',
-        'SAGA': 'saga-2',
-        'TAO': 'bittensor',
-        'OMNI': 'omni-network',
-        'REZ': 'renzo',
-        'IO': 'io-net',
-        'ZK': 'zksync',
-        'ZRO': 'layerzero',
-        'G': 'gravity',
-        'BANANA': 'banana-gun',
-        'RENDER': 'render-token',
-        'THETA': 'theta-token',
-        'RUNE': 'thorchain',
-        'FTT': 'ftx-token',
-        'KCS': 'kucoin-shares',
-        'GT': 'gatechain-token'
-    }
-    
     mapping_results = {}
     matched_count = 0
+    fuzzy_choices = None  # built on the first symbol without an exact match
     match_details = []  # Track details for review
     
-    # Fetch market cap data for better matching
+    # Fetch market caps only for ids that compete for the same symbol
     print("📊 获取CoinGecko市值数据...")
+    # Uppercase each symbol and build its lookup variants once; variants[0] is the symbol itself
+    symbol_variants = {symbol: search_symbol_variants(symbol) for symbol in binance_symbols}
+    ambiguous_ids = {
+        c['id']
+        for search_symbols in symbol_variants.values() if search_symbols[0] not in MAJOR_COINS
+        for search_symbol in search_symbols
+        if len(cg_symbol_map.get(search_symbol, ())) > 1
+        for c in cg_symbol_map[search_symbol]
+    }
     try:
-        market_url = 'https://api.coingecko.com/api/v3/coins/markets'
-        market_params = {
-            'vs_currency': 'usd',
-            'order': 'market_cap_desc',
-            'per_page': 250,
-            'page': 1
-        }
-        market_response = requests.get(market_url, params=market_params, timeout=15)
-        market_data = market_response.json() if market_response.status_code == 200 else []
-        
-        # Create market cap index
-        market_cap_index = {coin['id']: coin.get('market_cap', 0) for coin in market_data}
-        print(f"✅ 获取到 {len(market_cap_index)} 个代币的市值数据")
-        time.sleep(2)
+        market_cap_index = fetch_market_caps(ambiguous_ids)
+        print(f"✅ 获取到 {len(market_cap_index)}/{len(ambiguous_ids)} 个候选代币的市值数据")
     except Exception as e:
         print(f"⚠️  无法获取市值数据: {e}")
         market_cap_index = {}
@@ -174,21 +292,14 @@ def create_binance_coingecko_mapping():
         candidates_info = []
         
         # Check major coins first
-        if symbol.upper() in major_coins:
-            coingecko_id = major_coins[symbol.upper()]
+        search_symbols = symbol_variants[symbol]
+        symbol_upper = search_symbols[0]
+        if symbol_upper in MAJOR_COINS:
+            coingecko_id = MAJOR_COINS[symbol_upper]
             match_type = "major"
             matched_count += 1
         else:
-            # Try symbol matching with variations
-            search_symbols = [symbol.upper()]
-            
-            # Handle special prefixes
-            if symbol.upper().startswith('1000'):
-                search_symbols.append(symbol[4:].upper())  # 1000SATS -> SATS
-            elif symbol.upper().startswith('1M'):
-                search_symbols.append(symbol[2:].upper())  # 1MBABYDOGE -> BABYDOGE
-            
-            # Search in CoinGecko
+            # Search in CoinGecko (symbol and its variations)
             for search_symbol in search_symbols:
                 if search_symbol in cg_symbol_map:
                     candidates = cg_symbol_map[search_symbol]
@@ -224,6 +335,15 @@ def create_binance_coingecko_mapping():
                         } for c in candidates_with_mc[:5]]  # Top 5
                         
                         break
+            
+            # No exact symbol hit - fall back to fuzzy matching on symbol + name
+            if coingecko_id is None:
+                if fuzzy_choices is None:
+                    fuzzy_choices = build_fuzzy_choices(coingecko_coins)
+                coingecko_id = fuzzy_match_coingecko(search_symbols, fuzzy_choices)
+                if coingecko_id:
+                    match_type = "fuzzy"
+                    matched_count += 1
         
         mapping_results[symbol] = {
             'coingecko_id': coingecko_id,
@@ -241,42 +361,45 @@ def create_binance_coingecko_mapping():
             })
         
         if coingecko_id:
-            print(f"✅ {symbol} -> {coingecko_id} ({match_type})")
+            logger.debug("✅ %s -> %s (%s)", symbol, coingecko_id, match_type)
         else:
-            print(f"❌ {symbol} -> 无匹配")
+            logger.debug("❌ %s -> 无匹配", symbol)
     
     print(f"\n📊 匹配统计:")
     print(f"  总代币数: {len(binance_symbols)}")
     print(f"  匹配成功: {matched_count}")
     print(f"  匹配率: {matched_count/len(binance_symbols)*100:.1f}%")
     
-    # Save main mapping to file
-    output_file = Path('binance_coingecko_mapping.json')
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump({
-            'metadata': {
-                'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
-                'total_symbols': len(binance_symbols),
-                'matched_symbols': matched_count,
-                'match_rate': matched_count/len(binance_symbols)*100
-            },
-            'mapping': mapping_results
-        }, f, indent=2, ensure_ascii=False)
+    mapping_data = {
+        'metadata': {
+            'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'total_symbols': len(binance_symbols),
+            'matched_symbols': matched_count,
+            'match_rate': matched_count/len(binance_symbols)*100
+        },
+        'mapping': mapping_results
+    }
     
-    print(f"💾 映射文件已保存到: {output_file}")
-    print(f"📄 文件大小: {output_file.stat().st_size / 1024:.1f} KB")
+    # Save main mapping to file
+    if save:
+        output_file = Path('binance_coingecko_mapping.json')
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(mapping_data, option=orjson.OPT_INDENT_2))
+        
+        print(f"💾 映射文件已保存到: {output_file}")
+        print(f"📄 文件大小: {output_file.stat().st_size / 1024:.1f} KB")
     
     # Save review file for multiple matches
     if match_details:
         review_file = Path('coingecko_mapping_review.json')
-        with open(review_file, 'w', encoding='utf-8') as f:
-            json.dump({
+        with open(review_file, 'wb') as f:
+            f.write(orjson.dumps({
                 'metadata': {
                     'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
                     'note': 'Tokens with multiple CoinGecko matches - sorted by market cap'
                 },
                 'tokens': match_details
-            }, f, indent=2, ensure_ascii=False)
+            }, option=orjson.OPT_INDENT_2))
         
         print(f"\n⚠️  {len(match_details)} 个代币有多个匹配（已自动选择市值最大的）")
         print(f"📝 详细信息保存到: {review_file}")
@@ -287,6 +410,9 @@ def create_binance_coingecko_mapping():
             if detail['candidates']:
                 top = detail['candidates'][0]
                 print(f"           市值: ${top['market_cap']:,.0f}")
+    
+    return mapping_data, coingecko_coins
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format='%(message)s')
     create_binance_coingecko_mapping()
\ No newline at end of file
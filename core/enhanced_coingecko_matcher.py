@@ -2,71 +2,132 @@
 """
 增强的CoinGecko匹配算法
 使用多种策略提高匹配率：模糊匹配、名称匹配、手动校对等
+
+用法:
+    python3 enhanced_coingecko_matcher.py          # 对现有映射文件中未匹配的代币做增强匹配
+    python3 enhanced_coingecko_matcher.py --full   # 精确匹配 + 增强匹配一次完成
 """
 
-import json
+import ijson
+import logging
+import numpy as np
+import orjson
 import requests
+import sys
 import time
-from difflib import SequenceMatcher
-from typing import List, Dict, Optional, Tuple
+from collections import defaultdict
+from rapidfuzz import process, fuzz
+from create_coingecko_mapping import (
+    create_binance_coingecko_mapping, coins_list_cache_headers, load_coins_list_cache, save_coins_list_cache
+)
+from typing import Any, List, Dict, Optional, Tuple
+
+# 逐个代币的匹配细节使用 DEBUG 级别输出，默认不打印
+logger = logging.getLogger(__name__)
 
 def load_coingecko_coins():
-    """获取CoinGecko完整代币列表"""
+    """获取CoinGecko完整代币列表
+    
+    使用 ijson 流式解析响应，只保留 id/symbol/name 字段，避免整块缓冲和解析。
+    带 ETag 条件请求，列表未变化 (304) 时直接使用本地缓存。
+    """
     print("📥 获取CoinGecko代币列表...")
     
     try:
-        response = requests.get('https://api.coingecko.com/api/v3/coins/list', timeout=15)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            print(f"❌ 获取失败: {response.status_code}")
-            return None
+        with requests.get('https://api.coingecko.com/api/v3/coins/list', timeout=15, stream=True,
+                          headers=coins_list_cache_headers()) as response:
+            if response.status_code == 304:
+                return load_coins_list_cache()
+            if response.status_code != 200:
+                print(f"❌ 获取失败: {response.status_code}")
+                return None
+            
+            response.raw.decode_content = True
+            coins = [
+                {'id': coin['id'], 'symbol': coin['symbol'], 'name': coin['name']}
+                for coin in ijson.items(response.raw, 'item')
+            ]
+            save_coins_list_cache(coins, response.headers.get('ETag'))
+            return coins
     except Exception as e:
         print(f"❌ 错误: {e}")
         return None
 
-def fuzzy_match_symbol(target_symbol: str, coins_list: List[Dict], threshold: float = 0.6) -> List[Tuple[Dict, float]]:
-    """模糊匹配代币符号"""
-    matches = []
+def build_match_choices(coins_list: List[Dict]) -> Dict[str, Any]:
+    """预先计算大写的符号/名称/ID列表及符号倒排索引，供多次模糊匹配复用"""
+    # 符号大量重复（同名代币），intern 后相同符号共享同一个字符串对象
+    symbols = [sys.intern(coin['symbol'].upper()) for coin in coins_list]
+    
+    symbol_index = defaultdict(list)
+    for idx, symbol in enumerate(symbols):
+        symbol_index[symbol].append(idx)
+    
+    return {
+        'symbols': symbols,
+        'names': [coin['name'].upper() for coin in coins_list],
+        'ids': [coin['id'].upper() for coin in coins_list],
+        'symbol_index': symbol_index,
+    }
+
+def score_symbols(target_symbols: List[str], choices: Dict[str, Any], threshold: float = 0.6) -> np.ndarray:
+    """一次性计算 N 个目标符号与所有 CoinGecko 符号的相似度矩阵（0-100，低于阈值为 0）"""
+    return process.cdist(
+        [s.upper() for s in target_symbols], choices['symbols'],
+        scorer=fuzz.ratio, score_cutoff=threshold * 100, workers=-1, dtype=np.float64
+    )
+
+def fuzzy_match_symbol(target_symbol: str, coins_list: List[Dict], threshold: float = 0.6,
+                       choices: Optional[Dict[str, Any]] = None,
+                       symbol_scores: Optional[np.ndarray] = None) -> List[Tuple[Dict, float]]:
+    """模糊匹配代币符号
+    
+    符号相似度由 RapidFuzz 批量计算；choices 为 build_match_choices 的结果，
+    批量匹配时应预先构建一次并传入。symbol_scores 为 score_symbols 结果中
+    该符号对应的一行，传入时不再单独计算符号相似度。
+    """
+    if choices is None:
+        choices = build_match_choices(coins_list)
+    
     target_upper = target_symbol.upper()
     
-    for coin in coins_list:
-        coin_symbol = coin['symbol'].upper()
-        coin_name = coin['name'].upper()
-        coin_id = coin['id'].upper()
-        
-        # 1. 精确匹配符号
-        if coin_symbol == target_upper:
-            matches.append((coin, 1.0))
-            continue
-        
-        # 2. 符号模糊匹配
-        symbol_similarity = SequenceMatcher(None, target_upper, coin_symbol).ratio()
-        if symbol_similarity >= threshold:
-            matches.append((coin, symbol_similarity))
+    # 0. 符号精确命中时直接返回，无需模糊匹配
+    exact_indices = choices['symbol_index'].get(target_upper)
+    if exact_indices:
+        return [(coins_list[idx], 1.0) for idx in exact_indices[:10]]
+    
+    scores = {}
+    
+    # 1./2. 符号模糊匹配（fuzz.ratio 与 SequenceMatcher.ratio 同为 0-100 的相似度）
+    if symbol_scores is None:
+        symbol_scores = score_symbols([target_upper], choices, threshold)[0]
+    for idx in np.flatnonzero(symbol_scores):
+        scores[int(idx)] = float(symbol_scores[idx]) / 100
+    
+    # 3. 名称包含匹配 / 4. ID包含匹配（仅针对符号未命中的代币）
+    id_target = target_upper.replace('1000', '')
+    for idx, (coin_name, coin_id) in enumerate(zip(choices['names'], choices['ids'])):
+        if idx in scores:
             continue
-        
-        # 3. 名称包含匹配
         if target_upper in coin_name or coin_name in target_upper:
-            name_similarity = 0.8  # 给名称匹配一个固定分数
-            matches.append((coin, name_similarity))
-            continue
-        
-        # 4. ID包含匹配
-        if target_upper.replace('1000', '') in coin_id:
-            id_similarity = 0.7  # 给ID匹配一个固定分数
-            matches.append((coin, id_similarity))
+            scores[idx] = 0.8  # 给名称匹配一个固定分数
+        elif id_target in coin_id:
+            scores[idx] = 0.7  # 给ID匹配一个固定分数
     
     # 按相似度排序
+    matches = [(coins_list[idx], score) for idx, score in scores.items()]
     matches.sort(key=lambda x: x[1], reverse=True)
     return matches[:10]  # 返回前10个最佳匹配
 
-def enhanced_match_unmatched_symbols():
-    """增强匹配未匹配的代币"""
+def enhanced_match_unmatched_symbols(mapping_data: Optional[Dict] = None, coins_list: Optional[List[Dict]] = None):
+    """增强匹配未匹配的代币
+    
+    mapping_data / coins_list 已在内存中时直接传入，避免重新读取映射文件和重新下载列表。
+    """
     
     # 读取现有映射
-    with open('binance_coingecko_mapping.json', 'r', encoding='utf-8') as f:
-        mapping_data = json.load(f)
+    if mapping_data is None:
+        with open('binance_coingecko_mapping.json', 'rb') as f:
+            mapping_data = orjson.loads(f.read())
     
     # 找出未匹配的代币
     unmatched_symbols = []
@@ -77,11 +138,15 @@ def enhanced_match_unmatched_symbols():
     print(f"🔍 开始增强匹配 {len(unmatched_symbols)} 个未匹配代币...")
     
     # 获取CoinGecko列表
-    coins_list = load_coingecko_coins()
+    if coins_list is None:
+        coins_list = load_coingecko_coins()
     if not coins_list:
         print("❌ 无法获取CoinGecko列表")
         return
     
+    # 预先构建匹配用的大写列表，所有未匹配代币共用
+    choices = build_match_choices(coins_list)
+    
     # 手动规则和猜测（基于常见模式）
     manual_mappings = {
         '1000000BOB': None,  # 可能是新代币，暂时没有
@@ -102,23 +167,28 @@ def enhanced_match_unmatched_symbols():
         'VELODROME': 'velodrome-finance'  # Velodrome
     }
     
+    # 需要模糊匹配的代币一次性计算相似度矩阵
+    fuzzy_symbols = [s for s in unmatched_symbols if s not in manual_mappings]
+    score_matrix = score_symbols(fuzzy_symbols, choices, threshold=0.6)
+    score_rows = dict(zip(fuzzy_symbols, score_matrix))
+    
     enhanced_matches = {}
     
     for symbol in unmatched_symbols:
-        print(f"\n=== 处理 {symbol} ===")
+        logger.debug("=== 处理 %s ===", symbol)
         
         # 1. 检查手动映射
         if symbol in manual_mappings:
             manual_id = manual_mappings[symbol]
             if manual_id:
-                print(f"📝 手动映射: {symbol} -> {manual_id}")
+                logger.debug("📝 手动映射: %s -> %s", symbol, manual_id)
                 enhanced_matches[symbol] = {
                     'coingecko_id': manual_id,
                     'match_type': 'manual',
                     'confidence': 1.0
                 }
             else:
-                print(f"❌ 手动确认无匹配: {symbol}")
+                logger.debug("❌ 手动确认无匹配: %s", symbol)
                 enhanced_matches[symbol] = {
                     'coingecko_id': None,
                     'match_type': 'manual_none',
@@ -127,24 +197,26 @@ def enhanced_match_unmatched_symbols():
             continue
         
         # 2. 模糊匹配
-        fuzzy_matches = fuzzy_match_symbol(symbol, coins_list, threshold=0.6)
+        fuzzy_matches = fuzzy_match_symbol(symbol, coins_list, threshold=0.6, choices=choices,
+                                           symbol_scores=score_rows[symbol])
         
         if fuzzy_matches:
-            print(f"🔍 找到 {len(fuzzy_matches)} 个候选匹配:")
-            for i, (coin, score) in enumerate(fuzzy_matches[:5]):
-                print(f"  {i+1}. {coin['id']} ({coin['symbol']}) - {coin['name']} | 相似度: {score:.2f}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("🔍 找到 %d 个候选匹配:", len(fuzzy_matches))
+                for i, (coin, score) in enumerate(fuzzy_matches[:5]):
+                    logger.debug("  %d. %s (%s) - %s | 相似度: %.2f", i + 1, coin['id'], coin['symbol'], coin['name'], score)
             
             # 取最佳匹配
             best_match, best_score = fuzzy_matches[0]
             if best_score >= 0.8:
-                print(f"✅ 自动采用最佳匹配: {symbol} -> {best_match['id']}")
+                logger.debug("✅ 自动采用最佳匹配: %s -> %s", symbol, best_match['id'])
                 enhanced_matches[symbol] = {
                     'coingecko_id': best_match['id'],
                     'match_type': 'fuzzy_auto',
                     'confidence': best_score
                 }
             else:
-                print(f"⚠️  最佳匹配分数较低 ({best_score:.2f})，需要手动确认")
+                logger.debug("⚠️  最佳匹配分数较低 (%.2f)，需要手动确认", best_score)
                 enhanced_matches[symbol] = {
                     'coingecko_id': best_match['id'],
                     'match_type': 'fuzzy_manual',
@@ -152,21 +224,28 @@ def enhanced_match_unmatched_symbols():
                     'candidates': [(c['id'], c['symbol'], c['name'], s) for c, s in fuzzy_matches[:3]]
                 }
         else:
-            print(f"❌ 未找到任何匹配")
+            logger.debug("❌ 未找到任何匹配: %s", symbol)
             enhanced_matches[symbol] = {
                 'coingecko_id': None,
                 'match_type': 'no_match',
                 'confidence': 0.0
             }
     
+    # 汇总输出，代替逐个代币打印
+    type_counts = {}
+    for match_info in enhanced_matches.values():
+        type_counts[match_info['match_type']] = type_counts.get(match_info['match_type'], 0) + 1
+    print(f"📊 增强匹配结果: {type_counts}")
+    
     return enhanced_matches
 
-def update_mapping_with_enhanced_matches(enhanced_matches: Dict):
+def update_mapping_with_enhanced_matches(enhanced_matches: Dict, mapping_data: Optional[Dict] = None):
     """更新映射文件"""
     
     # 读取现有映射
-    with open('binance_coingecko_mapping.json', 'r', encoding='utf-8') as f:
-        mapping_data = json.load(f)
+    if mapping_data is None:
+        with open('binance_coingecko_mapping.json', 'rb') as f:
+            mapping_data = orjson.loads(f.read())
     
     # 更新匹配结果
     updated_count = 0
@@ -179,10 +258,10 @@ def update_mapping_with_enhanced_matches(enhanced_matches: Dict):
                 'confidence': match_info.get('confidence', 1.0)
             }
             updated_count += 1
-            print(f"✅ 更新: {symbol} -> {match_info['coingecko_id']}")
+            logger.debug("✅ 更新: %s -> %s", symbol, match_info['coingecko_id'])
         else:
             mapping_data['mapping'][symbol]['match_type'] = match_info['match_type']
-            print(f"❌ 确认无匹配: {symbol}")
+            logger.debug("❌ 确认无匹配: %s", symbol)
     
     # 更新元数据
     if 'metadata' in mapping_data:
@@ -191,8 +270,8 @@ def update_mapping_with_enhanced_matches(enhanced_matches: Dict):
         mapping_data['metadata']['last_enhanced'] = time.strftime('%Y-%m-%d %H:%M:%S')
     
     # 保存更新后的映射
-    with open('binance_coingecko_mapping.json', 'w', encoding='utf-8') as f:
-        json.dump(mapping_data, f, indent=2, ensure_ascii=False)
+    with open('binance_coingecko_mapping.json', 'wb') as f:
+        f.write(orjson.dumps(mapping_data, option=orjson.OPT_INDENT_2))
     
     print(f"\n📊 更新统计:")
     print(f"  新增匹配: {updated_count}")
@@ -205,11 +284,36 @@ def update_mapping_with_enhanced_matches(enhanced_matches: Dict):
             manual_review[symbol] = match_info
     
     if manual_review:
-        with open('manual_review_needed.json', 'w', encoding='utf-8') as f:
-            json.dump(manual_review, f, indent=2, ensure_ascii=False)
+        with open('manual_review_needed.json', 'wb') as f:
+            f.write(orjson.dumps(manual_review, option=orjson.OPT_INDENT_2))
         print(f"📝 {len(manual_review)} 个代币需要手动确认，详见 manual_review_needed.json")
 
+def build_complete_mapping():
+    """一次完成精确匹配和增强匹配
+    
+    CoinGecko列表只下载一次并在两个阶段间共享，映射文件只写一次。
+    """
+    result = create_binance_coingecko_mapping(save=False)
+    if not result:
+        return None
+    mapping_data, coins_list = result
+    
+    enhanced_matches = enhanced_match_unmatched_symbols(mapping_data=mapping_data, coins_list=coins_list)
+    update_mapping_with_enhanced_matches(enhanced_matches or {}, mapping_data=mapping_data)
+    return mapping_data
+
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format='%(message)s')
+    
+    if '--full' in sys.argv:
+        # 从头构建：精确匹配 + 增强匹配一次完成
+        print("🚀 开始完整构建CoinGecko映射...")
+        if build_complete_mapping():
+            print("✅ 完整映射构建完成！")
+            sys.exit(0)
+        print("❌ 完整映射构建失败")
+        sys.exit(1)
+    
     print("🚀 开始增强CoinGecko匹配...")
     
     # 执行增强匹配
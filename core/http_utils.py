@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+HTTP 公共工具：连接池 Session、Retry-After 解析、令牌桶与固定间隔限速器
+core 内的模块直接 `from http_utils import ...`；其他目录的脚本先把 core/ 加入 sys.path
+"""
+
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def make_session(total: int = 3,
+                 backoff_factor: float = 0.3,
+                 status_forcelist=(429, 500, 502, 503, 504),
+                 allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+                 pool_connections: int = 10,
+                 pool_maxsize: int = 10) -> requests.Session:
+    """Pooled session; statuses in status_forcelist are retried by urllib3 (honouring Retry-After)
+
+    pool_connections is the number of hosts kept pooled, pool_maxsize the
+    connections kept per host (match it to the number of worker threads).
+    Once retries run out the last response is returned, not raised.
+    """
+    session = requests.Session()
+    retry_strategy = Retry(
+        total=total,
+        backoff_factor=backoff_factor,
+        status_forcelist=status_forcelist,
+        allowed_methods=allowed_methods,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                          max_retries=retry_strategy)
+    session.mount("https://", adapter)
+    return session
+
+
+def retry_after(headers, default: float = 2.0) -> float:
+    """Seconds to wait according to a Retry-After header (falls back to default)
+
+    The header may be delta-seconds or an HTTP date (RFC 9110); dates in the
+    past give 0.
+    """
+    value = headers.get('Retry-After')
+    if value is None:
+        return default
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return default
+
+
+class TokenBucket:
+    """令牌桶限速器：允许突发到 capacity 个请求，之后按 refill_per_sec 补充（线程安全）"""
+    
+    def __init__(self, capacity: float, refill_per_sec: float):
+        self.capacity = capacity
+        self.rate = refill_per_sec
+        self.tokens = float(capacity)
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _take(self) -> float:
+        """取一个令牌；成功返回 0，否则返回还需等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+    
+    def acquire(self) -> float:
+        """阻塞直到拿到令牌，返回等待的总秒数"""
+        waited = 0.0
+        while (wait := self._take()) > 0:
+            time.sleep(wait)
+            waited += wait
+        return waited
+    
+    def penalize(self, seconds: float):
+        """服务器要求等待 seconds 秒（Retry-After）：扣掉这段时间内会补充的令牌"""
+        with self._lock:
+            self.tokens -= seconds * self.rate
+    
+    async def acquire_async(self) -> float:
+        """acquire 的异步版本（asyncio.sleep 不阻塞事件循环）"""
+        waited = 0.0
+        while (wait := self._take()) > 0:
+            await asyncio.sleep(wait)
+            waited += wait
+        return waited
+
+
+class RateLimiter:
+    """线程安全的限速器：相邻两次 wait() 返回至少间隔 1/rate 秒（不允许突发）"""
+    
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+    
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        time.sleep(max(0.0, slot - now))
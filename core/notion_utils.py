@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Notion API 公共工具：请求头、属性名到属性 ID 的查找、只返回部分属性的查询 URL
+"""
+
+import orjson
+import requests
+
+NOTION_API_URL = 'https://api.notion.com/v1'
+NOTION_VERSION = '2022-06-28'
+
+
+def notion_headers(api_key: str) -> dict:
+    """Notion API 请求头（main 中构建一次，传给各个函数）"""
+    return {
+        'Authorization': f'Bearer {api_key}',
+        'Content-Type': 'application/json',
+        'Notion-Version': NOTION_VERSION
+    }
+
+
+def property_ids(session: requests.Session, database_id: str, names, headers: dict = None,
+                 timeout: float = 15) -> list:
+    """IDs of the named properties, read from the database schema
+
+    The IDs come back already URL-encoded. Names missing from the schema are
+    skipped; an empty list is returned if the schema can't be read.
+    """
+    try:
+        response = session.get(f'{NOTION_API_URL}/databases/{database_id}', headers=headers, timeout=timeout)
+        response.raise_for_status()
+        schema = orjson.loads(response.content).get('properties', {})
+    except (requests.RequestException, ValueError):
+        return []
+    return [schema[name]['id'] for name in names if name in schema]
+
+
+def query_url(session: requests.Session, database_id: str, properties, headers: dict = None,
+              timeout: float = 15) -> str:
+    """只返回指定属性的数据库查询 URL
+
+    properties 为空或读取数据库结构失败时返回普通 URL（返回全部属性）
+    """
+    url = f'{NOTION_API_URL}/databases/{database_id}/query'
+    ids = property_ids(session, database_id, properties, headers, timeout) if properties else []
+    if not ids:
+        return url
+    return f'{url}?' + '&'.join(f'filter_properties={pid}' for pid in ids)
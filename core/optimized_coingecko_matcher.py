@@ -4,36 +4,58 @@
 使用本地映射文件，避免每次都重新匹配，大幅提升性能
 """
 
-import json
+import orjson
+import sqlite3
 import time
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
+# 设为 True 时打印每次查询的详细结果
+DEBUG = False
+
+MAPPING_FILE = Path('binance_coingecko_mapping.json')
+# JSON 映射的 SQLite 索引副本，单个符号查询无需解析整个 JSON
+MAPPING_DB = Path('binance_mappings.db')
+
 # 本地映射文件缓存
 _local_mapping_cache = None
-_mapping_cache_timestamp = None
+_mapping_cache_mtime = None   # 缓存对应的文件 mtime
+_last_stat_check = 0.0        # 上次检查文件 mtime 的时间
+
+# 两次 stat() 检查之间的最小间隔（秒）
+STAT_CHECK_INTERVAL = 5.0
+
+# 模块级 SQLite 连接
+_db_conn = None
+_db_json_mtime = None   # 数据库当前对应的 JSON 文件 mtime
+_db_last_stat_check = 0.0   # get_mapping_db 上次检查 JSON mtime 的时间
 
 def load_local_coingecko_mapping():
     """加载本地CoinGecko映射文件"""
-    global _local_mapping_cache, _mapping_cache_timestamp
+    global _local_mapping_cache, _mapping_cache_mtime, _last_stat_check
     
-    mapping_file = Path('binance_coingecko_mapping.json')
+    mapping_file = MAPPING_FILE
     
-    # 如果缓存存在且文件未修改，直接返回缓存
-    if _local_mapping_cache and _mapping_cache_timestamp:
-        if mapping_file.exists():
-            file_mtime = mapping_file.stat().st_mtime
-            if file_mtime <= _mapping_cache_timestamp:
-                return _local_mapping_cache
+    # 如果缓存存在且文件未修改，直接返回缓存（每 STAT_CHECK_INTERVAL 秒最多 stat 一次）
+    if _local_mapping_cache:
+        now = time.time()
+        if now - _last_stat_check < STAT_CHECK_INTERVAL:
+            return _local_mapping_cache
+        _last_stat_check = now
+        if mapping_file.exists() and mapping_file.stat().st_mtime == _mapping_cache_mtime:
+            return _local_mapping_cache
     
     # 加载映射文件
     if mapping_file.exists():
         try:
-            with open(mapping_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            file_mtime = mapping_file.stat().st_mtime
+            with open(mapping_file, 'rb') as f:
+                data = orjson.loads(f.read())
             
             _local_mapping_cache = data['mapping']
-            _mapping_cache_timestamp = time.time()
+            _mapping_cache_mtime = file_mtime
+            _last_stat_check = time.time()
             
             metadata = data.get('metadata', {})
             print(f"📋 加载本地CoinGecko映射: {metadata.get('matched_symbols', 0)}/{metadata.get('total_symbols', 0)} 个代币 ({metadata.get('match_rate', 0):.1f}%)")
@@ -47,6 +69,96 @@ def load_local_coingecko_mapping():
         print("⚠️  本地映射文件不存在，将使用在线匹配")
         return None
 
+def _sync_db_from_json(conn: sqlite3.Connection, json_mtime: float) -> bool:
+    """数据库记录的 JSON mtime 与 json_mtime 不同时，用 JSON 内容重建数据库
+    
+    数据库已是最新或重建成功返回 True，读取 JSON 失败返回 False
+    """
+    row = conn.execute("SELECT value FROM meta WHERE key = 'json_mtime'").fetchone()
+    if row and row[0] == json_mtime:
+        return True
+    
+    # 直接读文件：load_local_coingecko_mapping 的内存缓存可能还是旧内容
+    try:
+        with open(MAPPING_FILE, 'rb') as f:
+            local_mapping = orjson.loads(f.read())['mapping']
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ 加载本地映射文件失败: {e}")
+        return False
+    
+    # 仅大小写不同的键映射到同一个 symbol，后出现的覆盖先出现的
+    with conn:
+        conn.execute("DELETE FROM mapping")
+        conn.executemany(
+            "INSERT OR REPLACE INTO mapping (symbol, coingecko_id, match_type, ts) VALUES (?, ?, ?, ?)",
+            [
+                (symbol.upper(), info.get('coingecko_id'), info.get('match_type'), info.get('timestamp'))
+                for symbol, info in local_mapping.items()
+            ]
+        )
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_mtime', ?)", (json_mtime,))
+    print(f"🗄️  已从 {MAPPING_FILE} 重建映射数据库: {len(local_mapping)} 个代币")
+    return True
+
+def get_mapping_db() -> sqlite3.Connection:
+    """获取 SQLite 映射数据库连接（首次调用时创建）
+    
+    每 STAT_CHECK_INTERVAL 秒最多 stat 一次 JSON 映射文件，文件变化时重建数据库并清空
+    _lookup 缓存，长时间运行的进程也能读到最新映射；重建失败时下次检查会再试
+    """
+    global _db_conn, _db_json_mtime, _db_last_stat_check
+    
+    if _db_conn is None:
+        _db_conn = sqlite3.connect(MAPPING_DB, check_same_thread=False)
+        _db_conn.execute(
+            "CREATE TABLE IF NOT EXISTS mapping "
+            "(symbol TEXT PRIMARY KEY, coingecko_id TEXT, match_type TEXT, ts REAL)"
+        )
+        _db_conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value REAL)")
+    
+    now = time.time()
+    if now - _db_last_stat_check < STAT_CHECK_INTERVAL:
+        return _db_conn
+    _db_last_stat_check = now
+    
+    try:
+        json_mtime = MAPPING_FILE.stat().st_mtime
+    except OSError:
+        json_mtime = None
+    if json_mtime is not None and json_mtime != _db_json_mtime:
+        if _sync_db_from_json(_db_conn, json_mtime):
+            _db_json_mtime = json_mtime
+            _lookup.cache_clear()
+    
+    return _db_conn
+
+@lru_cache(maxsize=4096)
+def _lookup(symbol_upper: str) -> Optional[str]:
+    """在本地映射中查找代币（按符号缓存结果）"""
+    
+    # 1. 检查本地映射（SQLite 主键查询；调用方已通过 get_mapping_db 同步过数据库）
+    row = _db_conn.execute(
+        "SELECT coingecko_id, match_type FROM mapping WHERE symbol = ?", (symbol_upper,)
+    ).fetchone()
+    if row is not None:
+        coingecko_id, match_type = row
+        
+        if DEBUG:
+            if coingecko_id:
+                match_type = match_type or 'cached'
+                print(f"✅ 本地映射: {symbol_upper} -> {coingecko_id} ({match_type})")
+            else:
+                print(f"❌ 本地映射显示无匹配: {symbol_upper}")
+        return coingecko_id
+    
+    # 2. 如果本地没有，使用在线匹配（备用）
+    if DEBUG:
+        print(f"⚠️  {symbol_upper} 不在本地映射中，建议更新映射文件")
+    
+    # 这里可以调用原来的在线匹配函数作为备用
+    # return find_coingecko_by_symbol_online(symbol)
+    return None
+
 def get_coingecko_id_optimized(symbol: str) -> Optional[str]:
     """优化版本的CoinGecko ID获取
     
@@ -55,33 +167,17 @@ def get_coingecko_id_optimized(symbol: str) -> Optional[str]:
     2. 如果本地没有，再使用在线匹配
     3. 新匹配的结果可以选择性地保存到本地文件
     
+    查询结果会被缓存，映射文件变化（包括 update_mapping_file_with_new_symbol 写入）后
+    最迟 STAT_CHECK_INTERVAL 秒失效。
+    
     Args:
         symbol: Binance代币符号
         
     Returns:
         CoinGecko ID 或 None
     """
-    
-    # 1. 检查本地映射
-    local_mapping = load_local_coingecko_mapping()
-    if local_mapping and symbol.upper() in local_mapping:
-        mapping_info = local_mapping[symbol.upper()]
-        coingecko_id = mapping_info.get('coingecko_id')
-        match_type = mapping_info.get('match_type', 'cached')
-        
-        if coingecko_id:
-            print(f"✅ 本地映射: {symbol} -> {coingecko_id} ({match_type})")
-            return coingecko_id
-        else:
-            print(f"❌ 本地映射显示无匹配: {symbol}")
-            return None
-    
-    # 2. 如果本地没有，使用在线匹配（备用）
-    print(f"⚠️  {symbol} 不在本地映射中，建议更新映射文件")
-    
-    # 这里可以调用原来的在线匹配函数作为备用
-    # return find_coingecko_by_symbol_online(symbol)
-    return None
+    get_mapping_db()  # 每 STAT_CHECK_INTERVAL 秒最多 stat 一次 JSON，文件变化时重建数据库并清空缓存
+    return _lookup(symbol.upper())
 
 def get_mapping_statistics():
     """获取映射文件统计信息"""
@@ -105,8 +201,8 @@ def get_mapping_statistics():
     }
 
 def update_mapping_file_with_new_symbol(symbol: str, coingecko_id: Optional[str], match_type: str = "manual"):
-    """向映射文件添加新的代币映射"""
-    mapping_file = Path('binance_coingecko_mapping.json')
+    """向映射文件添加新的代币映射（同时写入 SQLite 数据库）"""
+    mapping_file = MAPPING_FILE
     
     if not mapping_file.exists():
         print("❌ 映射文件不存在，无法更新")
@@ -114,14 +210,15 @@ def update_mapping_file_with_new_symbol(symbol: str, coingecko_id: Optional[str]
     
     try:
         # 读取现有映射
-        with open(mapping_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open(mapping_file, 'rb') as f:
+            data = orjson.loads(f.read())
         
         # 添加新映射
+        timestamp = time.time()
         data['mapping'][symbol.upper()] = {
             'coingecko_id': coingecko_id,
             'match_type': match_type,
-            'timestamp': time.time()
+            'timestamp': timestamp
         }
         
         # 更新元数据
@@ -131,13 +228,30 @@ def update_mapping_file_with_new_symbol(symbol: str, coingecko_id: Optional[str]
             data['metadata']['total_symbols'] = len(data['mapping'])
             data['metadata']['match_rate'] = data['metadata']['matched_symbols'] / data['metadata']['total_symbols'] * 100
         
+        # 先同步数据库（写文件之后再调用会把刚写入的 JSON 整表重建一遍）
+        global _local_mapping_cache, _db_json_mtime
+        conn = get_mapping_db()
+        
         # 保存回文件
-        with open(mapping_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        with open(mapping_file, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        
+        # 写入数据库，并记录 JSON 的新 mtime 以免下次整表重建
+        json_mtime = mapping_file.stat().st_mtime
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO mapping (symbol, coingecko_id, match_type, ts) VALUES (?, ?, ?, ?)",
+                (symbol.upper(), coingecko_id, match_type, timestamp)
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('json_mtime', ?)",
+                (json_mtime,)
+            )
+        _db_json_mtime = json_mtime
         
         # 清除缓存，强制重新加载
-        global _local_mapping_cache
         _local_mapping_cache = None
+        _lookup.cache_clear()
         
         print(f"✅ 已更新映射: {symbol} -> {coingecko_id or 'None'}")
         return True
@@ -4,47 +4,68 @@
 避免 Binance REST API 封禁
 """
 
-import json
+import gzip
+import orjson
 import sys
+from functools import lru_cache
 from pathlib import Path
 from notion_client import Client
+from scripts.update_binance_trading_data import load_cached_cmc_info, save_cached_cmc_info
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'core'))
+from http_utils import make_session
 
 # Configuration
 BASE_DIR = Path(__file__).parent
 CONFIG_FILE = BASE_DIR / 'config' / 'config.json'
 CMC_MAPPING_FILE = BASE_DIR / 'config' / 'binance_cmc_mapping.json'
+CMC_MAPPING_GZ_FILE = BASE_DIR / 'config' / 'binance_cmc_mapping.json.gz'
 WS_DATA_FILE = BASE_DIR / 'data' / 'websocket_collected_data.json'
 
 
+SESSION = make_session(pool_connections=20, pool_maxsize=20)
+
+
+@lru_cache(maxsize=1)
 def load_config():
     """加载配置"""
-    with open(CONFIG_FILE, 'r') as f:
-        config = json.load(f)
+    with open(CONFIG_FILE, 'rb') as f:
+        config = orjson.loads(f.read())
     return config
 
 
+@lru_cache(maxsize=1)
 def load_cmc_mapping():
-    """加载 CMC 映射"""
-    with open(CMC_MAPPING_FILE, 'r') as f:
-        data = json.load(f)
-        if 'mapping' in data:
-            return data['mapping']
-        return data
+    """加载 CMC 映射（进程内只解析一次）
+    
+    优先读取 create_cmc_mapping 生成的紧凑 .json.gz；若 .json 之后被其他脚本修改过则读 .json
+    只存在其中一个文件时直接读取存在的那个
+    """
+    if CMC_MAPPING_GZ_FILE.exists() and (
+            not CMC_MAPPING_FILE.exists()
+            or CMC_MAPPING_GZ_FILE.stat().st_mtime >= CMC_MAPPING_FILE.stat().st_mtime):
+        with gzip.open(CMC_MAPPING_GZ_FILE, 'rb') as f:
+            data = orjson.loads(f.read())
+    else:
+        with open(CMC_MAPPING_FILE, 'rb') as f:
+            data = orjson.loads(f.read())
+    if 'mapping' in data:
+        return data['mapping']
+    return data
 
 
+@lru_cache(maxsize=1)
 def load_websocket_data():
     """加载 WebSocket 数据"""
     if not WS_DATA_FILE.exists():
         return {}
     
-    with open(WS_DATA_FILE, 'r') as f:
-        return json.load(f)
+    with open(WS_DATA_FILE, 'rb') as f:
+        return orjson.loads(f.read())
 
 
 def get_cmc_metadata(symbol: str, cmc_api_key: str):
     """从 CMC API 获取元数据"""
-    import requests
-    
     cmc_mapping = load_cmc_mapping()
     
     if symbol not in cmc_mapping:
@@ -61,21 +82,27 @@ def get_cmc_metadata(symbol: str, cmc_api_key: str):
     params = {'id': cmc_id}
     
     try:
-        response = requests.get(url, headers=headers, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        if 'data' in data and str(cmc_id) in data['data']:
+        # CMC info 数据很少变化，优先使用本地缓存（默认 7 天有效）
+        coin_data = load_cached_cmc_info(cmc_id)
+        if coin_data is None:
+            response = SESSION.get(url, headers=headers, params=params, timeout=10)
+            response.raise_for_status()
+            data = response.json()
+            
+            if 'data' not in data or str(cmc_id) not in data['data']:
+                return None
             coin_data = data['data'][str(cmc_id)]
-            return {
-                'name': coin_data.get('name', ''),
-                'symbol': coin_data.get('symbol', ''),
-                'logo': coin_data.get('logo', ''),
-                'website': coin_data.get('urls', {}).get('website', [''])[0],
-                'description': coin_data.get('description', ''),
-                'cmc_id': cmc_id,
-                'cmc_slug': coin_data.get('slug', '')
-            }
+            save_cached_cmc_info(cmc_id, coin_data)
+        
+        return {
+            'name': coin_data.get('name', ''),
+            'symbol': coin_data.get('symbol', ''),
+            'logo': coin_data.get('logo', ''),
+            'website': coin_data.get('urls', {}).get('website', [''])[0],
+            'description': coin_data.get('description', ''),
+            'cmc_id': cmc_id,
+            'cmc_slug': coin_data.get('slug', '')
+        }
     except Exception as e:
         print(f"⚠️  获取 CMC 元数据失败: {e}")
     
@@ -4,23 +4,30 @@
 """
 import sys
 from pathlib import Path
-import json
-import time
+import orjson
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 sys.path.insert(0, str(Path.cwd()))
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'core'))
 
+from http_utils import RateLimiter
 from scripts.update_binance_trading_data import CMCClient, NotionClient
 import requests
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
+
+CMC_BATCH_SIZE = 100  # /cryptocurrency/info 与 quotes/latest 单次最多查询的 ID 数
+NOTION_MAX_WORKERS = 3
+NOTION_REQUESTS_PER_SECOND = 3
 
 # 加载配置
-with open('config/config.json', 'r') as f:
-    config = json.load(f)
+with open('config/config.json', 'rb') as f:
+    config = orjson.loads(f.read())
 
-with open('config/api_config.json', 'r') as f:
-    api_config = json.load(f)
+with open('config/api_config.json', 'rb') as f:
+    api_config = orjson.loads(f.read())
 
-with open('config/binance_cmc_mapping.json', 'r') as f:
-    cmc_data = json.load(f)
+with open('config/binance_cmc_mapping.json', 'rb') as f:
+    cmc_data = orjson.loads(f.read())
     
 # Handle nested mapping structure (like update.py does)
 if 'mapping' in cmc_data:
@@ -31,49 +38,50 @@ else:
 # 初始化客户端
 cmc_client = CMCClient(api_config['coinmarketcap']['api_key'])
 notion = NotionClient(config['notion']['api_key'], config['notion']['database_id'])
+notion_limiter = RateLimiter(NOTION_REQUESTS_PER_SECOND)
 
 print("=" * 80)
 print("🔧 批量补全缺失 CMC 元数据")
 print("=" * 80)
 
-# 1. 查询所有页面
-print("\n📥 正在加载所有 Notion 页面...")
-all_pages = notion.query_database()
-print(f"✅ 加载了 {len(all_pages)} 个页面")
-
-# 2. 找出缺失 CMC 元数据的页面
-print("\n🔍 检查哪些页面缺失 CMC 元数据...")
+# 1. 分页加载所有页面，同时找出缺失 CMC 元数据的页面
+#    （处理当前一页时，下一页已在后台请求）
+print("\n📥 正在加载 Notion 页面并检查 CMC 元数据...")
+page_count = 0
 missing_metadata = []
 
-for page in all_pages:
-    props = page['properties']
-    
-    # 获取 Symbol
-    symbol_prop = props.get('Symbol', {})
-    if not symbol_prop.get('title'):
-        continue
-    symbol = symbol_prop['title'][0]['text']['content']
-    
-    # 检查是否有 CMC mapping
-    if symbol not in cmc_mapping:
-        continue
-    
-    cmc_id = cmc_mapping[symbol].get('cmc_id')
-    if not cmc_id:
-        continue
-    
-    # 检查是否缺失元数据（检查 Name 字段）
-    name_prop = props.get('Name', {})
-    has_name = bool(name_prop.get('rich_text'))
-    
-    if not has_name:
-        missing_metadata.append({
-            'page_id': page['id'],
-            'symbol': symbol,
-            'cmc_id': cmc_id,
-            'created_time': page['created_time']
-        })
+for results in notion.iter_database_pages():
+    page_count += len(results)
+    for page in results:
+        props = page['properties']
+        
+        # 获取 Symbol
+        symbol_prop = props.get('Symbol', {})
+        if not symbol_prop.get('title'):
+            continue
+        symbol = symbol_prop['title'][0]['text']['content']
+        
+        # 检查是否有 CMC mapping
+        if symbol not in cmc_mapping:
+            continue
+        
+        cmc_id = cmc_mapping[symbol].get('cmc_id')
+        if not cmc_id:
+            continue
+        
+        # 检查是否缺失元数据（检查 Name 字段）
+        name_prop = props.get('Name', {})
+        has_name = bool(name_prop.get('rich_text'))
+        
+        if not has_name:
+            missing_metadata.append({
+                'page_id': page['id'],
+                'symbol': symbol,
+                'cmc_id': cmc_id,
+                'created_time': page['created_time']
+            })
 
+print(f"✅ 加载了 {page_count} 个页面")
 print(f"⚠️  发现 {len(missing_metadata)} 个页面缺失 CMC 元数据")
 
 if not missing_metadata:
@@ -96,114 +104,139 @@ if response != 'y':
     print("❌ 已取消")
     sys.exit(0)
 
-# 4. 批量更新
+# 4. 批量获取 CMC 数据（每 100 个 ID 一次请求）
+print("\n📡 正在批量获取 CMC 数据...")
+cmc_data_by_id = {}
+cmc_ids = list(dict.fromkeys(int(item['cmc_id']) for item in missing_metadata))
+for start in range(0, len(cmc_ids), CMC_BATCH_SIZE):
+    cmc_data_by_id.update(cmc_client.get_token_data_bulk(cmc_ids[start:start + CMC_BATCH_SIZE]))
+print(f"✅ 获取了 {len(cmc_data_by_id)}/{len(cmc_ids)} 个代币的 CMC 数据")
+
+
+def build_properties(cmc_id, cmc_full_data):
+    """根据 CMC 数据构建 Notion 页面属性，返回 (properties, icon_url)"""
+    metadata = cmc_full_data['metadata']
+    quote_data = cmc_full_data['quote']
+    quote = quote_data.get('quote', {}).get('USD', {})
+    
+    # 构建更新属性
+    properties = {}
+    
+    # Name
+    if metadata.get('name'):
+        properties['Name'] = {
+            "rich_text": [{"text": {"content": metadata['name']}}]
+        }
+    
+    # CMC ID
+    properties['CMC ID'] = {
+        "number": cmc_id
+    }
+    
+    # Website
+    websites = metadata.get('urls', {}).get('website', [])
+    if websites and websites[0]:
+        properties['Website'] = {
+            "url": websites[0]
+        }
+    
+    # Logo (作为 URL)
+    if metadata.get('logo'):
+        properties['Logo'] = {
+            "url": metadata['logo']
+        }
+    
+    # Genesis Date
+    if metadata.get('date_added'):
+        date_str = metadata['date_added'][:10]  # 取前 10 位 YYYY-MM-DD
+        properties['Genesis Date'] = {
+            "date": {"start": date_str}
+        }
+    
+    # Circulating Supply
+    if quote_data.get('circulating_supply'):
+        properties['Circulating Supply'] = {
+            "number": float(quote_data['circulating_supply'])
+        }
+    
+    # Total Supply
+    if quote_data.get('total_supply'):
+        properties['Total Supply'] = {
+            "number": float(quote_data['total_supply'])
+        }
+    
+    # Max Supply
+    if quote_data.get('max_supply'):
+        properties['Max Supply'] = {
+            "number": float(quote_data['max_supply'])
+        }
+    
+    # FDV
+    if quote.get('fully_diluted_market_cap'):
+        properties['FDV'] = {
+            "number": float(quote['fully_diluted_market_cap'])
+        }
+    
+    return properties, metadata.get('logo')
+
+
+def _is_rate_limited(exc):
+    return (isinstance(exc, requests.exceptions.HTTPError)
+            and exc.response is not None and exc.response.status_code == 429)
+
+
+@retry(retry=retry_if_exception(_is_rate_limited), stop=stop_after_attempt(4),
+       wait=wait_exponential(multiplier=1, min=1, max=10), reraise=True)
+def update_notion_page(page_id, properties, icon_url):
+    """限速后更新页面；遇到 429 指数退避重试"""
+    notion_limiter.wait()
+    return notion.update_page(page_id, properties, icon_url)
+
+
+def process_item(item):
+    """更新单个页面；CMC 无数据时返回 False"""
+    cmc_full_data = cmc_data_by_id.get(int(item['cmc_id']))
+    if not cmc_full_data:
+        return False
+    
+    properties, icon_url = build_properties(item['cmc_id'], cmc_full_data)
+    update_notion_page(item['page_id'], properties, icon_url)
+    return True
+
+
+# 5. 批量更新
 print("\n🚀 开始批量更新...")
 success_count = 0
 error_count = 0
 rate_limit_hit = False
 
-for i, item in enumerate(missing_metadata, 1):
-    symbol = item['symbol']
-    cmc_id = item['cmc_id']
-    page_id = item['page_id']
+# Notion 限制每个集成 3 req/s：3 个线程并发写入，由限速器控制总速率
+with ThreadPoolExecutor(max_workers=NOTION_MAX_WORKERS) as executor:
+    futures = {executor.submit(process_item, item): item for item in missing_metadata}
     
-    try:
-        # 获取 CMC 数据
-        cmc_full_data = cmc_client.get_token_data(cmc_id)
-        
-        if not cmc_full_data:
-            print(f"[{i}/{len(missing_metadata)}] {symbol} ⚠️  CMC API 返回空数据")
-            error_count += 1
-            continue
-        
-        metadata = cmc_full_data['metadata']
-        quote_data = cmc_full_data['quote']
-        quote = quote_data.get('quote', {}).get('USD', {})
-        
-        # 构建更新属性
-        properties = {}
-        
-        # Name
-        if metadata.get('name'):
-            properties['Name'] = {
-                "rich_text": [{"text": {"content": metadata['name']}}]
-            }
-        
-        # CMC ID
-        properties['CMC ID'] = {
-            "number": cmc_id
-        }
-        
-        # Website
-        websites = metadata.get('urls', {}).get('website', [])
-        if websites and websites[0]:
-            properties['Website'] = {
-                "url": websites[0]
-            }
-        
-        # Logo (作为 URL)
-        if metadata.get('logo'):
-            properties['Logo'] = {
-                "url": metadata['logo']
-            }
-        
-        # Genesis Date
-        if metadata.get('date_added'):
-            date_str = metadata['date_added'][:10]  # 取前 10 位 YYYY-MM-DD
-            properties['Genesis Date'] = {
-                "date": {"start": date_str}
-            }
-        
-        # Circulating Supply
-        if quote_data.get('circulating_supply'):
-            properties['Circulating Supply'] = {
-                "number": float(quote_data['circulating_supply'])
-            }
-        
-        # Total Supply
-        if quote_data.get('total_supply'):
-            properties['Total Supply'] = {
-                "number": float(quote_data['total_supply'])
-            }
-        
-        # Max Supply
-        if quote_data.get('max_supply'):
-            properties['Max Supply'] = {
-                "number": float(quote_data['max_supply'])
-            }
-        
-        # FDV
-        if quote.get('fully_diluted_market_cap'):
-            properties['FDV'] = {
-                "number": float(quote['fully_diluted_market_cap'])
-            }
-        
-        # 更新页面
-        icon_url = metadata.get('logo')
-        notion.update_page(page_id, properties, icon_url)
-        
-        print(f"[{i}/{len(missing_metadata)}] {symbol} ✅")
-        success_count += 1
-        
-        # 速率限制：每秒最多 3 个请求
-        time.sleep(0.35)
-        
-    except Exception as e:
-        error_msg = str(e)
-        if '429' in error_msg or 'rate_limit' in error_msg.lower():
-            print(f"[{i}/{len(missing_metadata)}] {symbol} ⚠️  触发 CMC API 速率限制")
-            rate_limit_hit = True
-            break
-        else:
-            print(f"[{i}/{len(missing_metadata)}] {symbol} ❌ {error_msg[:50]}")
+    for i, future in enumerate(as_completed(futures), 1):
+        symbol = futures[future]['symbol']
+        try:
+            if future.result():
+                print(f"[{i}/{len(missing_metadata)}] {symbol} ✅")
+                success_count += 1
+            else:
+                print(f"[{i}/{len(missing_metadata)}] {symbol} ⚠️  CMC API 返回空数据")
+                error_count += 1
+        except Exception as e:
+            if _is_rate_limited(e):
+                print(f"[{i}/{len(missing_metadata)}] {symbol} ⚠️  触发 Notion API 速率限制")
+                rate_limit_hit = True
+            else:
+                print(f"[{i}/{len(missing_metadata)}] {symbol} ❌ {str(e)[:50]}")
             error_count += 1
 
-# 5. 总结
+# 6. 总结
 print("\n" + "=" * 80)
 print("📊 更新完成")
 print("=" * 80)
 print(f"✅ 成功: {success_count}")
 print(f"❌ 失败: {error_count}")
 if rate_limit_hit:
-    print(f"⚠️  剩余: {len(missing_metadata) - success_count - error_count} (触发了 CMC API 速率限制)")
+    print("⚠️  部分页面重试后仍触发 Notion API 速率限制")
     print("\n💡 建议：等待几分钟后重新运行此脚本继续更新")
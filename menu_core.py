@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+菜单公共逻辑：menu.py 与 menu_websocket.py 只声明各自的选项（MenuItem 列表），
+打印菜单、输入处理和执行步骤都在这里完成
+"""
+
+import asyncio
+import inspect
+import json
+import re
+import signal
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, List, Union
+
+PY = sys.executable
+SCRIPT_DIR = Path(__file__).resolve().parent
+WS_DATA_FILE = SCRIPT_DIR / 'data' / 'websocket_collected_data.json'
+
+BANNER = "=" * 80 + "\n"
+# 输出被重定向时，长任务只转发这些进度/结果行（跳过逐币种日志）
+PROGRESS_LINE = re.compile(r"^\s*(✅|❌|⚠️|⏱️|⏳|📋|🌐|🎯|\.\.\.)")
+
+CONFIG_FILE = SCRIPT_DIR / 'config' / 'config.json'
+
+# 终端尺寸变化（SIGWINCH）或执行完操作后才重绘菜单
+_needs_redraw = True
+
+
+@dataclass
+class Step:
+    """One step of a menu action
+
+    command is either an argv list (run as a child process, symbols appended)
+    or a callable taking the symbol list (run in-process; may return a coroutine).
+    long_running marks chatty child processes whose output is filtered when
+    stdout is not a terminal.
+    """
+    description: str
+    command: Union[List[str], Callable]
+    long_running: bool = False
+
+
+@dataclass
+class MenuItem:
+    key: str
+    title: str
+    description: List[str] = field(default_factory=list)
+    steps: List[Step] = field(default_factory=list)
+    requires_ws_data: bool = False
+    needs_symbols: bool = False
+
+
+def format_menu(menu: List[MenuItem], title: str, tip: str = "") -> str:
+    """Build the main menu text (once per menu)"""
+    lines = ["", BANNER + f"🚀 {title}", BANNER, "请选择更新模式：", ""]
+    for item in menu:
+        lines.append(f"  [{item.key}] {item.title}")
+        lines.extend(f"      • {line}" for line in item.description)
+        lines.append("")
+    lines += ["  [0] 退出", "", BANNER.rstrip("\n")]
+    if tip:
+        lines += [f"💡 提示：{tip}", BANNER.rstrip("\n")]
+    return "\n".join(lines) + "\n"
+
+
+def _request_redraw(signum=None, frame=None):
+    global _needs_redraw
+    _needs_redraw = True
+
+
+def _load_known_symbols():
+    """Symbols from config.json (for tab completion); empty if unavailable"""
+    try:
+        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f).get('binance_symbols', [])
+    except (OSError, ValueError):
+        return []
+
+
+def setup_input(menu: List[MenuItem]):
+    """Tab-complete menu keys and symbols; redraw the menu on terminal resize"""
+    if hasattr(signal, 'SIGWINCH'):
+        signal.signal(signal.SIGWINCH, _request_redraw)
+
+    try:
+        import readline
+    except ImportError:  # Windows 无 readline，直接使用普通 input()
+        return
+
+    words = sorted({"0", *(item.key for item in menu), *_load_known_symbols()})
+
+    def complete(text, state):
+        matches = [w for w in words if w.startswith(text.upper())]
+        return matches[state] if state < len(matches) else None
+
+    readline.set_completer(complete)
+    readline.parse_and_bind("tab: complete")
+
+
+async def _forward_progress(stream):
+    """Echo only progress lines from a piped child's output"""
+    async for raw in stream:
+        line = raw.decode('utf-8', errors='replace')
+        if PROGRESS_LINE.match(line):
+            sys.stdout.write(line)
+
+
+async def run_command(argv, description, filter_output=False):
+    """Run one step as a child process (no shell) and wait for it
+
+    With filter_output (and stdout not a terminal) the child's output is piped
+    and only progress lines are forwarded.
+    """
+    print(f"\n🔄 {description}")
+    print(f"📝 执行命令: {' '.join(argv)}\n")
+    sys.stdout.write(BANNER)
+
+    piped = filter_output and not sys.stdout.isatty()
+    if piped:
+        sys.stdout.flush()
+        proc = await asyncio.create_subprocess_exec(
+            *argv, cwd=SCRIPT_DIR,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+    else:
+        proc = await asyncio.create_subprocess_exec(*argv, cwd=SCRIPT_DIR)
+    try:
+        if piped:
+            await _forward_progress(proc.stdout)
+        returncode = await proc.wait()
+    except asyncio.CancelledError:
+        # Ctrl-C: make sure the child does not outlive the menu step
+        if proc.returncode is None:
+            proc.terminate()
+            await proc.wait()
+        raise
+
+    sys.stdout.write("\n" + BANNER)
+    if returncode == 0:
+        print("✅ 操作完成！")
+        return True
+    print(f"❌ 操作失败，错误码: {returncode}")
+    return False
+
+
+async def run_in_process(func, symbols, description):
+    """Run one step in-process (no new interpreter, imports stay loaded)"""
+    print(f"\n🔄 {description}\n")
+    sys.stdout.write(BANNER)
+
+    try:
+        result = func(symbols)
+        if inspect.isawaitable(result):
+            await result
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            sys.stdout.write("\n" + BANNER)
+            print(f"❌ 操作失败，错误码: {e.code}")
+            return False
+    except Exception as e:
+        sys.stdout.write("\n" + BANNER)
+        print(f"❌ 操作失败: {e}")
+        return False
+
+    sys.stdout.write("\n" + BANNER)
+    print("✅ 操作完成！")
+    return True
+
+
+async def run_item(item: MenuItem, symbols: List[str]):
+    """Run the steps of a menu item in order; stop at the first failure"""
+    for step in item.steps:
+        if callable(step.command):
+            ok = await run_in_process(step.command, symbols, step.description)
+        else:
+            ok = await run_command([*step.command, *symbols], step.description,
+                                   filter_output=step.long_running)
+        if not ok:
+            return False
+    return True
+
+
+def run_action(coro):
+    """Drive one menu action on a fresh event loop; Ctrl-C cancels it (and its child)"""
+    try:
+        return asyncio.run(coro)
+    except KeyboardInterrupt:
+        print("\n\n⚠️  用户中断操作")
+        return False
+
+
+def get_symbols_input():
+    """Get symbol list from user input"""
+    print("\n请输入币种符号（用空格分隔，例如：BTC ETH SOL）")
+    symbols = input("币种符号: ").strip().upper()
+    if not symbols:
+        print("❌ 未输入币种")
+        return None
+    return symbols.split()
+
+
+def check_websocket_data_exists():
+    """Check if WebSocket data file exists"""
+    return WS_DATA_FILE.exists()
+
+
+def main(menu: List[MenuItem], title: str, tip: str = ""):
+    """Main menu loop
+
+    The menu is redrawn only after an action ran or the terminal was resized;
+    invalid input just re-prompts.
+    """
+    global _needs_redraw
+    items = {item.key: item for item in menu}
+    max_key = max(items, key=int)
+    menu_str = format_menu(menu, title, tip)
+    prompt = f"请选择操作 [0-{max_key}]: "
+    setup_input(menu)
+
+    while True:
+        if _needs_redraw:
+            sys.stdout.write(menu_str)
+            _needs_redraw = False
+
+        choice = input(prompt).strip()
+
+        if choice == '0':
+            print("\n👋 再见！")
+            sys.exit(0)
+
+        item = items.get(choice)
+        if item is None:
+            print(f"❌ 无效输入，请输入 0 到 {max_key} 之间的数字。")
+        elif item.requires_ws_data and not check_websocket_data_exists():
+            print("⚠️  未找到 WebSocket 数据文件")
+            print("请先选择收集 WebSocket 数据的选项")
+        else:
+            symbols = []
+            if item.needs_symbols:
+                symbols = get_symbols_input()
+            if symbols is not None:
+                run_action(run_item(item, symbols))
+                input("\n按 Enter 键返回主菜单...")
+                _needs_redraw = True
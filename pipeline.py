@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+WebSocket 收集 → Notion 更新 一体化流程
+在同一个进程里先收集数据再更新 Notion，数据直接在内存中传递，
+省去第二个 Python 进程的启动/导入以及 JSON 文件的写入和重新解析
+
+用法:
+    python3 pipeline.py                  # 收集并更新所有币种
+    python3 pipeline.py BTC ETH          # 仅指定币种
+    python3 pipeline.py --persist        # 同时保存 data/websocket_collected_data.json（快速更新/每日总结需要）
+    python3 pipeline.py --sync-new-coins # 收集的同时运行 update.py 同步币安新币种
+"""
+
+import argparse
+import asyncio
+import sys
+
+from collect_websocket_data import check_proxy, collect, collect_token_data, load_all_symbols, save_collected_data
+from update_from_websocket import push
+
+# 全市场流每秒推送一次，新币种的补充收集无需完整的 30 秒
+NEW_COINS_COLLECT_SECONDS = 5
+
+
+async def run_pipeline(symbols=None, persist=False, update_metadata=False, workers=10,
+                       sync_new_coins=False):
+    """收集指定币种（为空则全部）的数据并写入 Notion，返回更新统计
+
+    sync_new_coins: 在收集数据的同时（后台线程）运行 update.py 同步新币种；
+    收集只覆盖启动时映射中已有的币种，新发现的币种在同步结束后再补充收集一次
+    """
+    check_proxy()
+
+    new_symbols = []
+    if sync_new_coins:
+        import update
+        # 先同步读取现有币种列表，update.main 之后再改写映射也不影响本次收集
+        all_symbols = None if symbols else load_all_symbols()
+        data, new_symbols = await asyncio.gather(collect(symbols, all_symbols=all_symbols),
+                                                 asyncio.to_thread(update.main))
+    else:
+        data = await collect(symbols)
+    if not data:
+        print("❌ 未收集到数据")
+        sys.exit(1)
+
+    if new_symbols and not symbols:
+        print(f"\n📡 补充收集 {len(new_symbols)} 个新币种的数据...")
+        extra = await collect_token_data(new_symbols, duration=NEW_COINS_COLLECT_SECONDS)
+        data.update(extra or {})
+
+    if persist:
+        save_collected_data(data)
+    print()
+
+    return push(data, symbols, update_metadata, workers)
+
+
+def main(argv=None):
+    """主函数（argv 默认取 sys.argv[1:]）"""
+    parser = argparse.ArgumentParser(description='收集 WebSocket 数据并直接更新 Notion')
+    parser.add_argument('symbols', nargs='*', help='指定币种（留空则处理所有）')
+    parser.add_argument('--persist', action='store_true', help='同时把收集结果写入 JSON 文件')
+    parser.add_argument('--update-metadata', action='store_true', help='更新 CMC 元数据（logo、网站等）')
+    parser.add_argument('--workers', type=int, default=10, help='并发worker数量')
+    parser.add_argument('--sync-new-coins', action='store_true', help='收集的同时从币安同步新币种（update.py）')
+    args = parser.parse_args(argv)
+
+    asyncio.run(run_pipeline(args.symbols, args.persist, args.update_metadata, args.workers,
+                             args.sync_new_coins))
+
+
+if __name__ == '__main__':
+    main()
@@ -10,7 +10,8 @@
 python3 scripts/daily_market_summary.py
 """
 
-import json
+import heapq
+import orjson
 import sys
 from pathlib import Path
 from datetime import datetime
@@ -19,21 +20,26 @@ from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from typing import List, Dict
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'core'))
+from notion_utils import notion_headers, query_url
+
 # 配置文件路径
 BASE_DIR = Path(__file__).parent.parent
 CONFIG_FILE = BASE_DIR / "config" / "config.json"
 DAILY_MARKET_CONFIG = BASE_DIR / "config" / "daily_market_config.json"
+# extract_symbol_data 只读取这些属性，查询时让 Notion 只返回它们
+QUERY_PROPERTIES = ('Symbol', 'Price change', 'Perp Price')
 
 
 def load_config():
     """加载配置"""
-    with CONFIG_FILE.open('r') as f:
-        config = json.load(f)
+    with CONFIG_FILE.open('rb') as f:
+        config = orjson.loads(f.read())
     
     # 加载每日行情数据库配置
     if DAILY_MARKET_CONFIG.exists():
-        with DAILY_MARKET_CONFIG.open('r') as f:
-            daily_config = json.load(f)
+        with DAILY_MARKET_CONFIG.open('rb') as f:
+            daily_config = orjson.loads(f.read())
             config['daily_market_database_id'] = daily_config.get('database_id')
     else:
         print("⚠️  未找到每日行情数据库配置！")
@@ -47,18 +53,15 @@ def load_config():
     return config
 
 
-def get_all_symbols_from_notion(notion_token: str, database_id: str) -> tuple:
-    """从主数据库读取所有币种数据"""
+def get_all_symbols_from_notion(headers: Dict, database_id: str, edited_since: datetime = None,
+                                properties=QUERY_PROPERTIES) -> tuple:
+    """从主数据库读取所有币种数据
+
+    edited_since: 只读取该时间（含）之后编辑过的页面，由 Notion 服务端过滤
+    properties: 只返回这些属性（None 则返回全部）
+    """
     print("📥 正在读取主数据库...")
     
-    headers = {
-        "Authorization": f"Bearer {notion_token}",
-        "Content-Type": "application/json",
-        "Notion-Version": "2022-06-28"
-    }
-    
-    url = f"https://api.notion.com/v1/databases/{database_id}/query"
-
     # Build a session that does not trust environment proxies and has retries
     session = requests.Session()
     session.headers.update(headers)
@@ -74,13 +77,22 @@ def get_all_symbols_from_notion(notion_token: str, database_id: str) -> tuple:
     session.mount("https://", adapter)
     session.mount("http://", adapter)
 
+    url = query_url(session, database_id, properties, timeout=30)
+
     all_pages = []
     has_more = True
     start_cursor = None
+    # 每页取最大 100 条，减少分页往返
+    base_payload = {"page_size": 100}
+    if edited_since is not None:
+        base_payload["filter"] = {
+            "timestamp": "last_edited_time",
+            "last_edited_time": {"on_or_after": edited_since.isoformat()}
+        }
 
     try:
         while has_more:
-            payload = {}
+            payload = dict(base_payload)
             if start_cursor:
                 payload["start_cursor"] = start_cursor
 
@@ -104,7 +116,7 @@ def get_all_symbols_from_notion(notion_token: str, database_id: str) -> tuple:
                 else:
                     raise
 
-            data = resp.json()
+            data = orjson.loads(resp.content)
             all_pages.extend(data.get('results', []))
             has_more = data.get('has_more', False)
             start_cursor = data.get('next_cursor')
@@ -121,45 +133,28 @@ def get_all_symbols_from_notion(notion_token: str, database_id: str) -> tuple:
 
 
 def extract_symbol_data(pages: List[Dict]) -> List[Dict]:
-    """提取币种数据：Symbol, Price Change%, Current Price"""
+    """提取币种数据：Symbol, Price Change%, Current Price
+
+    直接下标访问（缺失或类型不符时抛 KeyError/IndexError/TypeError），比逐层 .get() 更快
+    """
     symbols_data = []
+    append = symbols_data.append
     
     for page in pages:
         props = page['properties']
-        
-        # 获取 Symbol
-        symbol_prop = props.get('Symbol', {})
-        if symbol_prop.get('type') == 'title':
-            texts = symbol_prop.get('title', [])
-            if not texts:
-                continue
-            symbol = texts[0].get('plain_text', '').strip()
-        else:
-            continue
-        
-        if not symbol:
-            continue
-        
-        # 获取 Price change
-        price_change = None
-        price_change_prop = props.get('Price change', {})
-        if price_change_prop.get('type') == 'number':
-            price_change = price_change_prop.get('number')
-        
-        if price_change is None:
+        try:
+            symbol = props['Symbol']['title'][0]['plain_text'].strip()
+            price_change = props['Price change']['number']
+            # 只扫描有 Perp Price 的币种
+            perp_price = props['Perp Price']['number']
+        except (KeyError, IndexError, TypeError, AttributeError):
             continue
         
-        # 只扫描有 Perp Price 的币种
-        perp_price = None
-        perp_price_prop = props.get('Perp Price', {})
-        if perp_price_prop.get('type') == 'number':
-            perp_price = perp_price_prop.get('number')
-        
-        # 必须有 Perp Price 才计入统计
-        if perp_price is None:
+        # 必须有 Symbol、Price change 和 Perp Price 才计入统计
+        if not symbol or price_change is None or perp_price is None:
             continue
         
-        symbols_data.append({
+        append({
             'symbol': symbol,
             'price_change': price_change,
             'perp_price': perp_price
@@ -170,11 +165,9 @@ def extract_symbol_data(pages: List[Dict]) -> List[Dict]:
 
 def get_top_movers(symbols_data: List[Dict], top_n: int = 5) -> Dict:
     """获取涨跌幅前N名"""
-    # 按涨跌幅排序
-    sorted_data = sorted(symbols_data, key=lambda x: x['price_change'], reverse=True)
-    
-    top_gainers = sorted_data[:top_n]
-    top_losers = sorted_data[-top_n:][::-1]  # 反转，让最大跌幅排在前面
+    # 只取两端的 top_n 个，无需对全部币种排序
+    top_gainers = heapq.nlargest(top_n, symbols_data, key=lambda x: x['price_change'])
+    top_losers = heapq.nsmallest(top_n, symbols_data, key=lambda x: x['price_change'])  # 最大跌幅排在前面
     
     return {
         'gainers': top_gainers,
@@ -182,18 +175,30 @@ def get_top_movers(symbols_data: List[Dict], top_n: int = 5) -> Dict:
     }
 
 
-def create_daily_summary(config, top_gainers, top_losers, header_time: datetime = None):
+def movers_blocks(title: str, items: List[Dict]) -> List[Dict]:
+    """一个榜单的页面内容块：标题 + 每个币种一个列表项"""
+    blocks = [{
+        "object": "block",
+        "type": "heading_3",
+        "heading_3": {"rich_text": [{"type": "text", "text": {"content": title}}]}
+    }]
+    for i, item in enumerate(items, 1):
+        blocks.append({
+            "object": "block",
+            "type": "bulleted_list_item",
+            "bulleted_list_item": {
+                "rich_text": [{
+                    "type": "text",
+                    "text": {"content": f"{i}. {item['symbol']} {item['price_change'] * 100:+.2f}%"}
+                }]
+            }
+        })
+    return blocks
+
+
+def create_daily_summary(headers: Dict, daily_db_id: str, top_gainers, top_losers, header_time: datetime = None):
     """创建每日总结到 Notion（一条记录包含所有信息）"""
     
-    notion_token = config['notion']['api_key']
-    daily_db_id = config.get('daily_market_database_id')
-    
-    headers = {
-        "Authorization": f"Bearer {notion_token}",
-        "Content-Type": "application/json",
-        "Notion-Version": "2022-06-28"
-    }
-    
     # 使用传入的获取数据时间作为表头时间（fallback 到当前时间）
     if header_time is None:
         header_time = datetime.now()
@@ -220,10 +225,10 @@ def create_daily_summary(config, top_gainers, top_losers, header_time: datetime
         losers_text += f"{i}. {symbol} {change:.2f}%\n"
         print(f"  {i}. {symbol:12s} {change:6.2f}%")
     
-    # 合并成一条记录
-    combined_text = gainers_text + losers_text
-    
-    # 创建单条 Notion 页面
+    # 创建单条 Notion 页面：属性里是摘要文本，页面正文是逐币种的列表，
+    # 全部放在同一个请求里（榜单变长也只需一次 POST，单次最多 100 个块）
+    children = (movers_blocks(f"🚀 涨幅榜 Top {len(top_gainers)}", top_gainers)
+                + movers_blocks(f"📉 跌幅榜 Top {len(top_losers)}", top_losers))
     page_data = {
         "parent": {"database_id": daily_db_id},
         "properties": {
@@ -254,7 +259,8 @@ def create_daily_summary(config, top_gainers, top_losers, header_time: datetime
                     }
                 ]
             }
-        }
+        },
+        "children": children
     }
     
     try:
@@ -279,26 +285,20 @@ def main():
     # 加载配置
     config = load_config()
     
-    notion_token = config['notion']['api_key']
-    main_db_id = config['notion']['database_id']
+    notion_cfg = config['notion']
+    main_db_id = notion_cfg['database_id']
     daily_db_id = config.get('daily_market_database_id')
+    headers = notion_headers(notion_cfg['api_key'])
     
     if not daily_db_id:
         print("❌ 未配置每日行情数据库ID！")
         sys.exit(1)
     
-    # 读取主数据库，并获取读取时的时间
-    all_pages, fetch_time = get_all_symbols_from_notion(notion_token, main_db_id)
-
-    # 仅保留在 fetch_time 当天有更新的页面（根据 last_edited_time / created_time）
-    fetch_date_iso = fetch_time.date().isoformat()
-    pages_today = []
-    for p in all_pages:
-        last_ts = p.get('last_edited_time') or p.get('created_time')
-        if last_ts and last_ts.startswith(fetch_date_iso):
-            pages_today.append(p)
+    # 只读取今天（本地时间 0 点起）有更新的页面：过滤交给 Notion 服务端，不再下载整个数据库
+    today_start = datetime.now().astimezone().replace(hour=0, minute=0, second=0, microsecond=0)
+    pages_today, fetch_time = get_all_symbols_from_notion(headers, main_db_id, edited_since=today_start)
 
-    print(f"📥 共读取 {len(all_pages)} 个页面，{fetch_date_iso} 有更新的页面: {len(pages_today)} 个")
+    print(f"📥 {today_start.date().isoformat()} 有更新的页面: {len(pages_today)} 个")
 
     # 提取数据（只从今天有更新的页面）
     symbols_data = extract_symbol_data(pages_today)
@@ -312,7 +312,7 @@ def main():
     top_movers = get_top_movers(symbols_data, top_n=5)
     
     # 创建每日总结，使用 fetch_time 作为表头时间
-    create_daily_summary(config, top_movers['gainers'], top_movers['losers'], header_time=fetch_time)
+    create_daily_summary(headers, daily_db_id, top_movers['gainers'], top_movers['losers'], header_time=fetch_time)
 
 
 if __name__ == '__main__':
@@ -1,27 +1,37 @@
 #!/usr/bin/env python3
 """Check for duplicate pages in Notion database"""
 
-import requests
-import json
+import orjson
+import sys
 from pathlib import Path
-from collections import Counter
+from collections import defaultdict
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'core'))
+from http_utils import make_session
+from notion_utils import notion_headers, query_url
 
 ROOT = Path(__file__).resolve().parents[1]
 NOTION_CONFIG_FILE = ROOT / 'config.json'
 
+# One connection reused across pagination
+_SESSION = make_session(backoff_factor=1, status_forcelist=(429, 502, 503, 504),
+                        allowed_methods=("GET", "POST", "PATCH"), pool_connections=1, pool_maxsize=4)
+
+def page_symbol(page: dict):
+    """Symbol (title property) of a page, or None if it has no title"""
+    title = page.get('properties', {}).get('Symbol', {}).get('title')
+    return title[0]['text']['content'] if title else None
+
 def check_duplicates():
     # Load config
-    with NOTION_CONFIG_FILE.open('r') as f:
-        config = json.load(f)
+    with NOTION_CONFIG_FILE.open('rb') as f:
+        config = orjson.loads(f.read())
     
-    headers = {
-        'Authorization': f'Bearer {config["notion"]["api_key"]}',
-        'Content-Type': 'application/json',
-        'Notion-Version': '2022-06-28'
-    }
+    notion_cfg = config["notion"]
+    headers = notion_headers(notion_cfg["api_key"])
     
-    # Query all pages
-    url = f'https://api.notion.com/v1/databases/{config["notion"]["database_id"]}/query'
+    # Query all pages (only the Symbol property is needed)
+    url = query_url(_SESSION, notion_cfg["database_id"], ['Symbol'], headers)
     
     all_pages = []
     has_more = True
@@ -32,47 +42,39 @@ def check_duplicates():
         if start_cursor:
             payload['start_cursor'] = start_cursor
         
-        response = requests.post(url, headers=headers, json=payload)
+        response = _SESSION.post(url, headers=headers, json=payload)
         response.raise_for_status()
-        result = response.json()
+        result = orjson.loads(response.content)
         
         all_pages.extend(result.get('results', []))
         has_more = result.get('has_more', False)
         start_cursor = result.get('next_cursor')
     
-    # Extract symbols
-    symbols = []
+    # Group pages by symbol in one pass: symbol -> [(page_id, created_time)]
+    groups = defaultdict(list)
     for page in all_pages:
-        title_prop = page.get('properties', {}).get('Symbol', {})
-        if title_prop.get('title'):
-            symbol = title_prop['title'][0]['text']['content']
-            symbols.append(symbol)
+        symbol = page_symbol(page)
+        if symbol:
+            groups[symbol].append((page['id'], page.get('created_time', 'unknown')))
     
     print(f"📊 Total pages in Notion: {len(all_pages)}")
-    print(f"📊 Total symbols extracted: {len(symbols)}")
-    print(f"📊 Unique symbols: {len(set(symbols))}")
+    print(f"📊 Total symbols extracted: {sum(len(pages) for pages in groups.values())}")
+    print(f"📊 Unique symbols: {len(groups)}")
     
     # Find duplicates
-    counts = Counter(symbols)
-    duplicates = {s: c for s, c in counts.items() if c > 1}
+    duplicates = {s: pages for s, pages in groups.items() if len(pages) > 1}
     
     if duplicates:
         print(f"\n⚠️  Found {len(duplicates)} duplicate symbols:")
-        for symbol, count in sorted(duplicates.items()):
-            print(f"  • {symbol}: {count} occurrences")
+        for symbol, pages in sorted(duplicates.items()):
+            print(f"  • {symbol}: {len(pages)} occurrences")
         
-        # Find page IDs for duplicates
+        # Page IDs for duplicates
         print(f"\n🔍 Page IDs for duplicates:")
-        for symbol in sorted(duplicates.keys()):
+        for symbol, pages in sorted(duplicates.items()):
             print(f"\n  {symbol}:")
-            for page in all_pages:
-                title_prop = page.get('properties', {}).get('Symbol', {})
-                if title_prop.get('title'):
-                    page_symbol = title_prop['title'][0]['text']['content']
-                    if page_symbol == symbol:
-                        page_id = page['id']
-                        created = page.get('created_time', 'unknown')
-                        print(f"    - {page_id} (created: {created})")
+            for page_id, created in pages:
+                print(f"    - {page_id} (created: {created})")
     else:
         print("\n✅ No duplicates found")
 
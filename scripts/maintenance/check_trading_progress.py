@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """Check trading data update progress"""
 import sys
+from collections import deque
 from pathlib import Path
 
 log_file = Path(__file__).parent.parent / 'update_trading.log'
@@ -9,13 +10,21 @@ if not log_file.exists():
     print("❌ Log file not found")
     sys.exit(1)
 
-content = log_file.read_text()
-lines = content.strip().split('\n')
+# Count results in a single streaming pass (the log can grow to many MB)
+success = skipped = failed = 0
+last_operations = deque(maxlen=10)
 
-# Count results
-success = sum(1 for line in lines if '✅' in line and ('Spot:' in line or 'Perp:' in line))
-skipped = sum(1 for line in lines if '⚠️  Page not found' in line or '⚠️  No data available' in line)
-failed = sum(1 for line in lines if '❌ Failed:' in line)
+with log_file.open('r', encoding='utf-8') as f:
+    for line in f:
+        line = line.rstrip('\n')
+        if '✅' in line and ('Spot:' in line or 'Perp:' in line):
+            success += 1
+        elif '⚠️  Page not found' in line or '⚠️  No data available' in line:
+            skipped += 1
+        elif '❌ Failed:' in line:
+            failed += 1
+        if line.startswith('['):
+            last_operations.append(line)
 
 print(f"📊 Trading Data Update Progress:")
 print(f"  ✅ Success: {success}")
@@ -25,6 +34,5 @@ print(f"  📈 Total processed: {success + skipped + failed}")
 
 # Show last 10 operations
 print(f"\n📝 Last 10 operations:")
-symbol_lines = [l for l in lines if l.startswith('[')]
-for line in symbol_lines[-10:]:
+for line in last_operations:
     print(f"  {line}")
@@ -3,84 +3,115 @@
 清理Notion数据库中的空页面和重复页面
 """
 
-import requests
-import json
-import time
+import orjson
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from collections import defaultdict
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'core'))
+from http_utils import RateLimiter, make_session
+from notion_utils import notion_headers, query_url
+
 CONFIG_FILE = Path('config.json')
 
+# One connection reused across pagination and page deletes
+_SESSION = make_session(backoff_factor=1, status_forcelist=(429, 502, 503, 504),
+                        allowed_methods=("GET", "POST", "PATCH"), pool_connections=1, pool_maxsize=4)
+
+# Notion 限速约 3 次/秒：分页查询和删除都经过 NOTION_LIMITER；删除最多 3 个并发
+NOTION_REQUESTS_PER_SECOND = 3
+NOTION_WORKERS = 3
+NOTION_LIMITER = RateLimiter(NOTION_REQUESTS_PER_SECOND)
+
 
 def load_config():
     """加载配置文件"""
-    with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    with open(CONFIG_FILE, 'rb') as f:
+        return orjson.loads(f.read())
 
 
-def get_all_pages(api_key: str, database_id: str) -> list:
-    """获取数据库中的所有页面"""
-    headers = {
-        'Authorization': f'Bearer {api_key}',
-        'Content-Type': 'application/json',
-        'Notion-Version': '2022-06-28'
-    }
-    
-    url = f'https://api.notion.com/v1/databases/{database_id}/query'
-    all_pages = []
-    has_more = True
-    start_cursor = None
-    
-    while has_more:
-        payload = {}
-        if start_cursor:
-            payload['start_cursor'] = start_cursor
-        
-        try:
-            response = requests.post(url, headers=headers, json=payload, timeout=15)
-            if response.status_code == 200:
-                data = response.json()
-                all_pages.extend(data.get('results', []))
-                has_more = data.get('has_more', False)
-                start_cursor = data.get('next_cursor')
-                print(f"已获取 {len(all_pages)} 个页面...")
-            else:
-                print(f"❌ 查询失败: {response.status_code}")
+def query_page(url: str, headers: dict, start_cursor: str = None) -> dict:
+    """查询一页结果（受 NOTION_LIMITER 限速）"""
+    payload = {}
+    if start_cursor:
+        payload['start_cursor'] = start_cursor
+    
+    NOTION_LIMITER.wait()
+    response = _SESSION.post(url, headers=headers, json=payload, timeout=15)
+    if response.status_code != 200:
+        raise RuntimeError(f"查询失败: {response.status_code}")
+    return orjson.loads(response.content)
+
+
+def iter_pages(headers: dict, database_id: str):
+    """逐个产出数据库中的页面（边分页边处理，不在内存中保留全部原始页面）
+
+    拿到 next_cursor 后立即在后台线程请求下一页，调用方处理当前页时下一页已在路上
+    """
+    # analyze_pages 只读取 Symbol 和 Name
+    url = query_url(_SESSION, database_id, ['Symbol', 'Name'], headers)
+    fetched = 0
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(query_page, url, headers)
+        while future is not None:
+            try:
+                data = future.result()
+            except Exception as e:
+                print(f"❌ 错误: {e}")
                 break
-        except Exception as e:
-            print(f"❌ 错误: {e}")
-            break
-        
-        time.sleep(0.3)  # 避免请求过快
-    
-    return all_pages
+            
+            future = None
+            if data.get('has_more'):
+                future = executor.submit(query_page, url, headers, data.get('next_cursor'))
+            
+            results = data.get('results', [])
+            fetched += len(results)
+            print(f"已获取 {fetched} 个页面...")
+            yield from results
 
 
-def delete_page(api_key: str, page_id: str) -> bool:
+def delete_page(headers: dict, page_id: str) -> bool:
     """删除（归档）一个页面"""
-    headers = {
-        'Authorization': f'Bearer {api_key}',
-        'Content-Type': 'application/json',
-        'Notion-Version': '2022-06-28'
-    }
-    
     url = f'https://api.notion.com/v1/pages/{page_id}'
     payload = {'archived': True}
     
     try:
-        response = requests.patch(url, headers=headers, json=payload, timeout=10)
+        response = _SESSION.patch(url, headers=headers, json=payload, timeout=10)
         return response.status_code == 200
     except Exception as e:
         print(f"  ❌ 删除失败: {e}")
         return False
 
 
-def analyze_pages(pages: list) -> dict:
-    """分析页面，找出空页面和重复页面"""
+def delete_pages(headers: dict, pages: list) -> list:
+    """并发归档多个页面（受 NOTION_LIMITER 限速），按输入顺序返回每个页面是否成功"""
+    def paced_delete(page):
+        NOTION_LIMITER.wait()
+        return delete_page(headers, page['id'])
+    
+    with ThreadPoolExecutor(max_workers=NOTION_WORKERS) as executor:
+        return list(executor.map(paced_delete, pages))
+
+
+def page_name(props: dict) -> str:
+    """Name（rich_text 类型）属性的第一段纯文本（为空则返回空字符串）"""
+    rich_text = props.get('Name', {}).get('rich_text', [])
+    return rich_text[0]['plain_text'] if rich_text else ''
+
+
+def analyze_pages(pages) -> dict:
+    """分析页面，找出空页面和重复页面
+
+    pages 可以是 iter_pages 的生成器：每个页面只保留精简后的 page_info
+    """
     empty_pages = []
     symbol_pages = defaultdict(list)
+    total = 0
     
     for page in pages:
+        total += 1
         page_id = page['id']
         props = page.get('properties', {})
         
@@ -88,28 +119,23 @@ def analyze_pages(pages: list) -> dict:
         symbol_prop = props.get('Symbol', {}).get('title', [])  # ✅ 修复：改为title
         symbol = symbol_prop[0]['plain_text'] if symbol_prop else ''  # ✅ 修复：使用plain_text
         
-        # 获取Name（Name也是rich_text类型）
-        name_prop = props.get('Name', {}).get('rich_text', [])  # ✅ 修复：Name是rich_text
-        name = name_prop[0]['plain_text'] if name_prop else ''  # ✅ 修复：使用plain_text
-        
-        created_time = page.get('created_time', '')
-        last_edited = page.get('last_edited_time', '')
-        
         page_info = {
             'id': page_id,
             'symbol': symbol,
-            'name': name,
-            'created_time': created_time,
-            'last_edited': last_edited
+            'created_time': page.get('created_time', ''),
+            'last_edited': page.get('last_edited_time', '')
         }
         
-        # 如果Symbol和Name都为空，标记为空页面
-        if not symbol and not name:
-            empty_pages.append(page_info)
-        elif symbol:
+        if symbol:
+            # Name 只在显示重复页面时才读取；查询只返回 Symbol/Name，props 本身很小
+            page_info['props'] = props
             symbol_pages[symbol].append(page_info)
+        elif not page_name(props):
+            # Symbol和Name都为空，标记为空页面
+            empty_pages.append(page_info)
     
     return {
+        'total': total,
         'empty_pages': empty_pages,
         'symbol_pages': symbol_pages
     }
@@ -118,15 +144,13 @@ def analyze_pages(pages: list) -> dict:
 def main():
     """主函数"""
     config = load_config()
-    api_key = config['notion']['api_key']
-    database_id = config['notion']['database_id']
-    
-    print("🔍 获取所有页面...")
-    pages = get_all_pages(api_key, database_id)
-    print(f"✅ 共获取 {len(pages)} 个页面\n")
+    notion_cfg = config['notion']
+    database_id = notion_cfg['database_id']
+    headers = notion_headers(notion_cfg['api_key'])
     
-    print("📊 分析页面...")
-    analysis = analyze_pages(pages)
+    print("🔍 获取并分析所有页面...")
+    analysis = analyze_pages(iter_pages(headers, database_id))
+    print(f"✅ 共获取 {analysis['total']} 个页面\n")
     
     empty_pages = analysis['empty_pages']
     symbol_pages = analysis['symbol_pages']
@@ -154,7 +178,7 @@ def main():
             print(f"\n  {i}. {symbol} - {len(pages_list)} 个页面:")
             for j, page in enumerate(pages_list, 1):
                 print(f"     {j}) ID: {page['id']}")
-                print(f"        Name: {page['name'] or '(空)'}")
+                print(f"        Name: {page_name(page['props']) or '(空)'}")
                 print(f"        创建: {page['created_time']}")
                 print(f"        编辑: {page['last_edited']}")
     
@@ -165,13 +189,12 @@ def main():
         if confirm == 'yes':
             print(f"\n🗑️  开始删除空页面...")
             deleted = 0
-            for page in empty_pages:
-                if delete_page(api_key, page['id']):
+            for page, ok in zip(empty_pages, delete_pages(headers, empty_pages)):
+                if ok:
                     deleted += 1
                     print(f"  ✅ 已删除: {page['id']}")
                 else:
                     print(f"  ❌ 删除失败: {page['id']}")
-                time.sleep(0.3)
             print(f"\n✅ 成功删除 {deleted}/{len(empty_pages)} 个空页面")
         else:
             print("取消删除空页面")
@@ -181,23 +204,25 @@ def main():
         confirm = input(f"\n是否清理重复的Symbol（保留最新编辑的，删除旧的）? (yes/no): ").strip().lower()
         if confirm == 'yes':
             print(f"\n🗑️  开始清理重复页面...")
-            deleted = 0
+            to_delete = []
             for symbol, pages_list in duplicates.items():
                 # 按最后编辑时间排序，保留最新的
                 sorted_pages = sorted(pages_list, key=lambda x: x['last_edited'], reverse=True)
                 keep_page = sorted_pages[0]
-                delete_pages = sorted_pages[1:]
+                to_delete.extend(sorted_pages[1:])
                 
                 print(f"\n  {symbol}:")
                 print(f"    保留: {keep_page['id']} (最后编辑: {keep_page['last_edited']})")
-                
-                for page in delete_pages:
-                    if delete_page(api_key, page['id']):
-                        deleted += 1
-                        print(f"    ✅ 已删除: {page['id']} (编辑: {page['last_edited']})")
-                    else:
-                        print(f"    ❌ 删除失败: {page['id']}")
-                    time.sleep(0.3)
+            
+            # 所有旧页面一起提交删除
+            print()
+            deleted = 0
+            for page, ok in zip(to_delete, delete_pages(headers, to_delete)):
+                if ok:
+                    deleted += 1
+                    print(f"    ✅ 已删除: {page['symbol']} {page['id']} (编辑: {page['last_edited']})")
+                else:
+                    print(f"    ❌ 删除失败: {page['symbol']} {page['id']}")
             
             print(f"\n✅ 成功删除 {deleted} 个重复页面")
         else:
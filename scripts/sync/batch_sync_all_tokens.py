@@ -8,10 +8,13 @@ Usage:
     python3 scripts/batch_sync_all_tokens.py --batch-size 10 --start-from 0
 """
 
-import requests
+import ijson
+import orjson
+import logging
 import time
 import argparse
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import List, Set
 
@@ -20,31 +23,127 @@ sys.path.append(str(Path(__file__).resolve().parent))
 from binance_to_notion import NotionConfig, NotionClient, sync_token_to_notion
 from enhanced_data_fetcher import fetch_enhanced_data
 
-def get_all_binance_usdt_pairs() -> dict:
-    """Get all USDT trading pairs from Binance spot and futures markets."""
-    print("🔍 Fetching all Binance USDT trading pairs...")
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'core'))
+from http_utils import RateLimiter, make_session
+
+# Binance exchangeInfo requests (spot + perp share one pool)
+_SESSION = make_session(pool_connections=4, pool_maxsize=32)
+
+logger = logging.getLogger(__name__)
+
+# Symbols fetched in parallel within a batch
+FETCH_WORKERS = 5
+
+# Categorized Binance pairs are reused for an hour (listings rarely change)
+PAIRS_CACHE_FILE = Path(__file__).resolve().parents[1] / '.cache' / 'binance_usdt_pairs.json'
+PAIRS_CACHE_TTL = 3600  # seconds
+
+# Notion allows ~3 requests/s; each sync is a query + a create/update
+NOTION_REQUESTS_PER_SECOND = 3
+NOTION_REQUESTS_PER_SYNC = 2
+NOTION_WORKERS = 3
+
+# Shared across batches so pacing carries over between them
+NOTION_LIMITER = RateLimiter(NOTION_REQUESTS_PER_SECOND / NOTION_REQUESTS_PER_SYNC)
+
+def _paced_sync(client: NotionClient, token_data) -> dict:
+    NOTION_LIMITER.wait()
+    return sync_token_to_notion(client, token_data)
+
+def sync_token_data(client: NotionClient, token_data_list) -> dict:
+    """Sync fetched TokenData to Notion, NOTION_WORKERS requests in flight paced by NOTION_LIMITER
     
-    # Get spot pairs
-    spot_url = 'https://api.binance.com/api/v3/exchangeInfo'
-    spot_response = requests.get(spot_url, timeout=10)
-    spot_data = spot_response.json()
+    Shared by sync_batch and batch_sync_basic.sync_batch_basic. Returns the
+    batch summary {"success", "failed", "errors"}; failures are printed
+    (sync_token_to_notion already reports each success).
+    """
+    success_count = 0
+    failed_count = 0
+    errors = []
     
-    spot_symbols = set()
-    for symbol_info in spot_data['symbols']:
-        if symbol_info['symbol'].endswith('USDT') and symbol_info['status'] == 'TRADING':
-            base = symbol_info['baseAsset']
-            spot_symbols.add(base)
+    with ThreadPoolExecutor(max_workers=NOTION_WORKERS) as executor:
+        futures = {executor.submit(_paced_sync, client, token_data): token_data
+                   for token_data in token_data_list}
+        
+        for future in as_completed(futures):
+            token_data = futures[future]
+            try:
+                result = future.result()
+                
+                if result["success"]:
+                    success_count += 1
+                    logger.debug("  ✅ %s: %s", token_data.base, result['details'].get('action', 'synced'))
+                else:
+                    failed_count += 1
+                    error_msg = result.get('error', 'Unknown error')
+                    errors.append(f"{token_data.base}: {error_msg}")
+                    print(f"  ❌ {token_data.base}: {error_msg}")
+                
+            except Exception as e:
+                failed_count += 1
+                error_msg = str(e)
+                errors.append(f"{token_data.base}: {error_msg}")
+                print(f"  ❌ {token_data.base}: {error_msg}")
     
-    # Get futures pairs
-    perp_url = 'https://fapi.binance.com/fapi/v1/exchangeInfo'
-    perp_response = requests.get(perp_url, timeout=10)
-    perp_data = perp_response.json()
+    return {
+        "success": success_count,
+        "failed": failed_count,
+        "errors": errors
+    }
+
+def load_cached_pairs(ttl: float = PAIRS_CACHE_TTL):
+    """Cached categorization if younger than ttl, else None"""
+    try:
+        if time.time() - PAIRS_CACHE_FILE.stat().st_mtime >= ttl:
+            return None
+        with open(PAIRS_CACHE_FILE, 'rb') as f:
+            return {category: set(symbols) for category, symbols in orjson.loads(f.read()).items()}
+    except (OSError, ValueError):
+        return None
+
+def save_cached_pairs(pairs: dict):
+    try:
+        PAIRS_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(PAIRS_CACHE_FILE, 'wb') as f:
+            f.write(orjson.dumps({category: list(symbols) for category, symbols in pairs.items()}))
+    except OSError as e:
+        print(f"⚠️ Could not write pairs cache: {e}")
+
+def _trading_usdt_base_assets(url: str) -> Set[str]:
+    """Base assets of TRADING USDT pairs, streamed from an exchangeInfo response
     
-    perp_symbols = set()
-    for symbol_info in perp_data['symbols']:
-        if symbol_info['symbol'].endswith('USDT') and symbol_info['status'] == 'TRADING':
-            base = symbol_info['baseAsset']
-            perp_symbols.add(base)
+    Symbol entries are parsed one at a time with ijson, so the full payload
+    (filters, order types, ...) is never materialized.
+    """
+    with _SESSION.get(url, timeout=10, stream=True) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        return {s['baseAsset'] for s in ijson.items(response.raw, 'symbols.item')
+                if s['symbol'].endswith('USDT') and s['status'] == 'TRADING'}
+
+def get_all_binance_usdt_pairs(refresh: bool = False) -> dict:
+    """Get all USDT trading pairs from Binance spot and futures markets.
+    
+    Returns unsorted sets; callers sort the list they actually sync.
+    The categorized result is cached on disk for PAIRS_CACHE_TTL seconds;
+    refresh=True forces a new download.
+    """
+    if not refresh:
+        cached = load_cached_pairs()
+        if cached is not None:
+            print("📋 Using cached Binance USDT pairs "
+                  f"({len(cached['both_markets'])} both / {len(cached['spot_only'])} spot / "
+                  f"{len(cached['perp_only'])} futures)")
+            return cached
+    
+    print("🔍 Fetching all Binance USDT trading pairs...")
+    
+    # Spot and futures live on different hosts: download both at once
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        spot_future = executor.submit(_trading_usdt_base_assets, 'https://api.binance.com/api/v3/exchangeInfo')
+        perp_future = executor.submit(_trading_usdt_base_assets, 'https://fapi.binance.com/fapi/v1/exchangeInfo')
+        spot_symbols = spot_future.result()
+        perp_symbols = perp_future.result()
     
     # Categorize symbols
     both_markets = spot_symbols & perp_symbols
@@ -57,11 +156,13 @@ def get_all_binance_usdt_pairs() -> dict:
     print(f"📊 Spot only: {len(spot_only)}")
     print(f"📈 Futures only: {len(perp_only)}")
     
-    return {
-        'both_markets': sorted(list(both_markets)),
-        'spot_only': sorted(list(spot_only)),
-        'perp_only': sorted(list(perp_only))
+    pairs = {
+        'both_markets': both_markets,
+        'spot_only': spot_only,
+        'perp_only': perp_only
     }
+    save_cached_pairs(pairs)
+    return pairs
 
 def get_priority_symbols() -> List[str]:
     """Get high-priority symbols to sync first (major cryptocurrencies)."""
@@ -77,10 +178,12 @@ def sync_batch(symbols: List[str], client: NotionClient, batch_num: int) -> dict
     print(f"\n📦 Processing Batch {batch_num}: {len(symbols)} symbols")
     print(f"Symbols: {', '.join(symbols)}")
     
-    # Fetch data for the batch
+    # Fetch data for the batch: one symbol per worker, results kept in input order
     print("📊 Fetching data...")
     try:
-        token_data_list = fetch_enhanced_data(symbols)
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+            per_symbol = executor.map(lambda symbol: fetch_enhanced_data([symbol]), symbols)
+            token_data_list = [token_data for batch in per_symbol for token_data in batch]
     except Exception as e:
         print(f"❌ Error fetching data for batch {batch_num}: {e}")
         return {"success": 0, "failed": len(symbols), "errors": [str(e)]}
@@ -89,41 +192,9 @@ def sync_batch(symbols: List[str], client: NotionClient, batch_num: int) -> dict
         print(f"❌ No data fetched for batch {batch_num}")
         return {"success": 0, "failed": len(symbols), "errors": ["No data fetched"]}
     
-    # Sync each token
+    # Sync tokens with a few requests in flight, paced by NOTION_LIMITER
     print("📤 Syncing to Notion...")
-    results = []
-    success_count = 0
-    failed_count = 0
-    errors = []
-    
-    for token_data in token_data_list:
-        try:
-            result = sync_token_to_notion(client, token_data)
-            results.append(result)
-            
-            if result["success"]:
-                success_count += 1
-                print(f"  ✅ {token_data.base}: {result['details'].get('action', 'synced')}")
-            else:
-                failed_count += 1
-                error_msg = result.get('error', 'Unknown error')
-                errors.append(f"{token_data.base}: {error_msg}")
-                print(f"  ❌ {token_data.base}: {error_msg}")
-            
-            # Rate limiting - Notion allows 3 requests per second
-            time.sleep(0.4)
-            
-        except Exception as e:
-            failed_count += 1
-            error_msg = str(e)
-            errors.append(f"{token_data.base}: {error_msg}")
-            print(f"  ❌ {token_data.base}: {error_msg}")
-    
-    return {
-        "success": success_count,
-        "failed": failed_count,
-        "errors": errors
-    }
+    return sync_token_data(client, token_data_list)
 
 def main():
     parser = argparse.ArgumentParser(description="Batch sync all Binance tokens to Notion")
@@ -140,6 +211,8 @@ def main():
                        help="Only sync priority symbols (major cryptocurrencies)")
     parser.add_argument("--category", choices=['both', 'spot', 'perp', 'all'], default='both',
                        help="Which category of symbols to sync")
+    parser.add_argument("--refresh", action="store_true",
+                       help="Ignore the cached Binance pair list and download it again")
     
     args = parser.parse_args()
     
@@ -157,7 +230,7 @@ def main():
         return
     
     # Get all symbols
-    all_pairs = get_all_binance_usdt_pairs()
+    all_pairs = get_all_binance_usdt_pairs(refresh=args.refresh)
     
     if args.priority_only:
         print("\n🎯 Using priority symbols only...")
@@ -166,22 +239,24 @@ def main():
         if args.category == 'both':
             available_symbols = [s for s in priority_symbols if s in all_pairs['both_markets']]
         elif args.category == 'spot':
-            available_symbols = [s for s in priority_symbols if s in all_pairs['spot_only'] + all_pairs['both_markets']]
+            available_symbols = [s for s in priority_symbols if s in all_pairs['spot_only'] | all_pairs['both_markets']]
         elif args.category == 'perp':
-            available_symbols = [s for s in priority_symbols if s in all_pairs['perp_only'] + all_pairs['both_markets']]
+            available_symbols = [s for s in priority_symbols if s in all_pairs['perp_only'] | all_pairs['both_markets']]
         else:  # all
-            all_available = set(all_pairs['both_markets'] + all_pairs['spot_only'] + all_pairs['perp_only'])
+            all_available = all_pairs['both_markets'] | all_pairs['spot_only'] | all_pairs['perp_only']
             available_symbols = [s for s in priority_symbols if s in all_available]
         symbols_to_sync = available_symbols
     else:
         if args.category == 'both':
-            symbols_to_sync = all_pairs['both_markets']
+            selected = all_pairs['both_markets']
         elif args.category == 'spot':
-            symbols_to_sync = all_pairs['spot_only'] + all_pairs['both_markets']
+            selected = all_pairs['spot_only'] | all_pairs['both_markets']
         elif args.category == 'perp':
-            symbols_to_sync = all_pairs['perp_only'] + all_pairs['both_markets']
+            selected = all_pairs['perp_only'] | all_pairs['both_markets']
         else:  # all
-            symbols_to_sync = all_pairs['both_markets'] + all_pairs['spot_only'] + all_pairs['perp_only']
+            selected = all_pairs['both_markets'] | all_pairs['spot_only'] | all_pairs['perp_only']
+        # One sort of the final list keeps --start-from resumable
+        symbols_to_sync = sorted(selected)
     
     print(f"\n🚀 Starting batch sync...")
     print(f"📊 Total symbols to sync: {len(symbols_to_sync)}")
@@ -210,11 +285,8 @@ def main():
             all_errors.extend(batch_result["errors"])
             
             print(f"\n📊 Batch {batch_num} Summary: ✅ {batch_result['success']} success, ❌ {batch_result['failed']} failed")
-            
-            # Longer pause between batches to avoid CoinGecko rate limiting (30 calls/min)
-            if i + args.batch_size < len(symbols_to_sync) and batch_num < max_batches:
-                print("⏱️ Waiting 30 seconds before next batch (CoinGecko rate limit)...")
-                time.sleep(30)
+            # No fixed pause between batches: CoinGecko calls are paced by the
+            # fetcher's shared token bucket, Notion writes by NOTION_LIMITER
             
         except Exception as e:
             print(f"💥 Batch {batch_num} failed completely: {e}")
@@ -241,4 +313,5 @@ def main():
     print(f"\n🕒 Sync completed at {time.strftime('%Y-%m-%d %H:%M:%S')}")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format='%(message)s')
     main()
\ No newline at end of file
@@ -6,71 +6,106 @@ without CoinGecko supply/logo data to avoid rate limiting issues.
 """
 
 import argparse
+import asyncio
 import sys
 import time
 from pathlib import Path
 
 # Import our sync functions
 sys.path.append(str(Path(__file__).resolve().parent))
-from batch_sync_all_tokens import get_all_binance_usdt_pairs, get_priority_symbols
-from binance_to_notion import NotionConfig, NotionClient, sync_token_to_notion
+from batch_sync_all_tokens import get_all_binance_usdt_pairs, get_priority_symbols, sync_token_data
+from binance_to_notion import NotionConfig, NotionClient
 from enhanced_data_fetcher import TokenData, fetch_spot_data, fetch_perp_data
 
-def fetch_basic_data(symbols: list) -> list:
-    """Fetch basic trading data without CoinGecko data."""
-    results = []
-    
-    for symbol in symbols:
-        print(f"\n=== Fetching basic data for {symbol} ===")
-        token_data = TokenData(base=symbol)
-        
-        # Fetch spot data
-        spot_data = fetch_spot_data(symbol)
-        if spot_data:
-            token_data.spot_price = spot_data.get("spot_price")
-            token_data.spot_volume_24h = spot_data.get("spot_volume_24h")
-            if token_data.spot_price and token_data.spot_volume_24h:
-                print(f"Spot: ${token_data.spot_price:.6f}, Vol: ${token_data.spot_volume_24h:,.0f}")
-        
-        # Fetch perp data
-        perp_data = fetch_perp_data(symbol)
-        if perp_data:
-            token_data.perp_price = perp_data.get("perp_price")
-            token_data.perp_volume_24h = perp_data.get("perp_volume_24h")
-            token_data.open_interest = perp_data.get("open_interest")
-            token_data.funding_rate = perp_data.get("funding_rate")
-            token_data.index_price = perp_data.get("index_price")
-            token_data.mark_price = perp_data.get("mark_price")
-            token_data.basis = perp_data.get("basis")
-            token_data.index_composition = perp_data.get("index_composition")
-            token_data.index_composition_summary = perp_data.get("index_composition_summary")
-            
-            # Convert open interest to USD
-            try:
-                if token_data.open_interest and token_data.perp_price:
-                    token_data.open_interest_usd = float(token_data.open_interest) * float(token_data.perp_price)
-            except Exception:
-                token_data.open_interest_usd = None
-            
-            if token_data.perp_price and token_data.perp_volume_24h:
-                print(f"Perp: ${token_data.perp_price:.6f}, Vol: ${token_data.perp_volume_24h:,.0f}")
-            if token_data.open_interest_usd:
-                print(f"OI (USD): ${token_data.open_interest_usd:,.0f}")
-            if token_data.funding_rate is not None:
-                print(f"Funding Rate: {token_data.funding_rate:.6f} ({token_data.funding_rate*100:.4f}%)")
-            if token_data.basis is not None:
-                print(f"Basis: {token_data.basis:.6f} ({token_data.basis*100:.4f}%)")
-            if token_data.index_composition_summary:
-                print(f"Index Composition: {token_data.index_composition_summary}")
-        
-        results.append(token_data)
+# Symbols fetched at once (each runs its spot and perp requests in parallel)
+MAX_CONCURRENT_SYMBOLS = 5
+
+def build_basic_token_data(symbol: str, spot_data: dict, perp_data: dict, verbose: bool = False) -> TokenData:
+    """Combine spot and perp results into a TokenData and print a summary.
+    
+    verbose prints one line per field; otherwise a single line per symbol.
+    """
+    token_data = TokenData(base=symbol)
+    
+    if spot_data:
+        token_data.spot_price = spot_data.get("spot_price")
+        token_data.spot_volume_24h = spot_data.get("spot_volume_24h")
+    
+    if perp_data:
+        token_data.perp_price = perp_data.get("perp_price")
+        token_data.perp_volume_24h = perp_data.get("perp_volume_24h")
+        token_data.open_interest = perp_data.get("open_interest")
+        token_data.funding_rate = perp_data.get("funding_rate")
+        token_data.index_price = perp_data.get("index_price")
+        token_data.mark_price = perp_data.get("mark_price")
+        token_data.basis = perp_data.get("basis")
+        token_data.index_composition = perp_data.get("index_composition")
+        token_data.index_composition_summary = perp_data.get("index_composition_summary")
         
-        # Rate limiting for Binance APIs
-        time.sleep(0.5)
+        # Convert open interest to USD
+        try:
+            if token_data.open_interest and token_data.perp_price:
+                token_data.open_interest_usd = float(token_data.open_interest) * float(token_data.perp_price)
+        except Exception:
+            token_data.open_interest_usd = None
     
-    return results
+    if verbose:
+        print_token_details(token_data)
+    else:
+        parts = []
+        if token_data.spot_price:
+            parts.append(f"spot={token_data.spot_price:.6g}")
+        if token_data.perp_price:
+            parts.append(f"perp={token_data.perp_price:.6g}")
+        if token_data.open_interest_usd:
+            parts.append(f"oi=${token_data.open_interest_usd:,.0f}")
+        if token_data.funding_rate is not None:
+            parts.append(f"fr={token_data.funding_rate*100:.4f}%")
+        print(f"  {symbol}: {' '.join(parts) or 'no data'}")
+    
+    return token_data
+
+def print_token_details(token_data: TokenData):
+    """Per-field output (--verbose)."""
+    print(f"\n=== Fetching basic data for {token_data.base} ===")
+    if token_data.spot_price and token_data.spot_volume_24h:
+        print(f"Spot: ${token_data.spot_price:.6f}, Vol: ${token_data.spot_volume_24h:,.0f}")
+    if token_data.perp_price and token_data.perp_volume_24h:
+        print(f"Perp: ${token_data.perp_price:.6f}, Vol: ${token_data.perp_volume_24h:,.0f}")
+    if token_data.open_interest_usd:
+        print(f"OI (USD): ${token_data.open_interest_usd:,.0f}")
+    if token_data.funding_rate is not None:
+        print(f"Funding Rate: {token_data.funding_rate:.6f} ({token_data.funding_rate*100:.4f}%)")
+    if token_data.basis is not None:
+        print(f"Basis: {token_data.basis:.6f} ({token_data.basis*100:.4f}%)")
+    if token_data.index_composition_summary:
+        print(f"Index Composition: {token_data.index_composition_summary}")
 
-def sync_batch_basic(symbols: list, client: NotionClient, batch_num: int) -> dict:
+async def fetch_basic_data_async(symbols: list, max_concurrent: int = MAX_CONCURRENT_SYMBOLS,
+                                 verbose: bool = False) -> list:
+    """Fetch spot + perp data for all symbols concurrently, results in input order.
+    
+    The semaphore bounds how many symbols hit Binance at once (request weight);
+    within a symbol the spot and perp requests run side by side.
+    """
+    semaphore = asyncio.Semaphore(max_concurrent)
+    
+    async def fetch_one(symbol):
+        async with semaphore:
+            return await asyncio.gather(
+                asyncio.to_thread(fetch_spot_data, symbol),
+                asyncio.to_thread(fetch_perp_data, symbol),
+            )
+    
+    fetched = await asyncio.gather(*(fetch_one(symbol) for symbol in symbols))
+    return [build_basic_token_data(symbol, spot_data, perp_data, verbose)
+            for symbol, (spot_data, perp_data) in zip(symbols, fetched)]
+
+def fetch_basic_data(symbols: list, verbose: bool = False) -> list:
+    """Fetch basic trading data without CoinGecko data."""
+    return asyncio.run(fetch_basic_data_async(symbols, verbose=verbose))
+
+def sync_batch_basic(symbols: list, client: NotionClient, batch_num: int, verbose: bool = False) -> dict:
     """Sync a batch of symbols to Notion with basic data only."""
     print(f"\n📦 Processing Batch {batch_num}: {len(symbols)} symbols")
     print(f"Symbols: {', '.join(symbols)}")
@@ -78,7 +113,7 @@ def sync_batch_basic(symbols: list, client: NotionClient, batch_num: int) -> dic
     # Fetch basic data for the batch
     print("📊 Fetching basic trading data...")
     try:
-        token_data_list = fetch_basic_data(symbols)
+        token_data_list = fetch_basic_data(symbols, verbose)
     except Exception as e:
         print(f"❌ Error fetching data for batch {batch_num}: {e}")
         return {"success": 0, "failed": len(symbols), "errors": [str(e)]}
@@ -87,39 +122,9 @@ def sync_batch_basic(symbols: list, client: NotionClient, batch_num: int) -> dic
         print(f"❌ No data fetched for batch {batch_num}")
         return {"success": 0, "failed": len(symbols), "errors": ["No data fetched"]}
     
-    # Sync each token
+    # Sync tokens with a few requests in flight, paced by NOTION_LIMITER
     print("📤 Syncing to Notion...")
-    success_count = 0
-    failed_count = 0
-    errors = []
-    
-    for token_data in token_data_list:
-        try:
-            result = sync_token_to_notion(client, token_data)
-            
-            if result["success"]:
-                success_count += 1
-                print(f"  ✅ {token_data.base}: {result['details'].get('action', 'synced')}")
-            else:
-                failed_count += 1
-                error_msg = result.get('error', 'Unknown error')
-                errors.append(f"{token_data.base}: {error_msg}")
-                print(f"  ❌ {token_data.base}: {error_msg}")
-            
-            # Rate limiting - Notion allows 3 requests per second
-            time.sleep(0.4)
-            
-        except Exception as e:
-            failed_count += 1
-            error_msg = str(e)
-            errors.append(f"{token_data.base}: {error_msg}")
-            print(f"  ❌ {token_data.base}: {error_msg}")
-    
-    return {
-        "success": success_count,
-        "failed": failed_count,
-        "errors": errors
-    }
+    return sync_token_data(client, token_data_list)
 
 def main():
     parser = argparse.ArgumentParser(description="Batch sync Binance tokens to Notion (basic data only)")
@@ -134,6 +139,8 @@ def main():
                        help="Maximum number of batches to process")
     parser.add_argument("--priority-only", "-p", action="store_true",
                        help="Only sync priority symbols")
+    parser.add_argument("--verbose", "-v", action="store_true",
+                       help="Print every fetched field (default: one line per symbol)")
     
     args = parser.parse_args()
     
@@ -158,7 +165,7 @@ def main():
         symbols_to_sync = [s for s in priority_symbols if s in all_pairs['both_markets']]
     else:
         all_pairs = get_all_binance_usdt_pairs()
-        symbols_to_sync = all_pairs['both_markets']
+        symbols_to_sync = sorted(all_pairs['both_markets'])
     
     print(f"\n🚀 Starting basic data sync...")
     print(f"📊 Total symbols to sync: {len(symbols_to_sync)}")
@@ -182,17 +189,14 @@ def main():
         batch_symbols = symbols_to_sync[i:i + args.batch_size]
         
         try:
-            batch_result = sync_batch_basic(batch_symbols, client, batch_num)
+            batch_result = sync_batch_basic(batch_symbols, client, batch_num, args.verbose)
             total_success += batch_result["success"]
             total_failed += batch_result["failed"]
             all_errors.extend(batch_result["errors"])
             
             print(f"\n📊 Batch {batch_num} Summary: ✅ {batch_result['success']} success, ❌ {batch_result['failed']} failed")
-            
-            # Short pause between batches
-            if i + args.batch_size < len(symbols_to_sync) and batch_num < max_batches:
-                print("⏱️ Waiting 5 seconds before next batch...")
-                time.sleep(5)
+            # No fixed pause between batches: Binance calls are paced by the
+            # fetcher's token bucket, Notion writes by NOTION_LIMITER
             
         except Exception as e:
             print(f"💥 Batch {batch_num} failed completely: {e}")
@@ -20,12 +20,18 @@ from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 import os
 import json
+import orjson
 import sys
+import tempfile
 import time
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'core'))
+from http_utils import make_session
 
 # Binance API request helper with rate limiting protection
 def safe_binance_request(url, params=None, timeout=10, max_retries=3):
@@ -73,6 +79,31 @@ CMC_MAPPING_FILE = ROOT / 'config' / 'binance_cmc_mapping.json'
 PERP_ONLY_CACHE_FILE = ROOT / 'data' / 'perp_only_cache.json'
 API_CONFIG_FILE = ROOT / 'config' / 'api_config.json'
 BLACKLIST_FILE = ROOT / 'config' / 'blacklist.json'
+CMC_INFO_CACHE_DIR = ROOT / 'data' / 'cmc_info_cache'
+CMC_INFO_CACHE_TTL = 7 * 86400  # CMC info (logo, website, description) rarely changes
+
+
+def load_cached_cmc_info(cmc_id, ttl: float = CMC_INFO_CACHE_TTL) -> Optional[Dict]:
+    """Return the cached /cryptocurrency/info payload for cmc_id if younger than ttl"""
+    cache_file = CMC_INFO_CACHE_DIR / f'{cmc_id}.json'
+    try:
+        if time.time() - cache_file.stat().st_mtime >= ttl:
+            return None
+        return orjson.loads(cache_file.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+
+
+def save_cached_cmc_info(cmc_id, info: Dict) -> None:
+    """Atomically store a /cryptocurrency/info payload (write to a temp file, then rename)"""
+    try:
+        CMC_INFO_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=CMC_INFO_CACHE_DIR, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(orjson.dumps(info))
+        os.replace(tmp_path, CMC_INFO_CACHE_DIR / f'{cmc_id}.json')
+    except OSError as e:
+        print(f"  ⚠️  Failed to cache CMC info for {cmc_id}: {e}")
 
 
 class CMCClient:
@@ -85,6 +116,9 @@ class CMCClient:
             'X-CMC_PRO_API_KEY': api_key,
             'Accept': 'application/json'
         }
+        # Reuse one connection to pro-api.coinmarketcap.com; 429/5xx are retried with backoff
+        self.session = make_session(allowed_methods=("GET",), pool_connections=20, pool_maxsize=20)
+        self.session.headers.update(self.headers)
     
     def get_token_data(self, cmc_id: int) -> Optional[Dict]:
         """Get both metadata and quote for a single token"""
@@ -92,23 +126,28 @@ class CMCClient:
             return None
         
         try:
-            # Get metadata (logo, website, genesis date, etc.)
-            metadata_url = f"{self.base_url}/cryptocurrency/info"
-            metadata_params = {'id': str(cmc_id)}
-            metadata_response = requests.get(metadata_url, headers=self.headers, params=metadata_params, timeout=30)
-            metadata_response.raise_for_status()
-            metadata_result = metadata_response.json()
+            # Get metadata (logo, website, genesis date, etc.) - served from the disk cache when fresh
+            metadata = load_cached_cmc_info(cmc_id)
+            if metadata is None:
+                metadata_url = f"{self.base_url}/cryptocurrency/info"
+                metadata_params = {'id': str(cmc_id)}
+                metadata_response = self.session.get(metadata_url, params=metadata_params, timeout=30)
+                metadata_response.raise_for_status()
+                metadata_result = metadata_response.json()
+                if metadata_result.get('status', {}).get('error_code') != 0:
+                    return None
+                metadata = metadata_result.get('data', {}).get(str(cmc_id), {})
+                if metadata:
+                    save_cached_cmc_info(cmc_id, metadata)
             
             # Get quote (price, market cap, supply, etc.)
             quote_url = f"{self.base_url}/cryptocurrency/quotes/latest"
             quote_params = {'id': str(cmc_id)}
-            quote_response = requests.get(quote_url, headers=self.headers, params=quote_params, timeout=30)
+            quote_response = self.session.get(quote_url, params=quote_params, timeout=30)
             quote_response.raise_for_status()
             quote_result = quote_response.json()
             
-            if (metadata_result.get('status', {}).get('error_code') == 0 and 
-                quote_result.get('status', {}).get('error_code') == 0):
-                metadata = metadata_result.get('data', {}).get(str(cmc_id), {})
+            if quote_result.get('status', {}).get('error_code') == 0:
                 quote = quote_result.get('data', {}).get(str(cmc_id), {})
                 return {'metadata': metadata, 'quote': quote}
             else:
@@ -117,6 +156,60 @@ class CMCClient:
         except Exception as e:
             print(f"  ⚠️  CMC data unavailable: {e}")
             return None
+    
+    def get_token_data_bulk(self, cmc_ids: List[int]) -> Dict[int, Dict]:
+        """Get metadata and quotes for up to 100 tokens in one info + one quotes call
+        
+        Metadata already in the disk cache is not re-requested, so once the cache
+        is warm this is a single quotes/latest call per batch. Returns a dict
+        cmc_id -> {'metadata': ..., 'quote': ...}; ids missing from either
+        response are left out.
+        """
+        ids = [int(cmc_id) for cmc_id in cmc_ids if cmc_id]
+        if not ids:
+            return {}
+        
+        metadata_by_id = {}
+        uncached = []
+        for cmc_id in ids:
+            cached = load_cached_cmc_info(cmc_id)
+            if cached is None:
+                uncached.append(cmc_id)
+            else:
+                metadata_by_id[str(cmc_id)] = cached
+        
+        try:
+            if uncached:
+                metadata_params = {'id': ','.join(map(str, uncached)), 'skip_invalid': 'true'}
+                metadata_response = self.session.get(f"{self.base_url}/cryptocurrency/info", params=metadata_params, timeout=30)
+                metadata_response.raise_for_status()
+                metadata_result = metadata_response.json()
+                if metadata_result.get('status', {}).get('error_code') != 0:
+                    return {}
+                for key, metadata in metadata_result.get('data', {}).items():
+                    metadata_by_id[key] = metadata
+                    save_cached_cmc_info(key, metadata)
+            
+            # skip_invalid: one delisted id must not fail the whole batch
+            quote_params = {'id': ','.join(map(str, ids)), 'skip_invalid': 'true'}
+            quote_response = self.session.get(f"{self.base_url}/cryptocurrency/quotes/latest", params=quote_params, timeout=30)
+            quote_response.raise_for_status()
+            quote_result = quote_response.json()
+        except Exception as e:
+            print(f"  ⚠️  CMC bulk data unavailable: {e}")
+            return {}
+        
+        if quote_result.get('status', {}).get('error_code') != 0:
+            return {}
+        
+        quote_by_id = quote_result.get('data', {})
+        results = {}
+        for cmc_id in ids:
+            metadata = metadata_by_id.get(str(cmc_id))
+            quote = quote_by_id.get(str(cmc_id))
+            if metadata and quote:
+                results[cmc_id] = {'metadata': metadata, 'quote': quote}
+        return results
 
 
 class BinanceDataFetcher:
@@ -323,11 +416,10 @@ class NotionClient:
         }
         self.base_url = 'https://api.notion.com/v1'
     
-    def query_database(self, filter_params: Dict = None, max_retries: int = 3) -> List[Dict]:
-        """Query database pages with retry"""
-        url = f"{self.base_url}/databases/{self.database_id}/query"
-        # Use a session with retries and avoid inheriting environment proxies which
-        # can cause ProxyError in some local network setups (VPN/proxy misconfig).
+    def _query_session(self, max_retries: int) -> requests.Session:
+        """Session for database queries with retries"""
+        # Avoid inheriting environment proxies which can cause ProxyError in
+        # some local network setups (VPN/proxy misconfig).
         session = requests.Session()
         session.headers.update(self.headers)
         session.trust_env = False
@@ -341,6 +433,42 @@ class NotionClient:
         adapter = HTTPAdapter(max_retries=retry_strategy)
         session.mount("https://", adapter)
         session.mount("http://", adapter)
+        return session
+
+    def iter_database_pages(self, filter_params: Dict = None, max_retries: int = 3) -> Iterator[List[Dict]]:
+        """Yield query results one Notion page (up to 100 rows) at a time, in order
+        
+        The request for the next page is issued as soon as its cursor is known,
+        so it is in flight while the caller processes the current page. At most
+        one request is outstanding, which stays within Notion's rate limit.
+        """
+        url = f"{self.base_url}/databases/{self.database_id}/query"
+        session = self._query_session(max_retries)
+
+        def fetch(start_cursor):
+            payload = {}
+            if filter_params:
+                payload['filter'] = filter_params
+            if start_cursor:
+                payload['start_cursor'] = start_cursor
+            resp = session.post(url, json=payload, timeout=30)
+            resp.raise_for_status()
+            return resp.json()
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(fetch, None)
+            while future is not None:
+                result = future.result()
+                if result.get('has_more'):
+                    future = executor.submit(fetch, result.get('next_cursor'))
+                else:
+                    future = None
+                yield result.get('results', [])
+
+    def query_database(self, filter_params: Dict = None, max_retries: int = 3) -> List[Dict]:
+        """Query database pages with retry"""
+        url = f"{self.base_url}/databases/{self.database_id}/query"
+        session = self._query_session(max_retries)
 
         all_results = []
         has_more = True
@@ -810,8 +938,8 @@ def auto_match_new_symbols(cmc_mapping: Dict, cmc_api_key: str) -> Dict:
             },
             "mapping": cmc_mapping
         }
-        with CMC_MAPPING_FILE.open('w') as f:
-            json.dump(mapping_data, f, indent=2, ensure_ascii=False)
+        with CMC_MAPPING_FILE.open('wb') as f:
+            f.write(orjson.dumps(mapping_data, option=orjson.OPT_INDENT_2))
         print(f"  💾 Saved {matched} new matches to mapping file")
     
     return cmc_mapping
@@ -953,8 +1081,8 @@ Examples:
     # Load CMC mapping
     cmc_mapping = {}
     if CMC_MAPPING_FILE.exists():
-        with CMC_MAPPING_FILE.open('r') as f:
-            raw = json.load(f)
+        with CMC_MAPPING_FILE.open('rb') as f:
+            raw = orjson.loads(f.read())
             # support two formats: {"mapping": {...}} or plain dict
             if isinstance(raw, dict) and 'mapping' in raw and isinstance(raw['mapping'], dict):
                 cmc_mapping = raw['mapping']
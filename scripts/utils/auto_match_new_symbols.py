@@ -3,16 +3,42 @@
 自动匹配新上市的 Binance 合约到 CoinMarketCap
 """
 
-import requests
-import json
+import aiohttp
+import argparse
+import asyncio
+import ijson
+import orjson
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'core'))
+from http_utils import make_session, retry_after
+
 # Configuration
 ROOT = Path(__file__).resolve().parents[1]
 CMC_MAPPING_FILE = ROOT / 'binance_cmc_mapping.json'
 API_CONFIG_FILE = ROOT / 'api_config.json'
+CMC_MAP_URL = "https://pro-api.coinmarketcap.com/v1/cryptocurrency/map"
+CMC_CONCURRENCY = 10  # concurrent CMC lookups
+# Successful symbol lookups are kept across runs (CMC map results rarely change)
+SEARCH_CACHE_FILE = ROOT / '.cmc_map_cache.json'
+SEARCH_CACHE_TTL = 86400  # seconds
+# Binance symbol -> market type ('perp' / 'spot' / 'both'), reused for an hour
+SYMBOLS_CACHE_FILE = ROOT / '.cache' / 'binance_market_types.json'
+SYMBOLS_CACHE_TTL = 3600  # seconds
+# Symbols CMC had no match for: {symbol: failed_at}, not looked up again for a week
+NEGATIVE_CACHE_FILE = ROOT / '.cache' / 'cmc_negative_cache.json'
+NEGATIVE_CACHE_TTL = 7 * 86400  # seconds
+# Returned instead of a match when CMC gave no usable answer (network error,
+# non-2xx, error_code != 0); unlike None ("no such symbol") it is never cached
+LOOKUP_FAILED = object()
+
+
+# Binance exchangeInfo requests (spot + perp share one pool)
+_SESSION = make_session(pool_connections=4, pool_maxsize=32)
 
 
 class CMCMatcher:
@@ -25,79 +51,199 @@ class CMCMatcher:
             'X-CMC_PRO_API_KEY': api_key,
             'Accept': 'application/json'
         }
+        # Keep-alive session with the API key set once
+        self.session = make_session(pool_connections=4, pool_maxsize=32)
+        self.session.headers.update(self.headers)
+        self.search_cache = self.load_search_cache()
+    
+    @staticmethod
+    def load_search_cache() -> Dict[str, Dict]:
+        """Load unexpired lookups: {symbol: {'cached_at': epoch, 'match': {...}}}"""
+        try:
+            with open(SEARCH_CACHE_FILE, 'rb') as f:
+                cache = orjson.loads(f.read())
+        except (OSError, ValueError):
+            return {}
+        now = time.time()
+        return {s: e for s, e in cache.items() if now - e.get('cached_at', 0) < SEARCH_CACHE_TTL}
+    
+    def save_search_cache(self):
+        """Persist the lookup cache (failures are non-fatal)"""
+        try:
+            with open(SEARCH_CACHE_FILE, 'wb') as f:
+                f.write(orjson.dumps(self.search_cache))
+        except OSError as e:
+            print(f"  ⚠️  无法写入 CMC 查询缓存: {e}")
     
-    def search_symbol(self, symbol: str) -> Optional[Dict]:
+    def cached_match(self, symbol: str) -> Optional[Dict]:
+        entry = self.search_cache.get(symbol)
+        if entry and time.time() - entry['cached_at'] < SEARCH_CACHE_TTL:
+            return entry['match']
+        return None
+    
+    def remember_match(self, symbol: str, match: Optional[Dict]):
+        if match and match is not LOOKUP_FAILED:
+            self.search_cache[symbol] = {'cached_at': time.time(), 'match': match}
+    
+    @staticmethod
+    def best_match(data: Dict):
+        """Pick the best match from a /cryptocurrency/map response
+        
+        Returns None if CMC answered but has no candidates, LOOKUP_FAILED if
+        CMC reported an error.
+        """
+        if data.get('status', {}).get('error_code') != 0:
+            return LOOKUP_FAILED
+        
+        matches = data.get('data', [])
+        if not matches:
+            return None
+        
+        # Prefer active coins over inactive ones
+        active_matches = [m for m in matches if m.get('is_active') == 1]
+        if active_matches:
+            best_match = active_matches[0]
+        else:
+            best_match = matches[0]
+        
+        return {
+            'cmc_id': best_match['id'],
+            'cmc_slug': best_match['slug'],
+            'cmc_symbol': best_match['symbol'],
+            'match_type': 'auto'
+        }
+    
+    def search_symbol(self, symbol: str):
         """
         Search for a symbol in CoinMarketCap
-        Returns the best match or None
+        Returns the best match, None if CMC has no match, or LOOKUP_FAILED
         """
+        cached = self.cached_match(symbol)
+        if cached:
+            return cached
+        
         try:
             # Method 1: Try exact match with map endpoint
-            url = f"{self.base_url}/cryptocurrency/map"
             params = {'symbol': symbol, 'limit': 10}
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
+            response = self.session.get(CMC_MAP_URL, params=params, timeout=30)
             response.raise_for_status()
-            data = response.json()
-            
-            if data.get('status', {}).get('error_code') == 0:
-                matches = data.get('data', [])
-                
-                if matches:
-                    # Prefer active coins over inactive ones
-                    active_matches = [m for m in matches if m.get('is_active') == 1]
-                    if active_matches:
-                        best_match = active_matches[0]
-                    else:
-                        best_match = matches[0]
-                    
-                    return {
-                        'cmc_id': best_match['id'],
-                        'cmc_slug': best_match['slug'],
-                        'cmc_symbol': best_match['symbol'],
-                        'match_type': 'auto'
-                    }
-            
-            return None
+            match = self.best_match(orjson.loads(response.content))
+            if match and match is not LOOKUP_FAILED:
+                self.remember_match(symbol, match)
+                self.save_search_cache()
+            return match
             
         except Exception as e:
             print(f"  ⚠️  CMC search failed: {e}")
+            return LOOKUP_FAILED
+    
+    async def search_symbol_async(self, session: aiohttp.ClientSession, sem: asyncio.Semaphore,
+                                  symbol: str, max_retries: int = 3):
+        """Async search_symbol; sem bounds the number of lookups in flight
+        
+        A 429 that is still there after max_retries, any other non-2xx status
+        and network/timeout errors all give LOOKUP_FAILED.
+        """
+        params = {'symbol': symbol, 'limit': 10}
+        try:
+            for attempt in range(max_retries):
+                async with sem, session.get(CMC_MAP_URL, params=params) as resp:
+                    if resp.status != 429 or attempt == max_retries - 1:
+                        resp.raise_for_status()
+                        return self.best_match(orjson.loads(await resp.read()))
+                    wait = retry_after(resp.headers, 2 ** attempt)
+                # Back off outside the semaphore so other lookups keep going
+                await asyncio.sleep(wait)
+        except Exception as e:
+            print(f"  ⚠️  {symbol} CMC search failed: {e}")
+            return LOOKUP_FAILED
+    
+    async def search_symbols(self, symbols: List[str]) -> list:
+        """Look up all symbols concurrently; results (see search_symbol) are in input order"""
+        results = {symbol: self.cached_match(symbol) for symbol in symbols}
+        misses = [symbol for symbol, match in results.items() if match is None]
+        if len(misses) < len(results):
+            print(f"📋 {len(results) - len(misses)} 个币种使用缓存的 CMC 查询结果")
+        
+        if misses:
+            sem = asyncio.Semaphore(CMC_CONCURRENCY)
+            connector = aiohttp.TCPConnector(limit=20, ttl_dns_cache=300)
+            timeout = aiohttp.ClientTimeout(total=30)
+            async with aiohttp.ClientSession(headers=self.headers, connector=connector,
+                                             timeout=timeout) as session:
+                matches = await asyncio.gather(
+                    *(self.search_symbol_async(session, sem, symbol) for symbol in misses)
+                )
+            for symbol, match in zip(misses, matches):
+                results[symbol] = match
+                self.remember_match(symbol, match)
+            self.save_search_cache()
+        
+        return [results[symbol] for symbol in symbols]
+
+
+def load_cached_symbols() -> Optional[Dict[str, str]]:
+    """Cached market types if younger than SYMBOLS_CACHE_TTL, else None"""
+    try:
+        if time.time() - SYMBOLS_CACHE_FILE.stat().st_mtime >= SYMBOLS_CACHE_TTL:
             return None
+        with open(SYMBOLS_CACHE_FILE, 'rb') as f:
+            return orjson.loads(f.read())
+    except (OSError, ValueError):
+        return None
 
 
-def get_binance_symbols() -> Dict[str, str]:
-    """Get all trading symbols from Binance (spot + perp)"""
-    symbols = {}
+def save_cached_symbols(symbols: Dict[str, str]):
+    try:
+        SYMBOLS_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(SYMBOLS_CACHE_FILE, 'wb') as f:
+            f.write(orjson.dumps(symbols))
+    except OSError as e:
+        print(f"  ⚠️  无法写入 Binance 币种缓存: {e}")
+
+
+def _trading_usdt_symbols(url: str) -> set:
+    """Trading USDT pairs of an exchangeInfo endpoint, with 'USDT' stripped
+    
+    The response is streamed through ijson one symbol entry at a time.
+    """
+    with _SESSION.get(url, timeout=10, stream=True) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        return {s['symbol'].replace('USDT', '') for s in ijson.items(response.raw, 'symbols.item')
+                if s['symbol'].endswith('USDT') and s['status'] == 'TRADING'}
+
+
+def get_binance_symbols(refresh: bool = False) -> Dict[str, str]:
+    """Get all trading symbols from Binance (spot + perp), cached for SYMBOLS_CACHE_TTL"""
+    if not refresh:
+        cached = load_cached_symbols()
+        if cached:
+            print(f"📋 使用缓存的 Binance 币种列表 ({len(cached)} 个)")
+            return cached
     
     try:
-        # Get perpetual contracts
-        print("📡 获取 Binance 永续合约列表...")
-        perp_response = requests.get("https://fapi.binance.com/fapi/v1/exchangeInfo", timeout=10)
-        perp_response.raise_for_status()
-        
-        for s in perp_response.json()['symbols']:
-            if s['symbol'].endswith('USDT') and s['status'] == 'TRADING':
-                symbol = s['symbol'].replace('USDT', '')
-                symbols[symbol] = 'perp'
+        # Perpetual and spot markets are on different hosts: fetch them in parallel
+        print("📡 获取 Binance 永续合约和现货列表...")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            perp_future = executor.submit(_trading_usdt_symbols, "https://fapi.binance.com/fapi/v1/exchangeInfo")
+            spot_future = executor.submit(_trading_usdt_symbols, "https://api.binance.com/api/v3/exchangeInfo")
+            perp_set = perp_future.result()
+            spot_set = spot_future.result()
         
-        print(f"  ✅ 找到 {len([s for s in symbols.values() if s == 'perp'])} 个永续合约")
+        print(f"  ✅ 找到 {len(perp_set)} 个永续合约")
         
-        # Get spot markets
-        print("📡 获取 Binance 现货列表...")
-        spot_response = requests.get("https://api.binance.com/api/v3/exchangeInfo", timeout=10)
-        spot_response.raise_for_status()
+        both = perp_set & spot_set
+        spot_only = spot_set - perp_set
+        symbols = dict.fromkeys(perp_set - spot_set, 'perp')
+        symbols.update(dict.fromkeys(spot_only, 'spot'))
+        symbols.update(dict.fromkeys(both, 'both'))
         
-        for s in spot_response.json()['symbols']:
-            if s['symbol'].endswith('USDT') and s['status'] == 'TRADING':
-                symbol = s['symbol'].replace('USDT', '')
-                if symbol in symbols:
-                    symbols[symbol] = 'both'
-                else:
-                    symbols[symbol] = 'spot'
-        
-        print(f"  ✅ 找到 {len([s for s in symbols.values() if s == 'spot'])} 个现货")
-        print(f"  ✅ 找到 {len([s for s in symbols.values() if s == 'both'])} 个同时有现货和合约")
+        print(f"  ✅ 找到 {len(spot_only)} 个现货")
+        print(f"  ✅ 找到 {len(both)} 个同时有现货和合约")
         
+        save_cached_symbols(symbols)
         return symbols
         
     except Exception as e:
@@ -105,11 +251,32 @@ def get_binance_symbols() -> Dict[str, str]:
         return {}
 
 
+def load_negative_cache() -> Dict[str, float]:
+    """Recent lookups with no CMC match {symbol: failed_at}; expired entries are dropped"""
+    try:
+        with open(NEGATIVE_CACHE_FILE, 'rb') as f:
+            cache = orjson.loads(f.read())
+    except (OSError, ValueError):
+        return {}
+    now = time.time()
+    return {s: failed_at for s, failed_at in cache.items() if now - failed_at < NEGATIVE_CACHE_TTL}
+
+
+def save_negative_cache(cache: Dict[str, float]):
+    """Persist the no-match lookups (failures to write are non-fatal)"""
+    try:
+        NEGATIVE_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(NEGATIVE_CACHE_FILE, 'wb') as f:
+            f.write(orjson.dumps(cache))
+    except OSError as e:
+        print(f"  ⚠️  无法写入失败查询缓存: {e}")
+
+
 def load_existing_mapping() -> Dict:
     """Load existing CMC mapping"""
     if CMC_MAPPING_FILE.exists():
-        with open(CMC_MAPPING_FILE) as f:
-            data = json.load(f)
+        with open(CMC_MAPPING_FILE, 'rb') as f:
+            data = orjson.loads(f.read())
             return data.get('mapping', {})
     return {}
 
@@ -124,14 +291,18 @@ def save_mapping(mapping: Dict):
         "mapping": mapping
     }
     
-    with open(CMC_MAPPING_FILE, 'w') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    with open(CMC_MAPPING_FILE, 'wb') as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
     
     print(f"\n✅ 已保存到 {CMC_MAPPING_FILE}")
 
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description='自动匹配 Binance 新币种到 CoinMarketCap')
+    parser.add_argument('--refresh', action='store_true', help='忽略缓存，重新下载 Binance 币种列表并重试失败的币种')
+    args = parser.parse_args()
+    
     print("🔍 自动匹配 Binance 新币种到 CoinMarketCap\n")
     
     # Load API key
@@ -139,8 +310,8 @@ def main():
         print(f"❌ 找不到 API 配置文件: {API_CONFIG_FILE}")
         return
     
-    with open(API_CONFIG_FILE) as f:
-        api_config = json.load(f)
+    with open(API_CONFIG_FILE, 'rb') as f:
+        api_config = orjson.loads(f.read())
         cmc_api_key = api_config.get('coinmarketcap', {}).get('api_key')
     
     if not cmc_api_key:
@@ -151,7 +322,7 @@ def main():
     matcher = CMCMatcher(cmc_api_key)
     
     # Get Binance symbols
-    binance_symbols = get_binance_symbols()
+    binance_symbols = get_binance_symbols(refresh=args.refresh)
     if not binance_symbols:
         return
     
@@ -159,18 +330,29 @@ def main():
     existing_mapping = load_existing_mapping()
     print(f"\n📋 现有 mapping 中有 {len(existing_mapping)} 个币种")
     
+    # Symbols that found no CMC match within NEGATIVE_CACHE_TTL are not retried
+    negative_cache = {} if args.refresh else load_negative_cache()
+    
     # Find new symbols
     new_symbols = []
     missing_cmc_id = []
+    skipped = 0
     
-    for symbol in sorted(binance_symbols.keys()):
-        if symbol not in existing_mapping:
+    for symbol in binance_symbols:
+        if symbol in negative_cache:
+            skipped += 1
+        elif symbol not in existing_mapping:
             new_symbols.append(symbol)
         elif not existing_mapping[symbol].get('cmc_id'):
             missing_cmc_id.append(symbol)
+    # Only the (short) lists we act on need a stable order
+    new_symbols.sort()
+    missing_cmc_id.sort()
     
     print(f"🆕 发现 {len(new_symbols)} 个新币种")
     print(f"⚠️  {len(missing_cmc_id)} 个币种缺少 CMC ID")
+    if skipped:
+        print(f"⏭️  跳过 {skipped} 个近 {NEGATIVE_CACHE_TTL // 86400} 天内在 CMC 上未找到的币种")
     
     if not new_symbols and not missing_cmc_id:
         print("\n✅ 所有币种都已有 CMC mapping！")
@@ -182,38 +364,39 @@ def main():
     
     matched = 0
     failed = []
+    lookup_failed = []
     
-    for i, symbol in enumerate(symbols_to_match, 1):
+    # Search in CMC (concurrently, bounded by CMC_CONCURRENCY)
+    matches = asyncio.run(matcher.search_symbols(symbols_to_match))
+    
+    for i, (symbol, match) in enumerate(zip(symbols_to_match, matches), 1):
         print(f"[{i:3d}/{len(symbols_to_match):3d}] {symbol}", end=" ")
         
-        # Search in CMC
-        match = matcher.search_symbol(symbol)
-        
-        if match:
+        if match is LOOKUP_FAILED:
+            # CMC gave no usable answer: not cached, the symbol is retried next run
+            lookup_failed.append(symbol)
+            print(f"⚠️  查询失败，下次运行重试")
+        elif match:
             existing_mapping[symbol] = match
             matched += 1
             print(f"✅ 找到: {match['cmc_slug']} (ID: {match['cmc_id']})")
         else:
-            existing_mapping[symbol] = {
-                'cmc_id': None,
-                'cmc_slug': None,
-                'cmc_symbol': None,
-                'match_type': 'none'
-            }
+            # Remembered in the negative cache instead of a cmc_id=None mapping entry
+            negative_cache[symbol] = time.time()
             failed.append(symbol)
             print(f"❌ 未找到")
-        
-        # Rate limiting: wait 0.3s between requests
-        if i < len(symbols_to_match):
-            time.sleep(0.3)
     
     # Save updated mapping
-    save_mapping(existing_mapping)
+    if matched:
+        save_mapping(existing_mapping)
+    save_negative_cache(negative_cache)
     
     # Summary
     print(f"\n{'='*60}")
     print(f"✅ 成功匹配: {matched} 个")
     print(f"❌ 未找到: {len(failed)} 个")
+    if lookup_failed:
+        print(f"⚠️  查询失败（未缓存）: {len(lookup_failed)} 个 - {', '.join(lookup_failed)}")
     
     if failed:
         print(f"\n未找到 CMC 数据的币种:")
@@ -3,8 +3,10 @@
 从币安API获取最新的交易对列表，并更新到Notion数据库和本地配置文件。
 新增功能：在创建新币种页面时，自动从CoinMarketCap获取并填充元数据。
 """
+import os
 import sys
 import json
+import tempfile
 import time
 import requests
 from pathlib import Path
@@ -54,9 +56,11 @@ def load_config(path):
         sys.exit(1)
 
 def save_config(data, path):
-    """通用配置保存函数。"""
-    with open(path, 'w', encoding='utf-8') as f:
+    """通用配置保存函数（先写临时文件再替换，并发读取的进程不会读到半个文件）。"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=4)
+    os.replace(tmp_path, path)
 
 def get_cmc_metadata_for_new_coin(cmc_client, cmc_id):
     """为新币种获取CMC元数据。使用现有的build_properties函数来组装属性。"""
@@ -97,7 +101,7 @@ def get_cmc_metadata_for_new_coin(cmc_client, cmc_id):
 
 
 def main():
-    """主执行函数。"""
+    """主执行函数。返回本次新发现的币种列表。"""
     print("\n" + "="*80)
     print("🔄 开始同步币安最新交易对...")
     print("="*80)
@@ -122,7 +126,7 @@ def main():
     all_binance_symbols = get_all_binance_usdt_perp()
     if not all_binance_symbols:
         print("❌ 无法从币安获取交易对列表，程序终止。")
-        return
+        return []
     print(f"    - 币安返回 {len(all_binance_symbols)} 个USDT永续合约。")
 
     print("  - 从Notion获取现有交易对...")
@@ -229,5 +233,7 @@ def main():
         print("   或使用菜单选项 [3] 一键完成以上步骤。")
     print("="*80)
 
+    return new_symbols
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
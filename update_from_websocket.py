@@ -305,8 +305,8 @@ class NotionUpdater:
         return result
 
 
-def main():
-    """主函数"""
+def main(argv=None):
+    """主函数（argv 默认取 sys.argv[1:]）"""
     
     import argparse
     
@@ -315,7 +315,7 @@ def main():
     parser.add_argument('--update-metadata', action='store_true', help='更新 CMC 元数据（logo、网站等）')
     parser.add_argument('--workers', type=int, default=10, help='并发worker数量')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     print("=" * 80)
     print("🚀 WebSocket 数据 → Notion 更新器")
@@ -325,10 +325,6 @@ def main():
     print("=" * 80)
     print()
     
-    # 加载配置
-    with open(CONFIG_FILE, 'r') as f:
-        config = json.load(f)
-    
     # 加载 WebSocket 数据
     print("📂 加载 WebSocket 数据...")
     if not WS_DATA_FILE.exists():
@@ -342,9 +338,23 @@ def main():
     print(f"✅ 加载了 {len(ws_data_all)} 个币种的数据")
     print()
     
+    push(ws_data_all, args.symbols, args.update_metadata, args.workers)
+
+
+def push(ws_data_all: Dict[str, dict], symbols: List[str] = None,
+         update_metadata: bool = False, workers: int = 10) -> dict:
+    """把 WebSocket 数据（内存中的 {symbol: data}）写入 Notion，返回统计结果
+    
+    pipeline.py 直接传入刚收集的数据，无需经过 JSON 文件
+    """
+    
+    # 加载配置
+    with open(CONFIG_FILE, 'r') as f:
+        config = json.load(f)
+    
     # 筛选要更新的币种
-    if args.symbols:
-        symbols_to_update = [s.upper() for s in args.symbols]
+    if symbols:
+        symbols_to_update = [s.upper() for s in symbols]
         ws_data = {k: v for k, v in ws_data_all.items() if k in symbols_to_update}
         print(f"🎯 指定更新 {len(symbols_to_update)} 个币种")
     else:
@@ -361,7 +371,7 @@ def main():
     print()
     
     # 并行处理
-    print(f"🚀 开始更新 {len(ws_data)} 个币种（{args.workers} workers）...")
+    print(f"🚀 开始更新 {len(ws_data)} 个币种（{workers} workers）...")
     print()
     
     start_time = time.time()
@@ -372,14 +382,14 @@ def main():
         'skipped': 0
     }
     
-    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+    with ThreadPoolExecutor(max_workers=workers) as executor:
         futures = {
             executor.submit(
                 updater.process_symbol,
                 symbol,
                 data,
                 existing_pages,
-                args.update_metadata
+                update_metadata
             ): symbol
             for symbol, data in ws_data.items()
         }
@@ -415,6 +425,8 @@ def main():
     print(f"总计: {results['updated'] + results['created']}/{len(ws_data)}")
     print(f"耗时: {elapsed:.1f}秒 ({(results['updated'] + results['created'])/elapsed:.2f} 个/秒)")
     print("=" * 80)
+    
+    return results
 
 
 if __name__ == '__main__':